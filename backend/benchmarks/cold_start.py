@@ -0,0 +1,57 @@
+"""
+Benchmark de cold start da API: do import ate o primeiro request com
+sucesso.
+
+Cada rodada e um interpretador novo que importa backend.src.main, roda o
+startup (lifespan) e faz GET /api/health/ com o TestClient, medindo cada
+fase. O banco de DATABASE_URL precisa estar migrado (alembic upgrade head).
+
+    python -m backend.benchmarks.cold_start --runs 10
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+
+PHASES = ("import", "startup", "first_request", "total")
+
+_RUN = """
+import json, time
+start = time.perf_counter()
+from backend.src.main import app
+imported = time.perf_counter()
+from fastapi.testclient import TestClient
+with TestClient(app) as client:
+    started = time.perf_counter()
+    response = client.get("/api/health/")
+    done = time.perf_counter()
+assert response.status_code == 200, response.text
+print(json.dumps({"import": imported - start, "startup": started - imported,
+                  "first_request": done - started, "total": done - start}))
+"""
+
+
+def run_once() -> dict:
+    output = subprocess.run([sys.executable, "-c", _RUN], check=True,
+                            capture_output=True, text=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--runs", type=int, default=10)
+    args = parser.parse_args()
+
+    run_once()  # aquecimento do cache de bytecode
+    runs = [run_once() for _ in range(args.runs)]
+
+    print(f"{'fase':>14} {'p50 ms':>8} {'max ms':>8}")
+    for phase in PHASES:
+        timings = [run[phase] * 1000 for run in runs]
+        print(f"{phase:>14} {statistics.median(timings):>8.1f} "
+              f"{max(timings):>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+Benchmark da compressao das respostas: CPU gasta x bytes economizados.
+
+Busca paginas tipicas das listagens (sem compressao) pela propria API, com
+o TestClient, e comprime cada uma com gzip (e br/zstd, se os pacotes
+estiverem instalados) em alguns niveis, medindo o tempo por pagina e a
+taxa de compressao. O banco de DATABASE_URL precisa estar migrado e com
+dados (seed.py).
+
+    python -m backend.benchmarks.compression --rows 20 50 --repeat 50
+"""
+import argparse
+import gzip
+import statistics
+import time
+
+from fastapi.testclient import TestClient
+
+from backend.src.api import compression
+
+ROUTES = ("/api/orders", "/api/products", "/api/customers")
+
+LEVELS = {"gzip": (1, 6, 9), "br": (1, 4, 11), "zstd": (1, 3, 19)}
+
+
+def compressor(encoding: str, level: int):
+    if encoding == "gzip":
+        return lambda body: gzip.compress(body, compresslevel=level)
+    if encoding == "br":
+        return lambda body: compression.brotli.compress(body, quality=level)
+    return compression.zstandard.ZstdCompressor(level=level).compress
+
+
+def fetch_pages(rows: list) -> dict:
+    from backend.src.main import app
+
+    pages = {}
+    with TestClient(app) as client:
+        for route in ROUTES:
+            for size in rows:
+                response = client.get(
+                    f"{route}?first=0&rows={size}",
+                    headers={"Accept-Encoding": "identity"})
+                response.raise_for_status()
+                pages[f"{route} rows={size}"] = response.content
+    return pages
+
+
+def measure(body: bytes, compress, repeat: int) -> tuple[float, int]:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        size = len(compress(body))
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings) * 1000, size
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, nargs="+", default=[20, 50])
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    encodings = compression.available_encodings(LEVELS)
+    pages = fetch_pages(args.rows)
+
+    print(f"{'pagina':<26} {'bytes':>8} {'codec':>8} {'bytes':>8} "
+          f"{'taxa':>6} {'ms':>7} {'MB/s':>7}")
+    for name, body in pages.items():
+        for encoding in encodings:
+            for level in LEVELS[encoding]:
+                elapsed, size = measure(body, compressor(encoding, level),
+                                        args.repeat)
+                print(f"{name:<26} {len(body):>8} "
+                      f"{f'{encoding}-{level}':>8} {size:>8} "
+                      f"{len(body) / size:>6.1f} {elapsed:>7.3f} "
+                      f"{len(body) / 1e6 / (elapsed / 1000):>7.1f}")
+
+
+if __name__ == "__main__":
+    main()
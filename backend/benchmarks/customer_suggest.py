@@ -0,0 +1,114 @@
+"""
+Benchmark do autocomplete de clientes: GET /api/customers?name= (ilike
+'%x%' + count) x GET /api/customers/suggest (prefixo, sem count).
+
+Cria --customers clientes com nomes, e-mails e documentos variados, mede p50
+e p99 de cada termo com a listagem atual, com o suggest sem cache (so o
+indice de prefixo) e com o suggest pelo service (cache quente). Os dados
+criados sao apagados no final.
+
+    python -m backend.benchmarks.customer_suggest --customers 1000000
+"""
+import argparse
+import random
+import statistics
+import time
+import uuid
+from datetime import datetime
+
+from sqlalchemy import delete, insert
+
+from backend.src.application.dtos.customer import CustomerQuery
+from backend.src.application.services.customer_service import \
+    CustomerService, suggestion_cache
+from backend.src.infrastructure.database import SessionLocal
+from backend.src.infrastructure.models import CustomerModel
+from backend.src.infrastructure.repositories.customer_repository import \
+    CustomerRepository
+from backend.src.settings import settings
+
+FIRST = ("Ana", "Bruno", "Carla", "Diego", "Elisa", "Fabio", "Gabriela",
+         "Heitor", "Isabela", "Joao", "Larissa", "Marcos", "Natalia",
+         "Otavio", "Paula", "Rafael", "Sofia", "Tiago", "Vanessa", "Wagner")
+LAST = ("Silva", "Souza", "Oliveira", "Santos", "Pereira", "Lima",
+        "Carvalho", "Ferreira", "Almeida", "Costa", "Gomes", "Ribeiro")
+
+TERMS = ("a", "ma", "mar", "marcos s", "joao.", "zz", "9", "900")
+
+
+def seed(count: int, tag: str, batch: int = 10_000) -> None:
+    rng = random.Random(tag)
+    base = 90_000_000_000 + rng.randrange(900) * 10_000_000
+    now = datetime.now()
+    for start in range(0, count, batch):
+        rows = []
+        for i in range(start, min(start + batch, count)):
+            first, last = rng.choice(FIRST), rng.choice(LAST)
+            rows.append({
+                "name": f"{first} {last} {i}",
+                "email": f"{first.lower()}.{last.lower()}.{i}"
+                         f".{tag}@example.com",
+                "document": f"{base + i:011d}",
+                "created_at": now})
+        with SessionLocal.begin() as session:
+            session.execute(insert(CustomerModel), rows)
+
+
+def percentiles(run, repeat: int) -> tuple[float, float]:
+    timings = []
+    for _ in range(repeat):
+        session = SessionLocal()
+        try:
+            start = time.perf_counter()
+            run(session)
+            timings.append(time.perf_counter() - start)
+        finally:
+            session.close()
+    timings.sort()
+    p99 = timings[min(len(timings) - 1, int(len(timings) * 0.99))]
+    return statistics.median(timings) * 1000, p99 * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--customers", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=100)
+    parser.add_argument("--limit", type=int,
+                        default=settings.customer_suggest_limit)
+    args = parser.parse_args()
+
+    tag = uuid.uuid4().hex[:8]
+    seed(args.customers, tag)
+    try:
+        print(f"{'termo':<10} {'list p50':>9} {'list p99':>9} "
+              f"{'idx p50':>8} {'idx p99':>8} {'cache p50':>10} "
+              f"{'cache p99':>10}")
+        for term in TERMS:
+            listing = percentiles(
+                lambda s: CustomerRepository(s).list(
+                    CustomerQuery(first=0, rows=args.limit, name=term)),
+                args.repeat)
+
+            def uncached(session):
+                suggestion_cache.clear()
+                CustomerService(session, CustomerRepository(session)) \
+                    .suggest(term, args.limit)
+
+            indexed = percentiles(uncached, args.repeat)
+            cached = percentiles(
+                lambda s: CustomerService(s, CustomerRepository(s))
+                .suggest(term, args.limit), args.repeat)
+            print(f"{term:<10} {listing[0]:>9.2f} {listing[1]:>9.2f} "
+                  f"{indexed[0]:>8.2f} {indexed[1]:>8.2f} "
+                  f"{cached[0]:>10.3f} {cached[1]:>10.3f}")
+    finally:
+        suggestion_cache.clear()
+        with SessionLocal.begin() as session:
+            session.execute(delete(CustomerModel).where(
+                CustomerModel.email.like(f"%.{tag}@example.com")))
+
+
+if __name__ == "__main__":
+    main()
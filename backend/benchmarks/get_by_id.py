@@ -0,0 +1,96 @@
+"""
+Benchmark de CPU do Python por GET /api/products/{id}, antes e depois dos
+statements em cache.
+
+"antes" troca ProductRepository.get pela versao anterior (select montado a
+cada chamada e os itens de pedido do produto carregados por selectin);
+"depois" usa o repositorio atual. Mede time.process_time por chamada do
+request completo (TestClient, com middlewares) e so do service/repositorio.
+Com SQLite o tempo do banco roda no mesmo processo e entra na conta. O
+banco de DATABASE_URL precisa estar migrado e com dados (seed.py).
+
+    python -m backend.benchmarks.get_by_id --requests 2000
+"""
+import argparse
+import logging
+import statistics
+import time
+from contextlib import nullcontext
+from unittest import mock
+
+from fastapi.testclient import TestClient
+from sqlalchemy import select
+
+from backend.src.application.services.product_service import ProductService
+from backend.src.exceptions import NotFoundException
+from backend.src.infrastructure.database import SessionLocal
+from backend.src.infrastructure.models import ProductModel
+from backend.src.infrastructure.repositories.product_repository import \
+    ProductRepository
+
+
+def legacy_get(self, product_id: int) -> ProductModel:
+    stmt = select(ProductModel).where(ProductModel.id == product_id)
+    product = self.session.execute(stmt).scalars().one_or_none()
+
+    if not product:
+        raise NotFoundException("Product", product_id)
+
+    return product
+
+
+def cpu_per_call(run, calls: int, warmup: int = 200) -> tuple[float, float]:
+    for _ in range(warmup):
+        run()
+    timings = []
+    for _ in range(calls):
+        start = time.process_time_ns()
+        run()
+        timings.append(time.process_time_ns() - start)
+    return statistics.mean(timings) / 1000, statistics.median(timings) / 1000
+
+
+def measure(product_id: int, calls: int) -> tuple:
+    from backend.src.main import app
+
+    def service_get():
+        with SessionLocal() as session:
+            ProductService(session, ProductRepository(session)).get(
+                product_id)
+
+    with TestClient(app) as client:
+        def request():
+            response = client.get(f"/api/products/{product_id}")
+            response.raise_for_status()
+
+        return (cpu_per_call(request, calls),
+                cpu_per_call(service_get, calls))
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=2000)
+    args = parser.parse_args()
+    # um log por request do TestClient
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+
+    with SessionLocal() as session:
+        product_id = session.scalar(select(ProductModel.id)
+                                    .order_by(ProductModel.id).limit(1))
+
+    print(f"{'':<7} {'request us':>11} {'p50':>8} "
+          f"{'service us':>11} {'p50':>8}")
+    for label, patch in (
+            ("antes", mock.patch.object(ProductRepository, "get",
+                                        legacy_get)),
+            ("depois", nullcontext())):
+        with patch:
+            (request, service) = measure(product_id, args.requests)
+        print(f"{label:<7} {request[0]:>11.0f} {request[1]:>8.0f} "
+              f"{service[0]:>11.0f} {service[1]:>8.0f}")
+
+
+if __name__ == "__main__":
+    main()
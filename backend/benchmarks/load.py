@@ -0,0 +1,126 @@
+"""
+Carga HTTP na API servida pelo launcher de producao, comparando numeros de
+workers.
+
+Para cada valor de --workers sobe "python -m backend.src.server" em
+--port, espera o /api/health/, dispara --concurrency clientes em paralelo
+durante --duration segundos sobre as rotas de --path (em rodizio) e derruba
+o servidor com SIGTERM. Use um banco ja migrado e com dados (DATABASE_URL);
+o gerador de carga roda na mesma maquina, entao deixe CPUs livres para ele.
+
+    python -m backend.benchmarks.load --workers 1 4 --concurrency 32
+"""
+import argparse
+import os
+import signal
+import statistics
+import subprocess
+import sys
+import threading
+import time
+from itertools import cycle
+
+import httpx
+
+PATHS = ["/api/products?first=0&rows=20",
+         "/api/customers?first=0&rows=20",
+         "/api/orders?first=0&rows=20"]
+
+
+def start_server(workers: int, port: int) -> subprocess.Popen:
+    server = subprocess.Popen(
+        [sys.executable, "-m", "backend.src.server", "--workers",
+         str(workers), "--port", str(port)],
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    url = f"http://127.0.0.1:{port}/api/health/"
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        try:
+            if httpx.get(url).status_code == 200:
+                return server
+        except httpx.TransportError:
+            pass
+        time.sleep(0.2)
+    server.kill()
+    raise RuntimeError(f"server with {workers} worker(s) did not start")
+
+
+def stop_server(server: subprocess.Popen) -> None:
+    server.send_signal(signal.SIGTERM)
+    server.wait(timeout=60)
+
+
+def load(base_url: str, paths: list, concurrency: int,
+         duration: float) -> dict:
+    latencies, errors = [], [0]
+    lock = threading.Lock()
+    deadline = time.monotonic() + duration
+
+    def client(offset: int) -> None:
+        routes = cycle(paths)
+        for _ in range(offset % len(paths)):
+            next(routes)
+        local, failed = [], 0
+        with httpx.Client(base_url=base_url, timeout=30) as http:
+            while time.monotonic() < deadline:
+                start = time.perf_counter()
+                try:
+                    ok = http.get(next(routes)).status_code == 200
+                except httpx.TransportError:
+                    ok = False
+                if ok:
+                    local.append(time.perf_counter() - start)
+                else:
+                    failed += 1
+        with lock:
+            latencies.extend(local)
+            errors[0] += failed
+
+    threads = [threading.Thread(target=client, args=(i,))
+               for i in range(concurrency)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    return {"rps": len(latencies) / elapsed,
+            "p50": statistics.median(latencies) * 1000 if latencies else 0,
+            "p99": (latencies[int(len(latencies) * 0.99) - 1] * 1000
+                    if latencies else 0),
+            "errors": errors[0]}
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, nargs="+",
+                        default=[1, os.cpu_count() or 1])
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=15)
+    parser.add_argument("--warmup", type=float, default=3)
+    parser.add_argument("--port", type=int, default=8100)
+    parser.add_argument("--path", action="append", dest="paths",
+                        help="rota a exercitar (repetivel)")
+    args = parser.parse_args()
+    paths = args.paths or PATHS
+    base_url = f"http://127.0.0.1:{args.port}"
+
+    print(f"{'workers':>7} {'req/s':>9} {'p50 ms':>8} {'p99 ms':>8} "
+          f"{'errors':>6}")
+    for workers in args.workers:
+        server = start_server(workers, args.port)
+        try:
+            load(base_url, paths, args.concurrency, args.warmup)
+            result = load(base_url, paths, args.concurrency, args.duration)
+        finally:
+            stop_server(server)
+        print(f"{workers:>7} {result['rps']:>9.1f} {result['p50']:>8.1f} "
+              f"{result['p99']:>8.1f} {result['errors']:>6}")
+
+
+if __name__ == "__main__":
+    main()
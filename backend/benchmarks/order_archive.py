@@ -0,0 +1,140 @@
+"""
+Benchmark da listagem de pedidos antes e depois do arquivamento.
+
+Cria um cliente com --old pedidos PAID/CANCELLED antigos e --recent pedidos
+recentes, mede o p50 de OrderRepository.list sem janela (toda a tabela
+quente) e com a janela de --window-days, roda o arquivamento e mede de
+novo. Os dados
+criados sao apagados no final.
+
+    python -m backend.benchmarks.order_archive --old 50000 --recent 5000
+"""
+import argparse
+import statistics
+import time
+import uuid
+from datetime import datetime, timedelta
+
+from sqlalchemy import delete, insert, select
+
+from backend.src.application.dtos.order import OrderQuery
+from backend.src.infrastructure.database import SessionLocal
+from backend.src.infrastructure.models import CustomerModel, OrderModel, \
+    OrderItemModel, OrderArchiveModel, OrderItemArchiveModel, ProductModel
+from backend.src.infrastructure.models.orders import OrderStatus
+from backend.src.infrastructure.repositories.order_repository import \
+    OrderRepository
+from backend.src.settings import settings
+
+
+def seed(old: int, recent: int) -> tuple[int, int]:
+    now = datetime.now()
+    with SessionLocal.begin() as session:
+        tag = uuid.uuid4().hex[:8]
+        document = f"{uuid.uuid4().int % 10 ** 11:011d}"
+        customer = CustomerModel(name=f"Benchmark archive {tag}",
+                                 email=f"bench-{tag}@example.com",
+                                 document=document, created_at=now)
+        product = ProductModel(name=f"Benchmark archive {tag}",
+                               sku=f"BENCH-{tag}", price=1, stock_qty=0,
+                               is_active=True, created_at=now)
+        session.add_all([customer, product])
+        session.flush()
+
+        orders = []
+        for i in range(old + recent):
+            if i < old:
+                created = now - timedelta(days=500 + i % 300)
+                status = (OrderStatus.PAID if i % 4 else
+                          OrderStatus.CANCELLED)
+            else:
+                created = now - timedelta(days=i % 300)
+                status = (OrderStatus.PAID if i % 2 else
+                          OrderStatus.CREATED)
+            orders.append({"customer_id": customer.id, "total_amount": 10,
+                           "status": status, "created_at": created})
+        ids = session.scalars(insert(OrderModel).returning(
+            OrderModel.id, sort_by_parameter_order=True), orders).all()
+        session.execute(insert(OrderItemModel), [
+            {"order_id": order_id, "order_created_at": order["created_at"],
+             "product_id": product.id, "unit_price": 10, "quantity": 1,
+             "line_total": 10}
+            for order_id, order in zip(ids, orders)])
+        return customer.id, product.id
+
+
+def p50_list(window_days: int, repeat: int) -> float:
+    settings.orders_list_window_days = window_days
+    query = OrderQuery(first=0, rows=20, sort_field="created_at",
+                       sort_order=-1, status=OrderStatus.PAID)
+    timings = []
+    for _ in range(repeat):
+        session = SessionLocal()
+        try:
+            start = time.perf_counter()
+            OrderRepository(session).list(query)
+            timings.append(time.perf_counter() - start)
+        finally:
+            session.close()
+    return statistics.median(timings) * 1000
+
+
+def archive_all(batch_size: int) -> int:
+    before = datetime.now() - timedelta(
+        days=settings.orders_archive_after_days)
+    archived = 0
+    while True:
+        with SessionLocal.begin() as session:
+            moved = OrderRepository(session).archive(before, batch_size)
+        archived += moved
+        if moved < batch_size:
+            return archived
+
+
+def cleanup(customer_id: int, product_id: int) -> None:
+    with SessionLocal.begin() as session:
+        for orders, items in ((OrderModel, OrderItemModel),
+                              (OrderArchiveModel, OrderItemArchiveModel)):
+            ids = select(orders.id).where(orders.customer_id == customer_id)
+            session.execute(delete(items).where(items.order_id.in_(ids)))
+            session.execute(delete(orders)
+                            .where(orders.customer_id == customer_id))
+        session.execute(delete(CustomerModel)
+                        .where(CustomerModel.id == customer_id))
+        session.execute(delete(ProductModel)
+                        .where(ProductModel.id == product_id))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--old", type=int, default=50_000)
+    parser.add_argument("--recent", type=int, default=5_000)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--batch-size", type=int,
+                        default=settings.orders_archive_batch_size)
+    parser.add_argument("--window-days", type=int, default=365,
+                        help="ORDERS_LIST_WINDOW_DAYS medido contra 0")
+    args = parser.parse_args()
+
+    window = settings.orders_list_window_days
+    customer_id, product_id = seed(args.old, args.recent)
+    try:
+        before = (p50_list(0, args.repeat),
+                  p50_list(args.window_days, args.repeat))
+        start = time.perf_counter()
+        archived = archive_all(args.batch_size)
+        elapsed = time.perf_counter() - start
+        after = (p50_list(0, args.repeat),
+                 p50_list(args.window_days, args.repeat))
+
+        print(f"{archived} pedido(s) arquivado(s) em {elapsed:.2f}s")
+        print(f"{'':>8} {'sem janela ms':>14} {'janela ms':>10}")
+        print(f"{'antes':>8} {before[0]:>14.2f} {before[1]:>10.2f}")
+        print(f"{'depois':>8} {after[0]:>14.2f} {after[1]:>10.2f}")
+    finally:
+        settings.orders_list_window_days = window
+        cleanup(customer_id, product_id)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,167 @@
+"""
+Benchmark do filtro de pedidos por produto/SKU.
+
+Cria um cliente com --items itens de pedido (--per-order por pedido) em
+--products produtos, com 80% dos itens em 10% dos produtos, e mede p50/p99
+de OrderRepository.list com sku= para um produto concorrido e um raro, com
+a janela de --window-days e sem janela. Para comparar, mede o mesmo filtro escrito
+como EXISTS correlacionado (OrderModel.items.any). Os dados criados sao
+apagados no final.
+
+    python -m backend.benchmarks.order_product_filter --items 10000000
+"""
+import argparse
+import contextlib
+import random
+import time
+import uuid
+from datetime import datetime, timedelta
+from unittest import mock
+
+from sqlalchemy import delete, insert, select
+
+from backend.src.application.dtos.order import OrderQuery
+from backend.src.infrastructure.database import SessionLocal
+from backend.src.infrastructure.models import CustomerModel, OrderModel, \
+    OrderItemModel, ProductModel
+from backend.src.infrastructure.models.orders import OrderStatus
+from backend.src.infrastructure.models.orders_archive import \
+    OrderArchiveModel, OrderItemArchiveModel
+from backend.src.infrastructure.repositories.order_repository import \
+    OrderRepository
+from backend.src.settings import settings
+
+
+def seed(items: int, per_order: int, products: int, tag: str,
+         batch: int = 50_000) -> tuple[int, list]:
+    rng = random.Random(tag)
+    now = datetime.now()
+    with SessionLocal.begin() as session:
+        customer = CustomerModel(
+            name=f"Benchmark product filter {tag}",
+            email=f"bench-{tag}@example.com",
+            document=f"{uuid.uuid4().int % 10 ** 11:011d}", created_at=now)
+        session.add(customer)
+        session.flush()
+        product_ids = session.scalars(insert(ProductModel).returning(
+            ProductModel.id, sort_by_parameter_order=True), [
+            {"name": f"Benchmark {tag} {n}",
+             "sku": f"BN{n:05d}-{tag.upper()}", "price": 1, "stock_qty": 0,
+             "is_active": True, "created_at": now}
+            for n in range(products)]).all()
+        customer_id = customer.id
+
+    hot = product_ids[:max(products // 10, 1)]
+    orders = items // per_order
+    for start in range(0, orders, batch // per_order):
+        size = min(batch // per_order, orders - start)
+        with SessionLocal.begin() as session:
+            rows = [{"customer_id": customer_id, "total_amount": per_order,
+                     "status": OrderStatus.PAID,
+                     "created_at": now - timedelta(
+                         minutes=(orders - start - i) * 2)}
+                    for i in range(size)]
+            ids = session.scalars(insert(OrderModel).returning(
+                OrderModel.id, sort_by_parameter_order=True), rows).all()
+            session.execute(insert(OrderItemModel), [
+                {"order_id": order_id, "order_created_at": row["created_at"],
+                 "product_id": rng.choice(hot if rng.random() < 0.8
+                                          else product_ids),
+                 "unit_price": 1, "quantity": 1, "line_total": 1}
+                for order_id, row in zip(ids, rows)
+                for _ in range(per_order)])
+    return customer_id, product_ids
+
+
+def exists_filters(repo: OrderRepository):
+    """_filters com o produto como EXISTS correlacionado, para comparar."""
+    original = OrderRepository._filters
+
+    def filters(q: OrderQuery, model=OrderModel):
+        item_model = (OrderItemArchiveModel if model is OrderArchiveModel
+                      else OrderItemModel)
+        expressions = original(repo, q.model_copy(update={"sku": None}),
+                               model)
+        expressions.append(model.items.any(item_model.product_id == (
+            select(ProductModel.id).where(ProductModel.sku == q.sku)
+            .scalar_subquery())))
+        return expressions
+    return filters
+
+
+def percentiles(query: OrderQuery, repeat: int,
+                correlated: bool) -> tuple[float, float, int]:
+    timings, total = [], 0
+    for _ in range(repeat):
+        session = SessionLocal()
+        try:
+            repo = OrderRepository(session)
+            patch = (mock.patch.object(repo, "_filters",
+                                       exists_filters(repo))
+                     if correlated else contextlib.nullcontext())
+            with patch:
+                start = time.perf_counter()
+                total = repo.list(query).total
+                timings.append(time.perf_counter() - start)
+        finally:
+            session.close()
+    timings.sort()
+    p99 = timings[min(len(timings) - 1, int(len(timings) * 0.99))]
+    return timings[len(timings) // 2] * 1000, p99 * 1000, total
+
+
+def cleanup(customer_id: int, product_ids: list) -> None:
+    with SessionLocal.begin() as session:
+        ids = select(OrderModel.id).where(
+            OrderModel.customer_id == customer_id)
+        session.execute(delete(OrderItemModel)
+                        .where(OrderItemModel.order_id.in_(ids)))
+        session.execute(delete(OrderModel)
+                        .where(OrderModel.customer_id == customer_id))
+        session.execute(delete(ProductModel)
+                        .where(ProductModel.id.in_(product_ids)))
+        session.execute(delete(CustomerModel)
+                        .where(CustomerModel.id == customer_id))
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--items", type=int, default=10_000_000)
+    parser.add_argument("--per-order", type=int, default=3)
+    parser.add_argument("--products", type=int, default=5_000)
+    parser.add_argument("--repeat", type=int, default=30)
+    parser.add_argument("--baseline-repeat", type=int, default=3,
+                        help="repeticoes do EXISTS (bem mais lento)")
+    parser.add_argument("--window-days", type=int, default=365,
+                        help="ORDERS_LIST_WINDOW_DAYS medido contra 0")
+    args = parser.parse_args()
+
+    tag = uuid.uuid4().hex[:8]
+    window = settings.orders_list_window_days
+    customer_id, product_ids = seed(args.items, args.per_order,
+                                    args.products, tag)
+    try:
+        print(f"{'produto':<8} {'janela':>7} {'pedidos':>8} "
+              f"{'semi p50':>9} {'semi p99':>9} "
+              f"{'exists p50':>11} {'exists p99':>11}")
+        for label, n in (("hot", 0), ("raro", args.products - 1)):
+            for days in (args.window_days, 0):
+                settings.orders_list_window_days = days
+                query = OrderQuery(first=0, rows=20, sort_field="created_at",
+                                   sort_order=-1, include="customer",
+                                   sku=f"BN{n:05d}-{tag.upper()}")
+                semi = percentiles(query, args.repeat, correlated=False)
+                exists = percentiles(query, args.baseline_repeat,
+                                     correlated=True)
+                print(f"{label:<8} {days or '-':>7} {semi[2]:>8} "
+                      f"{semi[0]:>9.2f} {semi[1]:>9.2f} "
+                      f"{exists[0]:>11.2f} {exists[1]:>11.2f}")
+    finally:
+        settings.orders_list_window_days = window
+        cleanup(customer_id, product_ids)
+
+
+if __name__ == "__main__":
+    main()
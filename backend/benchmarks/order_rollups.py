@@ -0,0 +1,165 @@
+"""
+Benchmark de pedidos concorrentes de um produto disputado com o rollup de
+vendas na transacao do pedido ("antes": upsert em daily_product_sales) e com
+as variacoes acrescentadas em daily_product_sales_deltas ("depois").
+
+O produto usa estoque fragmentado (--shards) e cada worker compra com um
+cliente proprio, entao a unica linha disputada e a do rollup do dia/produto.
+Cada pedido passa por OrderService.add; --hold-ms segura a transacao depois
+do pedido (simulando latencia de rede ate o commit). Use contra o Postgres
+(DATABASE_URL); no SQLite os writers sao serializados pelo proprio banco.
+
+    python -m backend.benchmarks.order_rollups --workers 12 --orders 50
+"""
+import argparse
+import statistics
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from unittest import mock
+
+from sqlalchemy import and_, delete, event, select
+
+from backend.src.application.dtos.order import OrderCreate
+from backend.src.application.services.order_service import OrderService
+from backend.src.infrastructure.database import SessionLocal
+from backend.src.infrastructure.models import CustomerModel, OrderModel, \
+    OrderItemModel, ProductModel, ProductStockShardModel, OutboxEventModel, \
+    DailyProductSalesModel, DailyCustomerSalesModel, \
+    DailyProductSalesDeltaModel, DailyCustomerSalesDeltaModel
+from backend.src.infrastructure.models.orders import OrderStatus
+from backend.src.infrastructure.repositories.order_repository import \
+    OrderRepository
+from backend.src.infrastructure.repositories.product_repository import \
+    ProductRepository
+from backend.src.infrastructure.repositories.sales_report_repository import \
+    SalesReportRepository, _PRODUCT_MEASURES, _CUSTOMER_MEASURES
+
+
+def legacy_apply_orders(self, order_ids, sign: int = 1) -> None:
+    """Upsert direto nos rollups, como antes das tabelas de variacoes."""
+    if not order_ids:
+        return
+    orders, items = OrderModel.__table__, OrderItemModel.__table__
+    where = and_(orders.c.id.in_(order_ids),
+                 orders.c.status != OrderStatus.CANCELLED)
+    self._upsert_from(DailyProductSalesModel, ("day", "product_id"),
+                      _PRODUCT_MEASURES,
+                      self._product_source(orders, items, where, sign))
+    self._upsert_from(DailyCustomerSalesModel, ("day", "customer_id"),
+                      _CUSTOMER_MEASURES,
+                      self._customer_source(orders, where, sign))
+
+
+def place_order(customer_id: int, product_id: int, hold: float) -> float:
+    session = SessionLocal()
+    try:
+        service = OrderService(session, OrderRepository(session),
+                               ProductRepository(session))
+        # segura as travas da transacao por hold antes do COMMIT
+        event.listen(session, "before_commit",
+                     lambda _: time.sleep(hold))
+        start = time.perf_counter()
+        service.add(OrderCreate(customer_id=customer_id, items=[
+            {"product_id": product_id, "quantity": 1}]))
+        return time.perf_counter() - start
+    finally:
+        session.close()
+
+
+def run(customer_ids: list, product_id: int, orders: int,
+        hold: float) -> tuple[float, float, float]:
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=len(customer_ids)) as pool:
+        timings = list(pool.map(
+            lambda n: place_order(customer_ids[n % len(customer_ids)],
+                                  product_id, hold),
+            range(len(customer_ids) * orders)))
+    rate = len(timings) / (time.perf_counter() - start)
+    timings.sort()
+    p99 = timings[min(len(timings) - 1, int(len(timings) * 0.99))]
+    return rate, statistics.median(timings) * 1000, p99 * 1000
+
+
+def cleanup(customer_ids: list, product_id: int) -> None:
+    with SessionLocal.begin() as session:
+        ids = select(OrderModel.id).where(
+            OrderModel.customer_id.in_(customer_ids))
+        session.execute(delete(OutboxEventModel).where(
+            OutboxEventModel.entity == "order",
+            OutboxEventModel.entity_id.in_(ids)))
+        session.execute(delete(OutboxEventModel).where(
+            OutboxEventModel.entity == "product",
+            OutboxEventModel.entity_id == product_id))
+        session.execute(delete(OrderItemModel)
+                        .where(OrderItemModel.order_id.in_(ids)))
+        session.execute(delete(OrderModel)
+                        .where(OrderModel.customer_id.in_(customer_ids)))
+        for model in (DailyProductSalesModel, DailyProductSalesDeltaModel):
+            session.execute(delete(model)
+                            .where(model.product_id == product_id))
+        for model in (DailyCustomerSalesModel, DailyCustomerSalesDeltaModel):
+            session.execute(delete(model)
+                            .where(model.customer_id.in_(customer_ids)))
+        session.execute(delete(ProductStockShardModel).where(
+            ProductStockShardModel.product_id == product_id))
+        session.execute(delete(ProductModel)
+                        .where(ProductModel.id == product_id))
+        session.execute(delete(CustomerModel)
+                        .where(CustomerModel.id.in_(customer_ids)))
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, default=12)
+    parser.add_argument("--orders", type=int, default=50,
+                        help="pedidos por worker")
+    parser.add_argument("--shards", type=int, default=16)
+    parser.add_argument("--hold-ms", type=float, default=2)
+    args = parser.parse_args()
+
+    tag = uuid.uuid4().hex[:8]
+    # nome e SKU passam pela validacao do OrderGet na resposta
+    letters = "".join(chr(65 + int(c, 16) % 26) for c in tag)
+    with SessionLocal.begin() as session:
+        customers = [CustomerModel(name=f"Benchmark Rollups {letters} "
+                                        f"{chr(65 + n // 26 % 26)}"
+                                        f"{chr(65 + n % 26)}",
+                                   email=f"rollups-{tag}-{n}@example.com",
+                                   document=f"{uuid.uuid4().int % 10 ** 11:011d}",
+                                   created_at=datetime.now())
+                     for n in range(args.workers)]
+        product = ProductModel(name="Benchmark rollups",
+                               sku=f"{letters[:3]}-{int(tag, 16) % 1000:03d}",
+                               price=1,
+                               stock_qty=10_000_000, is_active=True,
+                               created_at=datetime.now())
+        session.add_all(customers + [product])
+        session.flush()
+        ProductRepository(session).set_stock_shards(product.id, args.shards)
+        customer_ids = [c.id for c in customers]
+        product_id = product.id
+
+    try:
+        print(f"{'':<7} {'orders/s':>9} {'p50 ms':>8} {'p99 ms':>8}")
+        for label, patch in (
+                ("antes", mock.patch.object(SalesReportRepository,
+                                            "apply_orders",
+                                            legacy_apply_orders)),
+                ("depois", mock.patch.object(SalesReportRepository,
+                                             "apply_orders",
+                                             SalesReportRepository
+                                             .apply_orders))):
+            with patch:
+                rate, p50, p99 = run(customer_ids, product_id, args.orders,
+                                     args.hold_ms / 1000)
+            print(f"{label:<7} {rate:>9.1f} {p50:>8.2f} {p99:>8.2f}")
+    finally:
+        cleanup(customer_ids, product_id)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""
+Benchmark da montagem de um pedido com muitos itens.
+
+Mede o custo dos eventos do ORM que mantem line_total/total_amount enquanto
+os itens sao adicionados e depois editados, sem tocar no banco.
+
+    python -m backend.benchmarks.order_total --lines 500
+"""
+import argparse
+import time
+from decimal import Decimal
+
+from backend.src.infrastructure.models import OrderModel, OrderItemModel
+
+
+def build_order(lines: int) -> OrderModel:
+    order = OrderModel(customer_id=1)
+    for i in range(lines):
+        order.items.append(OrderItemModel(product_id=i + 1,
+                                          unit_price=Decimal("10.50"),
+                                          quantity=3))
+    order.recalc_total()
+    return order
+
+
+def edit_order(order: OrderModel) -> None:
+    for item in order.items:
+        item.quantity = item.quantity + 1
+    order.recalc_total()
+
+
+def _best(fn, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--lines", type=int, nargs="+",
+                        default=[100, 250, 500])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    build_order(10)  # aquecimento do mapper
+
+    print(f"{'lines':>6} {'build ms':>10} {'edit ms':>10} {'total':>12}")
+    for lines in args.lines:
+        build_ms = _best(lambda: build_order(lines), args.repeat)
+        order = build_order(lines)
+        edit_ms = _best(lambda: edit_order(order), args.repeat)
+        print(f"{lines:>6} {build_ms:>10.2f} {edit_ms:>10.2f} "
+              f"{order.total_amount:>12}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""
+Benchmark de baixas concorrentes de estoque em um unico produto.
+
+Cada worker abre uma transacao por pedido, baixa 1 unidade com
+ProductRepository.adjust_stock e segura a transacao por --hold-ms (simulando
+o restante do pedido) antes do commit. Compara o produto com 1 shard (todas
+as baixas disputam a mesma linha) e com 16 shards. Use contra o Postgres
+(DATABASE_URL); no SQLite os writers sao serializados pelo proprio banco.
+
+    python -m backend.benchmarks.stock_shards --workers 32 --orders 50
+"""
+import argparse
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from sqlalchemy import delete
+
+from backend.src.infrastructure.database import SessionLocal
+from backend.src.infrastructure.models import ProductModel, \
+    ProductStockShardModel
+from backend.src.infrastructure.repositories.product_repository import \
+    ProductRepository
+from backend.src.infrastructure.retry import retry_on_conflict
+
+
+@retry_on_conflict
+def place_order(product_id: int, hold: float) -> None:
+    session = SessionLocal()
+    try:
+        with session.begin():
+            ProductRepository(session).adjust_stock({product_id: 1})
+            time.sleep(hold)
+    finally:
+        session.close()
+
+
+def run(product_id: int, shards: int, workers: int, orders: int,
+        hold: float) -> float:
+    with SessionLocal.begin() as session:
+        ProductRepository(session).set_stock_shards(product_id, shards)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for future in [pool.submit(place_order, product_id, hold)
+                       for _ in range(workers * orders)]:
+            future.result()
+    return workers * orders / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--shards", type=int, nargs="+", default=[1, 16])
+    parser.add_argument("--workers", type=int, default=16)
+    parser.add_argument("--orders", type=int, default=50,
+                        help="pedidos por worker")
+    parser.add_argument("--hold-ms", type=float, default=2)
+    args = parser.parse_args()
+
+    with SessionLocal.begin() as session:
+        product = ProductModel(name="Benchmark stock shards",
+                               sku=f"BENCH-{uuid.uuid4().hex[:8]}",
+                               price=1, stock_qty=10_000_000, is_active=True,
+                               created_at=datetime.now())
+        session.add(product)
+        session.flush()
+        product_id = product.id
+
+    try:
+        print(f"{'shards':>6} {'orders/s':>10}")
+        for shards in args.shards:
+            rate = run(product_id, shards, args.workers, args.orders,
+                       args.hold_ms / 1000)
+            print(f"{shards:>6} {rate:>10.1f}")
+    finally:
+        with SessionLocal.begin() as session:
+            session.execute(delete(ProductStockShardModel).where(
+                ProductStockShardModel.product_id == product_id))
+            session.execute(delete(ProductModel)
+                            .where(ProductModel.id == product_id))
+
+
+if __name__ == "__main__":
+    main()
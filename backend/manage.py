@@ -0,0 +1,253 @@
+"""
+Comandos de manutencao do backend.
+
+    python backend/manage.py rebuild-reports
+    python backend/manage.py check-reports
+    python backend/manage.py fold-reports [--batch-size N] [--every SEGUNDOS]
+    python backend/manage.py backfill-customer-stats
+    python backend/manage.py shard-stock <product_id> <shards>
+    python backend/manage.py fold-stock-shards [--every SEGUNDOS]
+    python backend/manage.py relay-outbox [--every SEGUNDOS]
+    python backend/manage.py ensure-partitions [--months N] [--every SEGUNDOS]
+    python backend/manage.py archive-orders [--days N] [--batch-size N]
+                                            [--every SEGUNDOS]
+"""
+import argparse
+import json
+import sys
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+# permite rodar local com "python backend/manage.py"
+ROOT = Path(__file__).resolve().parent  # .../backend
+sys.path.insert(0, str(ROOT.parent))    # adiciona /app (ou raiz do repo)
+
+from backend.src.infrastructure.database import SessionLocal, get_engine
+from backend.src.infrastructure.outbox import OutboxRelay, build_sinks, \
+    relay_once
+from backend.src.infrastructure.partitions import ensure_partitions
+from backend.src.infrastructure.repositories.customer_repository import \
+    CustomerRepository
+from backend.src.infrastructure.repositories.order_repository import \
+    OrderRepository
+from backend.src.infrastructure.repositories.product_repository import \
+    ProductRepository
+from backend.src.infrastructure.repositories.sales_report_repository import \
+    SalesReportRepository
+from backend.src.settings import settings
+
+
+def rebuild_reports(args) -> int:
+    session = SessionLocal()
+    try:
+        with session.begin():
+            SalesReportRepository(session).rebuild()
+        print("rollups de vendas recalculados")
+        return 0
+    finally:
+        session.close()
+
+
+def check_reports(args) -> int:
+    session = SessionLocal()
+    try:
+        mismatches = SalesReportRepository(session).check()
+        for mismatch in mismatches[:args.limit]:
+            print(json.dumps(mismatch))
+        print(f"{len(mismatches)} divergencia(s) encontrada(s)")
+        return 1 if mismatches else 0
+    finally:
+        session.close()
+
+
+def fold_reports(args) -> int:
+    while True:
+        folded = 0
+        # um lote por transacao, ate esvaziar as variacoes pendentes
+        while True:
+            session = SessionLocal()
+            try:
+                with session.begin():
+                    moved = SalesReportRepository(session).fold(
+                        args.batch_size)
+            finally:
+                session.close()
+            folded += moved
+            if moved == 0:
+                break
+        print(f"{folded} variacao(oes) consolidada(s) nos rollups")
+        if not args.every:
+            return 0
+        time.sleep(args.every)
+
+
+def backfill_customer_stats(args) -> int:
+    session = SessionLocal()
+    try:
+        with session.begin():
+            CustomerRepository(session).refresh_stats()
+        print("estatisticas de clientes recalculadas")
+        return 0
+    finally:
+        session.close()
+
+
+def shard_stock(args) -> int:
+    session = SessionLocal()
+    try:
+        with session.begin():
+            product = ProductRepository(session).set_stock_shards(
+                args.product_id, args.shards)
+            print(f"produto {product.id}: {product.stock_shards} shard(s), "
+                  f"saldo {product.stock_qty}")
+        return 0
+    finally:
+        session.close()
+
+
+def fold_stock_shards(args) -> int:
+    while True:
+        session = SessionLocal()
+        try:
+            with session.begin():
+                folded = ProductRepository(session).fold_stock_shards()
+            print(f"{folded} produto(s) consolidado(s)")
+        finally:
+            session.close()
+        if not args.every:
+            return 0
+        time.sleep(args.every)
+
+
+def relay_outbox(args) -> int:
+    sinks = build_sinks(settings.outbox_sinks)
+    if args.every:
+        relay = OutboxRelay(SessionLocal, sinks, args.every)
+        relay.start()
+        try:
+            relay.join()
+        except KeyboardInterrupt:
+            relay.stop()
+        return 0
+
+    session = SessionLocal()
+    try:
+        published = relay_once(session, sinks)
+        print(f"{published} evento(s) publicado(s)")
+        return 0
+    finally:
+        session.close()
+
+
+def ensure_order_partitions(args) -> int:
+    while True:
+        with get_engine().begin() as connection:
+            created = ensure_partitions(connection, args.months)
+        print(f"{len(created)} particao(oes) criada(s): "
+              f"{', '.join(created) or '-'}")
+        if not args.every:
+            return 0
+        time.sleep(args.every)
+
+
+def archive_orders(args) -> int:
+    days = args.days or settings.orders_archive_after_days
+    batch_size = args.batch_size or settings.orders_archive_batch_size
+    while True:
+        before = datetime.now() - timedelta(days=days)
+        archived = 0
+        # um lote por transacao: travas curtas e progresso a cada commit
+        while True:
+            session = SessionLocal()
+            try:
+                with session.begin():
+                    moved = OrderRepository(session).archive(before,
+                                                             batch_size)
+            finally:
+                session.close()
+            archived += moved
+            if moved < batch_size:
+                break
+        print(f"{archived} pedido(s) arquivado(s)")
+        if not args.every:
+            return 0
+        time.sleep(args.every)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__)
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    commands.add_parser("rebuild-reports",
+                        help="recalcula os rollups de vendas"
+                        ).set_defaults(func=rebuild_reports)
+
+    check = commands.add_parser("check-reports",
+                                help="compara os rollups com os pedidos")
+    check.add_argument("--limit", type=int, default=50)
+    check.set_defaults(func=check_reports)
+
+    fold_rollups = commands.add_parser("fold-reports",
+                                       help="soma as variacoes pendentes "
+                                            "nos rollups de vendas")
+    fold_rollups.add_argument("--batch-size", type=int, default=10000)
+    fold_rollups.add_argument("--every", type=float, default=0,
+                              help="repete a cada N segundos")
+    fold_rollups.set_defaults(func=fold_reports)
+
+    commands.add_parser("backfill-customer-stats",
+                        help="recalcula pedidos/valor/ultimo pedido por "
+                             "cliente"
+                        ).set_defaults(func=backfill_customer_stats)
+
+    shard = commands.add_parser("shard-stock",
+                                help="liga/desliga o estoque fragmentado "
+                                     "de um produto (0 desliga)")
+    shard.add_argument("product_id", type=int)
+    shard.add_argument("shards", type=int)
+    shard.set_defaults(func=shard_stock)
+
+    fold = commands.add_parser("fold-stock-shards",
+                               help="consolida o saldo dos produtos "
+                                    "fragmentados")
+    fold.add_argument("--every", type=float, default=0,
+                      help="repete a cada N segundos")
+    fold.set_defaults(func=fold_stock_shards)
+
+    relay = commands.add_parser("relay-outbox",
+                                help="publica os eventos pendentes do "
+                                     "outbox nos sinks de OUTBOX_SINKS")
+    relay.add_argument("--every", type=float, default=0,
+                       help="roda continuamente a cada N segundos")
+    relay.set_defaults(func=relay_outbox)
+
+    partitions = commands.add_parser("ensure-partitions",
+                                     help="cria as particoes mensais futuras "
+                                          "de orders/order_items (Postgres)")
+    partitions.add_argument("--months", type=int, default=None,
+                            help="meses a frente (padrao "
+                                 "ORDERS_PARTITION_MONTHS_AHEAD)")
+    partitions.add_argument("--every", type=float, default=0,
+                            help="repete a cada N segundos")
+    partitions.set_defaults(func=ensure_order_partitions)
+
+    archive = commands.add_parser("archive-orders",
+                                  help="move pedidos PAID/CANCELLED antigos "
+                                       "para orders_archive")
+    archive.add_argument("--days", type=int, default=None,
+                         help="idade minima em dias (padrao "
+                              "ORDERS_ARCHIVE_AFTER_DAYS)")
+    archive.add_argument("--batch-size", type=int, default=None,
+                         help="pedidos por transacao (padrao "
+                              "ORDERS_ARCHIVE_BATCH_SIZE)")
+    archive.add_argument("--every", type=float, default=0,
+                         help="repete a cada N segundos")
+    archive.set_defaults(func=archive_orders)
+
+    args = parser.parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
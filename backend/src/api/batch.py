@@ -0,0 +1,164 @@
+"""
+Execucao dos sub-requests do POST /api/batch dentro do proprio processo.
+
+Cada sub-request passa direto pelo router da aplicacao (rotas, validacao,
+dependencias e exception handlers), sem as middlewares HTTP, que ja rodaram
+para o batch. Em sequencia todos usam a mesma Session (uma conexao so);
+com parallel cada um abre a sua, ate BATCH_MAX_CONCURRENCY ao mesmo tempo.
+A admissao contou o batch como um request so: cada sub-request paralelo
+alem dele precisa de uma vaga livre da admissao, e sem vaga roda em
+sequencia na vaga do proprio batch.
+"""
+import json
+import logging
+from typing import List, Optional
+from urllib.parse import urlencode
+
+import anyio
+from anyio import to_thread
+from fastapi.middleware.asyncexitstack import AsyncExitStackMiddleware
+from starlette.exceptions import HTTPException
+from starlette.types import Message, Scope
+
+from backend.src.application.dtos.batch import BatchItem, BatchResult
+from backend.src.infrastructure.database import SessionLocal, shared_session
+from backend.src.settings import settings
+
+logger = logging.getLogger(__name__)
+
+# o proprio batch e o stream SSE nao podem ser sub-requests
+_FORBIDDEN = ("/api/batch", "/api/events")
+
+# headers do batch que nao valem para os sub-requests
+_DROPPED_HEADERS = {b"content-length", b"content-type", b"accept-encoding",
+                    b"idempotency-key"}
+
+# chaves do scope do batch herdadas pelos sub-requests
+_INHERITED = ("type", "asgi", "http_version", "scheme", "server", "client",
+              "root_path", "app", "state", "extensions",
+              "starlette.exception_handlers")
+
+
+def _envelope(status: int, message: str) -> dict:
+    return {"cod_retorno": status, "mensagem": message, "data": None}
+
+
+def _query_string(item: BatchItem) -> bytes:
+    params = []
+    for key, value in item.query.items():
+        for single in value if isinstance(value, list) else [value]:
+            if single is None:
+                continue
+            if isinstance(single, bool):
+                single = "true" if single else "false"
+            params.append((key, single))
+    return urlencode(params).encode()
+
+
+def _sub_scope(parent: Scope, item: BatchItem) -> Scope:
+    scope = {key: parent[key] for key in _INHERITED if key in parent}
+    scope.update(
+        method=item.method,
+        path=item.path,
+        raw_path=item.path.encode(),
+        query_string=_query_string(item),
+        headers=[(name, value) for name, value in parent["headers"]
+                 if name not in _DROPPED_HEADERS],
+    )
+    return scope
+
+
+async def _dispatch(parent: Scope, item: BatchItem) -> BatchResult:
+    if item.path.startswith(_FORBIDDEN):
+        return BatchResult(status=400, body=_envelope(
+            400, f"{item.path} is not allowed in a batch"))
+
+    scope = _sub_scope(parent, item)
+    start: dict = {}
+    chunks: List[bytes] = []
+
+    async def receive() -> Message:
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message: Message) -> None:
+        if message["type"] == "http.response.start":
+            start.update(message)
+        elif message["type"] == "http.response.body":
+            chunks.append(message.get("body", b""))
+
+    try:
+        # a pilha de saida das dependencias normalmente vem da middleware
+        # stack do FastAPI, que os sub-requests nao atravessam
+        await AsyncExitStackMiddleware(scope["app"].router)(
+            scope, receive, send)
+    except HTTPException as exc:
+        # rota inexistente: o router levanta em vez de responder
+        return BatchResult(status=exc.status_code,
+                           body=_envelope(exc.status_code, exc.detail))
+    except Exception:
+        logger.exception("Batch sub-request %s failed", item.path)
+        return BatchResult(status=500,
+                           body=_envelope(500, "Internal server error"))
+
+    body = b"".join(chunks)
+    content_type = dict(start.get("headers", [])).get(b"content-type", b"")
+    if content_type.startswith(b"application/json"):
+        payload = json.loads(body) if body else None
+    else:
+        payload = body.decode(errors="replace")
+    return BatchResult(status=start.get("status", 500), body=payload)
+
+
+def _admission(parent: Scope) -> Optional[anyio.CapacityLimiter]:
+    if settings.threadpool_queue_timeout_ms <= 0:
+        return None
+    return getattr(parent["app"].state, "admission", None)
+
+
+async def execute(parent: Scope, items: List[BatchItem],
+                  parallel: bool) -> List[BatchResult]:
+    """Executa os sub-requests e devolve os resultados na ordem pedida."""
+    if parallel:
+        results: List[BatchResult] = [None] * len(items)
+        limiter = anyio.CapacityLimiter(max(settings.batch_max_concurrency, 1))
+        admission = _admission(parent)
+        # vaga que a admission_middleware ja reservou para o batch
+        own_slot = anyio.Lock()
+
+        async def run(index: int, item: BatchItem) -> None:
+            async with limiter:
+                if admission is None:
+                    results[index] = await _dispatch(parent, item)
+                    return
+                borrower = object()
+                try:
+                    # sem esperar: batches esperando vagas uns dos outros
+                    # com as suas ocupadas travariam o pool
+                    admission.acquire_on_behalf_of_nowait(borrower)
+                except anyio.WouldBlock:
+                    async with own_slot:
+                        results[index] = await _dispatch(parent, item)
+                    return
+                try:
+                    results[index] = await _dispatch(parent, item)
+                finally:
+                    admission.release_on_behalf_of(borrower)
+
+        async with anyio.create_task_group() as group:
+            for index, item in enumerate(items):
+                group.start_soon(run, index, item)
+        return results
+
+    session = SessionLocal()
+    try:
+        results = []
+        with shared_session(session):
+            for item in items:
+                result = await _dispatch(parent, item)
+                if result.status >= 500:
+                    # a transacao pode ter ficado invalida para os proximos
+                    await to_thread.run_sync(session.rollback)
+                results.append(result)
+        return results
+    finally:
+        await to_thread.run_sync(session.close)
@@ -0,0 +1,123 @@
+"""
+Compressao das respostas negociada pelo Accept-Encoding.
+
+gzip sempre esta disponivel; br e zstd entram quando os pacotes opcionais
+brotli e zstandard estao instalados. Respostas menores que o limite, ja
+codificadas ou de stream SSE passam sem compressao. Respostas em stream
+(mais de um pedaco de body) sao comprimidas pedaco a pedaco.
+"""
+from typing import Dict, Iterable, Optional, Sequence
+
+from starlette.datastructures import Headers
+from starlette.middleware.gzip import GZipResponder, IdentityResponder
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+try:
+    import brotli
+except ImportError:  # dependencia opcional
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # dependencia opcional
+    zstandard = None
+
+
+class BrotliResponder(IdentityResponder):
+    content_encoding = "br"
+
+    def __init__(self, app: ASGIApp, minimum_size: int, quality: int):
+        super().__init__(app, minimum_size)
+        self.compressor = brotli.Compressor(quality=quality)
+
+    def apply_compression(self, body: bytes, *, more_body: bool) -> bytes:
+        if more_body:
+            return self.compressor.process(body) + self.compressor.flush()
+        return self.compressor.process(body) + self.compressor.finish()
+
+
+class ZstdResponder(IdentityResponder):
+    content_encoding = "zstd"
+
+    def __init__(self, app: ASGIApp, minimum_size: int, level: int):
+        super().__init__(app, minimum_size)
+        self.compressor = zstandard.ZstdCompressor(level=level).compressobj()
+
+    def apply_compression(self, body: bytes, *, more_body: bool) -> bytes:
+        flush = (zstandard.COMPRESSOBJ_FLUSH_BLOCK if more_body
+                 else zstandard.COMPRESSOBJ_FLUSH_FINISH)
+        return self.compressor.compress(body) + self.compressor.flush(flush)
+
+
+def available_encodings(preferred: Iterable[str]) -> list:
+    """Codificacoes de `preferred` (em ordem) cujo pacote esta instalado."""
+    installed = {"gzip": True, "br": brotli is not None,
+                 "zstd": zstandard is not None}
+    return [name for name in preferred if installed.get(name)]
+
+
+def choose_encoding(accept_encoding: str,
+                    available: Sequence[str]) -> Optional[str]:
+    """
+    Escolhe a codificacao pelo Accept-Encoding (com pesos q). Empates ficam
+    com a ordem de preferencia do servidor em `available`.
+    """
+    weights: Dict[str, float] = {}
+    for part in accept_encoding.split(","):
+        name, _, params = part.strip().partition(";")
+        name = name.strip().lower()
+        if not name:
+            continue
+        weight = 1.0
+        for param in params.split(";"):
+            key, _, value = param.strip().partition("=")
+            if key == "q":
+                try:
+                    weight = float(value)
+                except ValueError:
+                    weight = 0.0
+        weights[name] = weight
+
+    best, best_weight = None, 0.0
+    for name in available:
+        weight = weights.get(name, weights.get("*", 0.0))
+        if weight > best_weight:
+            best, best_weight = name, weight
+    return best
+
+
+class CompressionMiddleware:
+    """Comprime respostas acima de `minimum_size` bytes."""
+
+    def __init__(self, app: ASGIApp, minimum_size: int = 1024,
+                 encodings: Iterable[str] = ("zstd", "br", "gzip"),
+                 gzip_level: int = 6, brotli_quality: int = 4,
+                 zstd_level: int = 3):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.encodings = available_encodings(encodings)
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+        self.zstd_level = zstd_level
+
+    def _responder(self, encoding: Optional[str]) -> ASGIApp:
+        if encoding == "gzip":
+            return GZipResponder(self.app, self.minimum_size,
+                                 compresslevel=self.gzip_level)
+        if encoding == "br":
+            return BrotliResponder(self.app, self.minimum_size,
+                                   self.brotli_quality)
+        if encoding == "zstd":
+            return ZstdResponder(self.app, self.minimum_size,
+                                 self.zstd_level)
+        return IdentityResponder(self.app, self.minimum_size)
+
+    async def __call__(self, scope: Scope, receive: Receive,
+                       send: Send) -> None:
+        if scope["type"] != "http" or not self.encodings:
+            await self.app(scope, receive, send)
+            return
+
+        accept = Headers(scope=scope).get("Accept-Encoding", "")
+        responder = self._responder(choose_encoding(accept, self.encodings))
+        await responder(scope, receive, send)
@@ -1,22 +1,35 @@
-from fastapi import Depends
+import secrets
+from typing import Optional
+
+from fastapi import Depends, Header
 from sqlalchemy.orm import Session
 
+from backend.src.application.services.change_service import ChangeService
 from backend.src.application.services.customer_service import CustomerService
 from backend.src.application.services.order_service import OrderService
 from backend.src.application.services.product_service import ProductService
-from backend.src.infrastructure.database import get_db
+from backend.src.application.services.report_service import ReportService
+from backend.src.exceptions import ForbiddenException
+from backend.src.infrastructure.database import get_db, SessionLocal
+from backend.src.infrastructure.events import Broadcaster, OutboxSource
 from backend.src.infrastructure.repositories.customer_repository import \
     CustomerRepository
 from backend.src.infrastructure.repositories.order_repository import \
     OrderRepository
+from backend.src.infrastructure.repositories.outbox_repository import \
+    OutboxRepository
 from backend.src.infrastructure.repositories.product_repository import \
     ProductRepository
+from backend.src.infrastructure.repositories.sales_report_repository import \
+    SalesReportRepository
+from backend.src.settings import settings
 
 
 def get_product_service(session: Session = Depends(get_db)) -> ProductService:
     """Injecao de dependencia de servico de produto."""
     repository = ProductRepository(session)
-    return ProductService(session, repository)
+    outbox_repository = OutboxRepository(session)
+    return ProductService(session, repository, outbox_repository)
 
 
 def get_customer_service(
@@ -30,4 +43,40 @@ def get_order_service(session: Session = Depends(get_db)) -> OrderService:
     """Injecao de dependencia de servico de pedidos."""
     order_repository = OrderRepository(session)
     product_repository = ProductRepository(session)
-    return OrderService(session, order_repository, product_repository)
+    report_repository = SalesReportRepository(session)
+    customer_repository = CustomerRepository(session)
+    outbox_repository = OutboxRepository(session)
+    return OrderService(session, order_repository, product_repository,
+                        report_repository, customer_repository,
+                        outbox_repository)
+
+
+def get_report_service(session: Session = Depends(get_db)) -> ReportService:
+    """Injecao de dependencia de servico de relatorios."""
+    repository = SalesReportRepository(session)
+    return ReportService(session, repository)
+
+
+def get_change_service(session: Session = Depends(get_db)) -> ChangeService:
+    """Injecao de dependencia do feed de mudancas."""
+    repository = OutboxRepository(session)
+    return ChangeService(session, repository)
+
+
+broadcaster = Broadcaster(OutboxSource(SessionLocal))
+
+
+def get_broadcaster() -> Broadcaster:
+    """Broadcaster de eventos SSE do processo."""
+    return broadcaster
+
+
+def is_admin_token(token: Optional[str]) -> bool:
+    return bool(settings.admin_token and token and
+                secrets.compare_digest(token, settings.admin_token))
+
+
+def require_admin(x_admin_token: Optional[str] = Header(None)) -> None:
+    """Protege os endpoints administrativos pelo header X-Admin-Token."""
+    if not is_admin_token(x_admin_token):
+        raise ForbiddenException()
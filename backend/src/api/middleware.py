@@ -0,0 +1,130 @@
+import random
+import time
+
+import anyio
+from anyio import to_thread
+from fastapi import Request
+from starlette.responses import JSONResponse
+
+from backend.src import metrics
+from backend.src.api.dependencies import is_admin_token
+from backend.src.api.profiling import MODES, profile_request
+from backend.src.infrastructure import database
+from backend.src.infrastructure.instrumentation import track_queries
+from backend.src.settings import settings
+
+
+async def timing_middleware(request: Request, call_next):
+    """
+    Mede o tempo de cada request e a quantidade de SQL executada nele.
+
+    Os contadores voltam nos headers X-Process-Time, X-SQL-Count,
+    X-SQL-Time e X-SQL-N-Plus-One.
+    """
+    start = time.perf_counter()
+
+    label = f"{request.method} {request.url.path}"
+    with track_queries(label) as stats:
+        response = await call_next(request)
+
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    response.headers["X-Process-Time"] = f"{elapsed_ms:.2f}"
+    response.headers["X-SQL-Count"] = str(stats.count)
+    response.headers["X-SQL-Time"] = f"{stats.duration_ms:.2f}"
+    response.headers["X-SQL-N-Plus-One"] = str(len(stats.n_plus_one))
+    return response
+
+
+async def metrics_middleware(request: Request, call_next):
+    """Alimenta as metricas HTTP, de pool e de threadpool do /metrics."""
+    start = time.perf_counter()
+    status = 500
+    metrics.HTTP_IN_FLIGHT.inc()
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        metrics.HTTP_IN_FLIGHT.dec()
+        route = request.scope.get("route")
+        path = route.path if route is not None else "unmatched"
+        metrics.HTTP_REQUESTS.labels(request.method, path, status).inc()
+        metrics.HTTP_LATENCY.labels(request.method, path).observe(
+            time.perf_counter() - start)
+        metrics.observe_pool(database.get_engine())
+        metrics.observe_threadpool(to_thread.current_default_thread_limiter())
+
+
+# rotas async (metricas, stream SSE) e o health nao usam o threadpool nem
+# devem ser recusadas sob carga
+_ADMISSION_EXEMPT = ("/metrics", "/api/health", "/api/events")
+
+
+async def admission_middleware(request: Request, call_next):
+    """
+    Limita os requests em execucao ao tamanho do threadpool dos handlers
+    sincronos. Quem espera mais que THREADPOOL_QUEUE_TIMEOUT_MS por uma vaga
+    recebe 503 com Retry-After, em vez de aumentar a fila (e a latencia de
+    todos).
+    """
+    limiter = getattr(request.app.state, "admission", None)
+    if (limiter is None or settings.threadpool_queue_timeout_ms <= 0 or
+            request.url.path.startswith(_ADMISSION_EXEMPT)):
+        return await call_next(request)
+
+    borrower = object()
+    start = time.perf_counter()
+    metrics.THREADPOOL_QUEUED.inc()
+    try:
+        with anyio.move_on_after(
+                settings.threadpool_queue_timeout_ms / 1000) as wait:
+            await limiter.acquire_on_behalf_of(borrower)
+    finally:
+        metrics.THREADPOOL_QUEUED.dec()
+    metrics.THREADPOOL_QUEUE_WAIT.observe(time.perf_counter() - start)
+
+    if wait.cancelled_caught:
+        metrics.THREADPOOL_REJECTED.inc()
+        retry_after = max(settings.threadpool_retry_after, 1)
+        return JSONResponse(
+            status_code=503, headers={"Retry-After": str(retry_after)},
+            content={"cod_retorno": 503,
+                     "mensagem": "Server busy, retry later", "data": None})
+    try:
+        return await call_next(request)
+    finally:
+        limiter.release_on_behalf_of(borrower)
+
+
+async def profiling_middleware(request: Request, call_next):
+    """
+    Executa o request sob o profiler quando pedido pelo header X-Profile
+    (com X-Admin-Token valido) ou quando sorteado pela amostragem 1-em-N.
+
+    O perfil e gravado em PROFILING_DIR e o nome volta no header X-Profile-Id.
+    """
+    if not settings.profiling_enabled:
+        return await call_next(request)
+
+    mode = request.headers.get("X-Profile")
+    if mode is not None:
+        if not is_admin_token(request.headers.get("X-Admin-Token")):
+            return JSONResponse(status_code=403, content={
+                "cod_retorno": 403, "mensagem": "Invalid admin token",
+                "data": None})
+        if mode not in MODES:
+            mode = settings.profiling_mode
+    elif (settings.profiling_sample_rate > 0 and
+          random.randrange(settings.profiling_sample_rate) == 0):
+        mode = settings.profiling_mode
+    else:
+        return await call_next(request)
+
+    label = f"{request.method} {request.url.path}"
+    with profile_request(label, mode) as profile:
+        response = await call_next(request)
+
+    name = await to_thread.run_sync(profile.save)
+    if name:
+        response.headers["X-Profile-Id"] = name
+    return response
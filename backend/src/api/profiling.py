@@ -0,0 +1,154 @@
+import cProfile
+import functools
+import inspect
+import re
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Optional
+
+from fastapi.routing import APIRoute
+
+from backend.src.settings import settings
+
+MODES = ("sampling", "cprofile")
+
+_active: ContextVar[Optional["RequestProfile"]] = ContextVar(
+    "request_profile", default=None)
+
+
+class _Sampler(threading.Thread):
+    """Amostra a pilha de uma thread especifica em intervalos fixos."""
+
+    def __init__(self, thread_id: int, interval: float):
+        super().__init__(daemon=True, name="request-profiler")
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self._done = threading.Event()
+
+    def run(self):
+        while not self._done.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{Path(code.co_filename).stem}:{code.co_name}")
+                frame = frame.f_back
+            if stack:
+                self.stacks[";".join(reversed(stack))] += 1
+
+    def stop(self):
+        self._done.set()
+        self.join()
+
+
+class RequestProfile:
+    """Perfil de um unico request, gravado em disco ao final."""
+
+    def __init__(self, label: str, mode: str):
+        self.label = label
+        self.mode = mode
+        self.name: Optional[str] = None
+        self._sampler: Optional[_Sampler] = None
+        self._profile: Optional[cProfile.Profile] = None
+
+    @contextmanager
+    def run(self):
+        """Executa o bloco sob o profiler na thread atual."""
+        if self.mode == "cprofile":
+            self._profile = cProfile.Profile()
+            self._profile.enable()
+            try:
+                yield
+            finally:
+                self._profile.disable()
+        else:
+            self._sampler = _Sampler(
+                threading.get_ident(),
+                settings.profiling_interval_ms / 1000)
+            self._sampler.start()
+            try:
+                yield
+            finally:
+                self._sampler.stop()
+
+    def save(self) -> Optional[str]:
+        """Grava o perfil (.pstats ou .collapsed) e retorna o nome."""
+        if self._profile is None and self._sampler is None:
+            return None
+
+        directory = Path(settings.profiling_dir)
+        directory.mkdir(parents=True, exist_ok=True)
+        slug = re.sub(r"[^A-Za-z0-9]+", "-", self.label).strip("-")
+        stem = (f"{time.strftime('%Y%m%d-%H%M%S')}-{slug}-"
+                f"{uuid.uuid4().hex[:8]}")
+
+        if self._profile is not None:
+            self.name = f"{stem}.pstats"
+            self._profile.dump_stats(directory / self.name)
+        else:
+            self.name = f"{stem}.collapsed"
+            lines = [f"{stack} {count}" for stack, count in
+                     self._sampler.stacks.most_common()]
+            (directory / self.name).write_text("\n".join(lines) + "\n")
+        return self.name
+
+
+@contextmanager
+def profile_request(label: str, mode: str):
+    profile = RequestProfile(label, mode)
+    token = _active.set(profile)
+    try:
+        yield profile
+    finally:
+        _active.reset(token)
+
+
+def list_profiles() -> list[str]:
+    directory = Path(settings.profiling_dir)
+    if not directory.exists():
+        return []
+    return sorted((p.name for p in directory.iterdir()
+                   if p.suffix in (".pstats", ".collapsed")), reverse=True)
+
+
+def profile_path(name: str) -> Optional[Path]:
+    if Path(name).name != name or name not in list_profiles():
+        return None
+    return Path(settings.profiling_dir) / name
+
+
+def _profiled(endpoint):
+    @functools.wraps(endpoint)
+    def wrapper(*args, **kwargs):
+        profile = _active.get()
+        if profile is None:
+            return endpoint(*args, **kwargs)
+        with profile.run():
+            return endpoint(*args, **kwargs)
+
+    wrapper.profiled = True
+    return wrapper
+
+
+class ProfiledRoute(APIRoute):
+    """
+    Rota que executa o endpoint sob o profiler quando o request foi
+    selecionado pelo profiling_middleware.
+
+    Os handlers sincronos rodam no threadpool, entao o profiler precisa ser
+    ligado dentro da thread que executa o endpoint.
+    """
+
+    def __init__(self, path: str, endpoint, **kwargs):
+        # include_router recria as rotas com o endpoint ja embrulhado
+        if not (inspect.iscoroutinefunction(endpoint) or
+                getattr(endpoint, "profiled", False)):
+            endpoint = _profiled(endpoint)
+        super().__init__(path, endpoint, **kwargs)
@@ -1,3 +1,5 @@
-from . import products, customers, orders, health
+from . import products, customers, orders, health, debug, metrics, admin, \
+    reports, changes, events
 
-__all__ = ["products", "customers", "orders", "health"]
+__all__ = ["products", "customers", "orders", "health", "debug", "metrics",
+           "admin", "reports", "changes", "events"]
@@ -0,0 +1,66 @@
+from fastapi import APIRouter, Depends, Query
+from fastapi.responses import FileResponse
+
+from backend.src.api.dependencies import require_admin, get_product_service
+from backend.src.api.profiling import list_profiles, profile_path
+from backend.src.application.dtos.product import ProductGetResponse
+from backend.src.application.services.product_service import ProductService
+from backend.src.exceptions import NotFoundException
+from backend.src.infrastructure import slow_queries
+
+router = APIRouter(prefix="/admin", tags=["admin"],
+                   dependencies=[Depends(require_admin)])
+
+
+@router.get("/profiles")
+def get_profiles():
+    """Lista os perfis de requests gravados em disco."""
+    return {"cod_retorno": 200, "mensagem": None, "data": list_profiles()}
+
+
+@router.get("/profiles/{name}")
+def download_profile(name: str):
+    """Baixa um perfil (.pstats ou .collapsed) pelo nome."""
+    path = profile_path(name)
+    if path is None:
+        raise NotFoundException("Profile", name)
+    return FileResponse(path, filename=name,
+                        media_type="application/octet-stream")
+
+
+@router.get("/slow-queries")
+def get_slow_queries():
+    """
+    Lista os statements mais lentos (parametros mascarados, metodo do
+    repositorio que executou e plano do EXPLAIN quando no Postgres).
+    """
+    return {"cod_retorno": 200, "mensagem": None,
+            "data": slow_queries.worst()}
+
+
+@router.delete("/slow-queries")
+def clear_slow_queries():
+    """Limpa o buffer de queries lentas."""
+    slow_queries.clear()
+    return {"cod_retorno": 200, "mensagem": None, "data": None}
+
+
+@router.put("/products/{product_id}/stock-shards",
+            response_model=ProductGetResponse)
+def set_stock_shards(product_id: int,
+                     shards: int = Query(..., ge=0, le=256),
+                     service: ProductService = Depends(get_product_service)):
+    """
+    Liga o estoque fragmentado em N shards para um produto disputado
+    (shards=0 desliga), preservando o saldo.
+    """
+    product = service.set_stock_shards(product_id, shards)
+    return ProductGetResponse(cod_retorno=200, mensagem=None, data=product)
+
+
+@router.post("/stock-shards/fold")
+def fold_stock_shards(
+        service: ProductService = Depends(get_product_service)):
+    """Consolida e redistribui o saldo dos produtos fragmentados."""
+    folded = service.fold_stock_shards()
+    return {"cod_retorno": 200, "mensagem": None, "data": {"folded": folded}}
@@ -0,0 +1,20 @@
+from fastapi import APIRouter, Request
+
+from backend.src.api import batch
+from backend.src.api.profiling import ProfiledRoute
+from backend.src.application.dtos.batch import BatchRequest, BatchResponse
+
+router = APIRouter(prefix="/batch", tags=["batch"],
+                   route_class=ProfiledRoute)
+
+
+@router.post("", response_model=BatchResponse)
+async def run_batch(payload: BatchRequest, request: Request):
+    """
+    Executa varias leituras (GET) em uma chamada so e devolve o status e o
+    corpo de cada uma, na ordem pedida. Um sub-request com erro nao derruba
+    os outros.
+    """
+    results = await batch.execute(request.scope, payload.requests,
+                                  payload.parallel)
+    return BatchResponse(cod_retorno=200, mensagem=None, data=results)
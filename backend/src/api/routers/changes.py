@@ -0,0 +1,23 @@
+from typing import Annotated
+
+from fastapi import APIRouter, Depends, Query
+
+from backend.src.api.dependencies import get_change_service
+from backend.src.api.profiling import ProfiledRoute
+from backend.src.application.dtos.change import ChangeQuery, \
+    ChangeFeedResponse
+from backend.src.application.services.change_service import ChangeService
+
+router = APIRouter(prefix="/changes", tags=["changes"],
+                   route_class=ProfiledRoute)
+
+
+@router.get("", response_model=ChangeFeedResponse)
+def list_changes(q: Annotated[ChangeQuery, Query()],
+                 service: ChangeService = Depends(get_change_service)):
+    """
+    Feed de mudancas de pedidos e produtos em ordem. Guarde o campo next e
+    envie como since na proxima chamada.
+    """
+    feed = service.feed(q)
+    return ChangeFeedResponse(cod_retorno=200, mensagem=None, data=feed)
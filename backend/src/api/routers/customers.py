@@ -3,12 +3,26 @@ from typing import Annotated
 from fastapi import APIRouter, Depends, Query
 
 from backend.src.api.dependencies import get_customer_service
+from backend.src.api.profiling import ProfiledRoute
 from backend.src.application.dtos.customer import CustomerListResponse, \
     CustomerQuery, CustomerCreate, \
-    CustomerEdit, CustomerGetResponse
+    CustomerEdit, CustomerGetResponse, CustomerSuggestQuery, \
+    CustomerSuggestResponse
 from backend.src.application.services.customer_service import CustomerService
 
-router = APIRouter(prefix="/customers", tags=["customers"])
+router = APIRouter(prefix="/customers", tags=["customers"],
+                   route_class=ProfiledRoute)
+
+
+@router.get("/suggest", response_model=CustomerSuggestResponse)
+def suggest_customers(q: Annotated[CustomerSuggestQuery, Query()],
+                      service: CustomerService = Depends(
+                          get_customer_service)):
+    """Autocomplete de clientes por prefixo de nome, e-mail ou documento."""
+    suggestions = service.suggest(q.q, q.limit)
+    response = CustomerSuggestResponse(cod_retorno=200, mensagem=None,
+                                       data=suggestions)
+    return response
 
 
 @router.get("/{customer_id}", response_model=CustomerGetResponse)
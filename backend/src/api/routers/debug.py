@@ -0,0 +1,22 @@
+from fastapi import APIRouter
+
+from backend.src.infrastructure.instrumentation import recent_requests
+from backend.src.settings import settings
+
+router = APIRouter(prefix="/debug", tags=["debug"])
+
+
+@router.get("/sql")
+def sql_stats():
+    """
+    Lista os ultimos requests com a contagem de SQL agrupada por shape e os
+    shapes marcados como N+1.
+    """
+    return {
+        "cod_retorno": 200,
+        "mensagem": None,
+        "data": {
+            "threshold": settings.sql_n_plus_one_threshold,
+            "requests": recent_requests(),
+        },
+    }
@@ -0,0 +1,79 @@
+import json
+from typing import Annotated, List, Literal, Optional
+
+from fastapi import APIRouter, Depends, Header, Query
+from fastapi.responses import StreamingResponse
+
+from backend.src.api.dependencies import get_broadcaster
+from backend.src.api.profiling import ProfiledRoute
+from backend.src.infrastructure.events import Broadcaster, RESYNC
+from backend.src.settings import settings
+
+router = APIRouter(prefix="/events", tags=["events"],
+                   route_class=ProfiledRoute)
+
+# intervalo de reconexao sugerido ao EventSource
+RETRY_MS = 3000
+
+
+def _format(item: dict) -> str:
+    event = RESYNC if item["event"] == RESYNC else "change"
+    return (f"id: {item['version']}\nevent: {event}\n"
+            f"data: {json.dumps(item, separators=(',', ':'))}\n\n")
+
+
+async def _stream(broadcaster: Broadcaster, entities: List[str],
+                  ids: List[int], last_event_id: Optional[int]):
+    # assina antes do replay para nao perder o que chegar no meio
+    subscription = await broadcaster.subscribe(entities, ids)
+    try:
+        yield f"retry: {RETRY_MS}\n\n"
+
+        version = 0
+        if last_event_id is not None:
+            # reconexao: reenvia o que foi perdido; se for demais, resync
+            limit = broadcaster.queue_size
+            missed = await broadcaster.replay(last_event_id, limit + 1)
+            if len(missed) > limit:
+                version = missed[-1]["version"]
+                yield _format({"event": RESYNC, "version": version})
+            else:
+                for item in missed:
+                    version = item["version"]
+                    if subscription.matches(item):
+                        yield _format(item)
+
+        while True:
+            item = await subscription.get(settings.events_heartbeat)
+            if item is None:
+                break
+            if item is False:
+                yield ": ping\n\n"
+                continue
+            # o replay e o broadcaster podem entregar o mesmo aviso
+            if item["event"] != RESYNC and item["version"] <= version:
+                continue
+            version = max(version, item["version"])
+            yield _format(item)
+    finally:
+        broadcaster.unsubscribe(subscription)
+
+
+@router.get("", response_class=StreamingResponse)
+async def stream_events(
+        entity: Annotated[List[Literal["order", "product"]], Query()] = [],
+        ids: Annotated[List[int], Query(alias="id")] = [],
+        last_event_id: Annotated[Optional[int], Header()] = None,
+        broadcaster: Broadcaster = Depends(get_broadcaster)):
+    """
+    Stream SSE de avisos de mudanca de pedidos e produtos
+    ({"entity", "id", "version", "event"}), filtrado por entity e id.
+
+    Cada aviso leva o version como id do evento, entao o EventSource reenvia
+    Last-Event-ID ao reconectar e recebe o que perdeu. Um evento resync pede
+    para o cliente recarregar a lista inteira.
+    """
+    return StreamingResponse(
+        _stream(broadcaster, entity, ids, last_event_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
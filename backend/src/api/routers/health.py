@@ -5,12 +5,14 @@ from fastapi.exceptions import RequestValidationError
 from sqlalchemy import text
 from sqlalchemy.orm import Session
 
+from backend.src.api.profiling import ProfiledRoute
 from backend.src.exceptions import BusinessRuleException, \
     DuplicateEntryException
 from backend.src.infrastructure.database import get_db
 from backend.src.settings import settings
 
-router = APIRouter(prefix="/health", tags=["health"])
+router = APIRouter(prefix="/health", tags=["health"],
+                   route_class=ProfiledRoute)
 
 
 @router.get("/")
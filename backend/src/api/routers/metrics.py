@@ -0,0 +1,16 @@
+from anyio import to_thread
+from fastapi import APIRouter, Response
+
+from backend.src import metrics as prometheus
+from backend.src.infrastructure import database
+
+router = APIRouter(tags=["metrics"])
+
+
+@router.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Exposicao das metricas no formato texto do Prometheus."""
+    prometheus.observe_pool(database.get_engine())
+    prometheus.observe_threadpool(to_thread.current_default_thread_limiter())
+    content, media_type = prometheus.render()
+    return Response(content=content, media_type=media_type)
@@ -1,21 +1,32 @@
-from typing import Annotated
+from typing import Annotated, Optional
 
 from fastapi import APIRouter, Depends, Query
 
 from backend.src.api.dependencies import get_order_service
+from backend.src.api.profiling import ProfiledRoute
 from backend.src.application.dtos.order import (OrderListResponse, OrderCreate,
                                                 OrderEdit, OrderQuery,
-                                                OrderGetResponse)
+                                                OrderGetResponse,
+                                                OrderBulkAction,
+                                                OrderBulkResponse,
+                                                INCLUDE_PATTERN,
+                                                parse_include)
 from backend.src.application.services.order_service import OrderService
 
-router = APIRouter(prefix="/orders", tags=["orders"])
+router = APIRouter(prefix="/orders", tags=["orders"],
+                   route_class=ProfiledRoute)
 
 
 @router.get("/{order_id}", response_model=OrderGetResponse)
 def get_order(order_id: int,
+              include: Annotated[Optional[str],
+                                 Query(pattern=INCLUDE_PATTERN)] = None,
               service: OrderService = Depends(get_order_service)):
-    """Busca um pedido pelo ID."""
-    order = service.get(order_id)
+    """
+    Busca um pedido pelo ID. include=customer,items,items.product escolhe os
+    relacionamentos carregados (vazio: so o cabecalho; omitido: todos).
+    """
+    order = service.get(order_id, parse_include(include))
     response = OrderGetResponse(cod_retorno=200, mensagem=None, data=order)
     return response
 
@@ -38,6 +49,28 @@ def create_order(payload: OrderCreate,
     return response
 
 
+@router.post("/charge", response_model=OrderBulkResponse)
+def charge_orders(payload: OrderBulkAction,
+                  service: OrderService = Depends(get_order_service)):
+    """
+    Cobra varios pedidos (por ids ou filtro) de uma vez. Pedidos que nao
+    estao como CREATED voltam como skipped.
+    """
+    outcomes = service.charge_many(payload)
+    return OrderBulkResponse(cod_retorno=200, mensagem=None, data=outcomes)
+
+
+@router.post("/cancel", response_model=OrderBulkResponse)
+def cancel_orders(payload: OrderBulkAction,
+                  service: OrderService = Depends(get_order_service)):
+    """
+    Cancela varios pedidos (por ids ou filtro) de uma vez, devolvendo o
+    estoque. Pedidos ja cancelados voltam como skipped.
+    """
+    outcomes = service.cancel_many(payload)
+    return OrderBulkResponse(cod_retorno=200, mensagem=None, data=outcomes)
+
+
 @router.put("", response_model=OrderGetResponse)
 def update_order(payload: OrderEdit,
                  service: OrderService = Depends(get_order_service)):
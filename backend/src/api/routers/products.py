@@ -3,12 +3,14 @@ from typing import Annotated
 from fastapi import APIRouter, Depends, Query
 
 from backend.src.api.dependencies import get_product_service
+from backend.src.api.profiling import ProfiledRoute
 from backend.src.application.dtos.product import ProductCreate, ProductEdit, \
     ProductListResponse, \
     ProductQuery, ProductGetResponse
 from backend.src.application.services.product_service import ProductService
 
-router = APIRouter(prefix="/products", tags=["products"])
+router = APIRouter(prefix="/products", tags=["products"],
+                   route_class=ProfiledRoute)
 
 
 @router.get("/{product_id}", response_model=ProductGetResponse)
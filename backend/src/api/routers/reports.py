@@ -0,0 +1,38 @@
+from typing import Annotated
+
+from fastapi import APIRouter, Depends, Query
+
+from backend.src.api.dependencies import get_report_service
+from backend.src.api.profiling import ProfiledRoute
+from backend.src.application.dtos.report import ReportQuery, \
+    DailySalesListResponse, ProductSalesListResponse, \
+    CustomerSalesListResponse
+from backend.src.application.services.report_service import ReportService
+
+router = APIRouter(prefix="/reports", tags=["reports"],
+                   route_class=ProfiledRoute)
+
+
+@router.get("/daily", response_model=DailySalesListResponse)
+def daily_sales(q: Annotated[ReportQuery, Query()],
+                service: ReportService = Depends(get_report_service)):
+    """Faturamento por dia."""
+    data = service.daily(q)
+    return DailySalesListResponse(cod_retorno=200, mensagem=None, data=data)
+
+
+@router.get("/products", response_model=ProductSalesListResponse)
+def product_sales(q: Annotated[ReportQuery, Query()],
+                  service: ReportService = Depends(get_report_service)):
+    """Faturamento por produto no periodo."""
+    data = service.by_product(q)
+    return ProductSalesListResponse(cod_retorno=200, mensagem=None, data=data)
+
+
+@router.get("/customers", response_model=CustomerSalesListResponse)
+def customer_sales(q: Annotated[ReportQuery, Query()],
+                   service: ReportService = Depends(get_report_service)):
+    """Faturamento por cliente no periodo."""
+    data = service.by_customer(q)
+    return CustomerSalesListResponse(cod_retorno=200, mensagem=None,
+                                     data=data)
@@ -0,0 +1,36 @@
+from typing import Any, Dict, List, Literal, Optional, Union
+
+from pydantic import BaseModel, Field
+
+from backend.src.application.dtos.base_dto import BaseResponse
+from backend.src.settings import settings
+
+QueryValue = Union[str, int, float, bool, None]
+
+
+class BatchItem(BaseModel):
+    """Sub-request de leitura executado dentro de um batch."""
+    method: Literal["GET"] = "GET"
+    path: str = Field(..., pattern=r"^/api/[^?#]*$",
+                      description="API path, e.g. /api/customers/1")
+    query: Dict[str, Union[QueryValue, List[QueryValue]]] = Field(
+        default_factory=dict, description="Query string parameters")
+
+
+class BatchRequest(BaseModel):
+    """Lista de sub-requests; parallel roda cada um na sua conexao."""
+    requests: List[BatchItem] = Field(
+        ..., min_length=1, max_length=settings.batch_max_requests)
+    parallel: bool = Field(False, description="Run the sub-requests "
+                                              "concurrently on separate "
+                                              "connections")
+
+
+class BatchResult(BaseModel):
+    """Status e corpo de um sub-request, na mesma ordem do pedido."""
+    status: int
+    body: Any = None
+
+
+class BatchResponse(BaseResponse):
+    data: Optional[List[BatchResult]] = None
@@ -0,0 +1,35 @@
+from datetime import datetime
+from typing import Optional, Sequence
+
+from pydantic import BaseModel, Field
+
+from backend.src.application.dtos.base_dto import BaseDTO, BaseResponse
+
+
+class ChangeQuery(BaseModel):
+    """Query do feed de mudancas, paginado por cursor."""
+    since: int = Field(0, ge=0, description="Return changes after this "
+                                            "cursor (position)")
+    limit: int = Field(100, ge=1, le=1000, description="Max changes")
+    entity: Optional[str] = Field(None, pattern="^(order|product)$",
+                                  description="Filter by entity")
+
+
+class ChangeGet(BaseDTO):
+    """Mudanca publicada pelo relay do outbox."""
+    position: int
+    entity: str
+    entity_id: int
+    event: str
+    payload: dict
+    created_at: datetime
+
+
+class ChangeFeed(BaseDTO):
+    """Lote de mudancas e o cursor para a proxima chamada."""
+    items: Sequence[ChangeGet]
+    next: int = Field(..., description="Cursor to pass as since")
+
+
+class ChangeFeedResponse(BaseResponse):
+    data: Optional[ChangeFeed] = None
@@ -1,12 +1,13 @@
 import re
 from datetime import datetime
-from typing import Optional
+from typing import List, Optional
 
 from pydantic import Field, field_validator, EmailStr
 
 from backend.src.application.dtos.base_dto import BaseDTO, BaseResponse
 from backend.src.application.dtos.base_query import BaseQuery
 from backend.src.application.dtos.page import Page
+from backend.src.settings import settings
 
 
 class CustomerCreate(BaseDTO):
@@ -49,6 +50,15 @@ class CustomerEdit(CustomerCreate):
 class CustomerGet(CustomerEdit):
     """DTO para busca de cliente seguindo a ordem cria -> edita -> busca."""
     created_at: datetime
+    orders_count: int = 0
+    lifetime_value: float = 0
+    last_order_at: Optional[datetime] = None
+
+    @field_validator('orders_count', 'lifetime_value', mode='before')
+    @classmethod
+    def default_stats(cls, v):
+        """Cliente ainda nao gravado nao tem estatisticas preenchidas."""
+        return 0 if v is None else v
 
 
 class CustomerQuery(BaseQuery):
@@ -63,6 +73,37 @@ class CustomerQuery(BaseQuery):
     created_min: Optional[datetime] = Field(None,
                                             description="Filter by minimum "
                                                         "creation date")
+    orders_min: Optional[int] = Field(None, ge=0,
+                                      description="Filter by minimum "
+                                                  "number of orders")
+    lifetime_value_min: Optional[float] = Field(None, ge=0,
+                                                  description="Filter by "
+                                                              "minimum "
+                                                              "lifetime value")
+    last_order_min: Optional[datetime] = Field(None,
+                                               description="Filter by minimum "
+                                                           "last order date")
+
+
+class CustomerSuggestQuery(BaseDTO):
+    """Query do autocomplete de clientes (prefixo, sem paginacao)."""
+    q: str = Field(..., min_length=1, max_length=120,
+                   description="Prefix of the name, e-mail or document")
+    limit: int = Field(settings.customer_suggest_limit, ge=1, le=50,
+                       description="Max suggestions")
+
+
+class CustomerSuggestion(BaseDTO):
+    """Cliente sugerido pelo autocomplete."""
+    id: int
+    name: str
+    email: str
+    document: str
+
+
+class CustomerSuggestResponse(BaseResponse):
+    """DTO para resposta do autocomplete de clientes."""
+    data: Optional[List[CustomerSuggestion]] = None
 
 
 class CustomerGetResponse(BaseResponse):
@@ -1,7 +1,7 @@
 from datetime import datetime
-from typing import Optional, Sequence
+from typing import FrozenSet, Optional, Sequence
 
-from pydantic import Field
+from pydantic import Field, ValidationInfo, model_validator
 
 from backend.src.application.dtos.base_dto import BaseDTO, BaseResponse
 from backend.src.application.dtos.base_query import BaseQuery
@@ -11,6 +11,29 @@ from backend.src.application.dtos.product import ProductGet
 from backend.src.infrastructure.models.orders import OrderStatus
 
 
+# relacionamentos que o include= pode carregar; sem include vem tudo
+ORDER_INCLUDES = ("customer", "items", "items.product")
+FULL_INCLUDE: FrozenSet[str] = frozenset(ORDER_INCLUDES)
+INCLUDE_PATTERN = (r"^((customer|items|items\.product)"
+                   r"(,(customer|items|items\.product))*)?$")
+# pedidos por cobranca/cancelamento em lote (ids ou filtro)
+BULK_MAX_ORDERS = 10000
+
+
+def parse_include(value: Optional[str]) -> FrozenSet[str]:
+    """
+    Converte o include= (lista separada por virgula) no conjunto de
+    relacionamentos: None carrega tudo e "" so o cabecalho do pedido.
+    items.product implica items.
+    """
+    if value is None:
+        return FULL_INCLUDE
+    names = {name for name in value.split(",") if name}
+    if "items.product" in names:
+        names.add("items")
+    return frozenset(names)
+
+
 class OrderItemCreate(BaseDTO):
     """DTO de criacao item de um pedido seguindo a ordem cria -> edita ->
     busca."""
@@ -44,7 +67,10 @@ class OrderItemGet(BaseDTO):
     """DTO de busca de um pedido seguindo a ordem cria -> edita ->
     busca."""
     id: int = Field(..., gt=0, description="Order item ID")
-    product: ProductGet
+    product_id: int = Field(..., gt=0, description="Product ID")
+    product: Optional[ProductGet] = Field(None, description="Loaded with "
+                                                            "include="
+                                                            "items.product")
     unit_price: float = Field(..., gt=0, description="Unit price")
     quantity: int = Field(..., gt=0, description="Quantity (must be positive)")
     line_total: float = Field(..., gt=0, description="Line total")
@@ -53,11 +79,21 @@ class OrderItemGet(BaseDTO):
 class OrderGet(OrderEdit):
     """DTO de busca de um pedido seguindo a ordem cria -> edita -> busca."""
     created_at: datetime
-    items: Sequence[OrderItemGet]
-    customer: CustomerGet
+    items: Optional[Sequence[OrderItemGet]] = Field(
+        None, description="Loaded with include=items")
+    customer: Optional[CustomerGet] = Field(
+        None, description="Loaded with include=customer")
     status: OrderStatus = Field(..., description="Order status")
     total_amount: float = Field(..., gt=0, description="Total amount")
 
+    @model_validator(mode="after")
+    def drop_unloaded_items(self, info: ValidationInfo):
+        """Itens nao pedidos no include voltam null, nao lista vazia."""
+        include = (info.context or {}).get("include", FULL_INCLUDE)
+        if "items" not in include:
+            self.items = None
+        return self
+
 
 class OrderGetResponse(BaseResponse):
     """DTO de resposta de busca de um pedido seguindo a ordem cria -> edita ->
@@ -82,9 +118,62 @@ class OrderQuery(BaseQuery):
                                                 "e-mail or document")
     status: Optional[OrderStatus] = Field(None,
                                           description="Filter by order status")
+    product_id: Optional[int] = Field(None, gt=0,
+                                      description="Filter by orders with "
+                                                  "this product")
+    sku: Optional[str] = Field(None, min_length=1, max_length=50,
+                               description="Filter by orders with the "
+                                           "product of this SKU")
     total_amount: Optional[float] = Field(None,
                                           description="Filter by minimum "
                                                       "total amount")
-    created_min: Optional[datetime] = Field(None,
-                                            description="Filter by minimum "
+    created_min: Optional[datetime] = Field(
+        None, description="Filter by minimum creation date (default: "
+                          "ORDERS_LIST_WINDOW_DAYS days ago)")
+    created_max: Optional[datetime] = Field(None,
+                                            description="Filter by maximum "
                                                         "creation date")
+    include_archived: bool = Field(False,
+                                   description="Also search archived "
+                                               "(old paid/cancelled) orders")
+    include: Optional[str] = Field(None, pattern=INCLUDE_PATTERN,
+                                   description="Relations to load: "
+                                               "customer, items, "
+                                               "items.product (comma "
+                                               "separated; empty for "
+                                               "headers only, omitted for "
+                                               "all)")
+
+    @property
+    def includes(self) -> FrozenSet[str]:
+        return parse_include(self.include)
+
+
+class OrderBulkAction(BaseDTO):
+    """DTO de cobranca/cancelamento em lote, por lista de ids ou filtro."""
+    ids: Optional[list[int]] = Field(None, min_length=1,
+                                     max_length=BULK_MAX_ORDERS,
+                                     description="Order IDs")
+    filter: Optional[OrderQuery] = Field(None,
+                                         description="Order filter "
+                                                     "(pagination and sorting "
+                                                     "are ignored)")
+
+    @model_validator(mode="after")
+    def validate_target(self):
+        """Exige exatamente um entre ids e filter."""
+        if (self.ids is None) == (self.filter is None):
+            raise ValueError("Provide either ids or filter")
+        return self
+
+
+class OrderTransition(BaseDTO):
+    """Resultado de um pedido em uma operacao em lote."""
+    id: int
+    result: str = Field(..., description="changed, skipped or not_found")
+    status: Optional[OrderStatus] = None
+
+
+class OrderBulkResponse(BaseResponse):
+    """DTO de resposta das operacoes em lote."""
+    data: Optional[list[OrderTransition]] = None
@@ -2,7 +2,7 @@ import re
 from datetime import datetime
 from typing import Optional
 
-from pydantic import Field, field_validator
+from pydantic import Field, field_validator, model_validator
 
 from backend.src.application.dtos.base_dto import BaseDTO, BaseResponse
 from backend.src.application.dtos.base_query import BaseQuery
@@ -44,6 +44,24 @@ class ProductEdit(ProductCreate):
 
 class ProductGet(ProductEdit):
     created_at: datetime
+    stock_shards: int = 0
+
+    @field_validator('stock_shards', mode='before')
+    @classmethod
+    def default_shards(cls, v):
+        """Produto ainda nao gravado nao tem stock_shards preenchido."""
+        return 0 if v is None else v
+
+    @model_validator(mode="before")
+    @classmethod
+    def use_available_stock(cls, data):
+        """Com estoque fragmentado o saldo e a soma dos shards."""
+        available = getattr(data, "available_stock", None)
+        if not getattr(data, "stock_shards", 0) or available is None:
+            return data
+        values = {name: getattr(data, name) for name in cls.model_fields}
+        values["stock_qty"] = available
+        return values
 
 
 class ProductGetResponse(BaseResponse):
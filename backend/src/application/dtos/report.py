@@ -0,0 +1,65 @@
+from datetime import date
+from typing import Optional
+
+from pydantic import Field, model_validator
+
+from backend.src.application.dtos.base_dto import BaseDTO, BaseResponse
+from backend.src.application.dtos.base_query import BaseQuery
+from backend.src.application.dtos.page import Page
+
+
+class ReportQuery(BaseQuery):
+    """Query dos relatorios de vendas (periodo, paginacao e ordenacao)."""
+    sort_field: str = Field("id", description="Field to sort by (id = "
+                                              "report default)")
+    sort_order: int = Field(-1, ge=-1, le=1,
+                            description="Sort order: -1 for DESC, 1 for ASC, "
+                                        "0 for no sorting")
+    start: Optional[date] = Field(None, description="First day (inclusive)")
+    end: Optional[date] = Field(None, description="Last day (inclusive)")
+
+    @model_validator(mode="after")
+    def validate_period(self):
+        if self.start and self.end and self.start > self.end:
+            raise ValueError("start must be before end")
+        return self
+
+
+class DailySalesGet(BaseDTO):
+    """Vendas de um dia."""
+    day: date
+    orders_count: int
+    revenue: float
+    paid_revenue: float
+
+
+class ProductSalesGet(BaseDTO):
+    """Vendas de um produto no periodo."""
+    product_id: int
+    name: str
+    sku: str
+    orders_count: int
+    quantity: int
+    revenue: float
+    paid_revenue: float
+
+
+class CustomerSalesGet(BaseDTO):
+    """Vendas de um cliente no periodo."""
+    customer_id: int
+    name: str
+    orders_count: int
+    revenue: float
+    paid_revenue: float
+
+
+class DailySalesListResponse(BaseResponse):
+    data: Optional[Page[DailySalesGet]] = None
+
+
+class ProductSalesListResponse(BaseResponse):
+    data: Optional[Page[ProductSalesGet]] = None
+
+
+class CustomerSalesListResponse(BaseResponse):
+    data: Optional[Page[CustomerSalesGet]] = None
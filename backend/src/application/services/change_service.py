@@ -0,0 +1,17 @@
+from backend.src.application.dtos.change import ChangeQuery, ChangeFeed, \
+    ChangeGet
+from backend.src.infrastructure.repositories.outbox_repository import \
+    OutboxRepository
+
+
+class ChangeService:
+    def __init__(self, session, outbox: OutboxRepository):
+        self.session = session
+        self.outbox = outbox
+
+    def feed(self, q: ChangeQuery) -> ChangeFeed:
+        events = self.outbox.changes(q.since, q.limit, q.entity)
+        items = [ChangeGet.model_validate(event) for event in events]
+        # sem novidades o cursor nao anda
+        cursor = items[-1].position if items else q.since
+        return ChangeFeed(items=items, next=cursor)
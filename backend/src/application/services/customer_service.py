@@ -1,14 +1,25 @@
+import re
 import urllib.parse
 from datetime import datetime
+from typing import List
 
+from backend.src import metrics
 from backend.src.application.dtos.customer import (CustomerGet,
                                                    CustomerCreate,
-                                                   CustomerEdit, CustomerQuery)
+                                                   CustomerEdit, CustomerQuery,
+                                                   CustomerSuggestion)
 from backend.src.application.dtos.page import Page
 from backend.src.exceptions import DuplicateEntryException
+from backend.src.infrastructure.cache import TTLCache
 from backend.src.infrastructure.models import CustomerModel
 from backend.src.infrastructure.repositories.customer_repository import \
     CustomerRepository
+from backend.src.settings import settings
+
+# Sugestoes por (prefixo, limite). Cada worker tem o seu cache: cadastros e
+# edicoes limpam o do proprio processo e o TTL limita o atraso nos demais.
+suggestion_cache = TTLCache(settings.customer_suggest_cache_size,
+                            settings.customer_suggest_cache_ttl)
 
 
 class CustomerService:
@@ -31,6 +42,41 @@ class CustomerService:
 
         return Page(items=items, total=data.total)
 
+    def suggest(self, q: str, limit: int) -> List[CustomerSuggestion]:
+        """
+        Autocomplete: so documento quando o termo tem apenas digitos (e
+        pontuacao de CPF/CNPJ), so e-mail quando tem "@", e nome seguido de
+        e-mail nos demais casos.
+        """
+        term = q.strip().lower()
+        key = (term, limit)
+        cached = suggestion_cache.get(key)
+        if cached is not None:
+            metrics.CUSTOMER_SUGGEST_CACHE.labels("hit").inc()
+            return cached
+        metrics.CUSTOMER_SUGGEST_CACHE.labels("miss").inc()
+
+        digits = re.sub(r"[\s./-]", "", term)
+        if digits.isdigit():
+            lookups = [("document", digits)]
+        elif "@" in term:
+            lookups = [("email", term)]
+        else:
+            lookups = [("name", term), ("email", term)]
+
+        found = {}
+        for field, prefix in lookups:
+            if not prefix or len(found) >= limit:
+                break
+            for customer in self.customer.suggest(prefix, field,
+                                                  limit - len(found)):
+                found.setdefault(customer.id, customer)
+
+        suggestions = [CustomerSuggestion.model_validate(customer)
+                       for customer in found.values()]
+        suggestion_cache.set(key, suggestions)
+        return suggestions
+
     def check_dupes(self, data: CustomerCreate):
         query = CustomerQuery(name=data.name, email=data.email,
                               document=data.document)
@@ -52,6 +98,7 @@ class CustomerService:
 
                 self.session.flush()
 
+            suggestion_cache.clear()
             self.session.refresh(customer)
             return CustomerGet.model_validate(customer)
         except Exception as e:
@@ -70,6 +117,7 @@ class CustomerService:
                 customer = self.customer.edit(customer)
 
                 self.session.flush()
+            suggestion_cache.clear()
             self.session.refresh(customer)
             return CustomerGet.model_validate(customer)
         except Exception as e:
@@ -1,58 +1,122 @@
 from datetime import datetime
+from decimal import Decimal
+from typing import FrozenSet, List, Optional
 
 from sqlalchemy.orm import Session
 
+from backend.src import metrics
 from backend.src.application.dtos.order import OrderGet, OrderCreate, \
-    OrderEdit, OrderQuery
+    OrderEdit, OrderQuery, OrderBulkAction, OrderTransition, \
+    FULL_INCLUDE, BULK_MAX_ORDERS
 from backend.src.application.dtos.page import Page
-from backend.src.exceptions import NotFoundException
+from backend.src.exceptions import NotFoundException, BusinessRuleException
 from backend.src.infrastructure.models import OrderModel
-from backend.src.infrastructure.models.order_items import OrderItemModel
+from backend.src.infrastructure.models.order_items import OrderItemModel, \
+    line_total
 from backend.src.infrastructure.models.orders import OrderStatus
+from backend.src.infrastructure.repositories.customer_repository import \
+    CustomerRepository
 from backend.src.infrastructure.repositories.order_repository import \
-    OrderRepository
+    OrderRepository, OrderItemsDiff
+from backend.src.infrastructure.repositories.outbox_repository import \
+    OutboxRepository
 from backend.src.infrastructure.repositories.product_repository import \
     ProductRepository
+from backend.src.infrastructure.repositories.sales_report_repository import \
+    SalesReportRepository
+from backend.src.infrastructure.retry import retry_on_conflict
 
 
-def _deltas_from_diff(old, new):
-    o, n = {}, {}
+def _stock_deltas(old, new) -> dict[int, int]:
+    """
+    Variacao de estoque por produto entre os itens antigos e os novos
+    (positivo = consome estoque), somando linhas repetidas do mesmo produto.
+    """
+    stock: dict[int, int] = {}
     for it in old:
-        o[it.product.id] = o.get(it.product.id, 0) + it.quantity
+        stock[it.product_id] = stock.get(it.product_id, 0) - it.quantity
     for it in new:
-        n[it.product_id] = n.get(it.product_id, 0) + it.quantity
-    keys = set(o) | set(n)
-    return {k: n.get(k, 0) - o.get(k, 0) for k in keys if
-            n.get(k, 0) != o.get(k, 0)}
+        stock[it.product_id] = stock.get(it.product_id, 0) + it.quantity
+    return {k: v for k, v in stock.items() if v != 0}
 
 
-def _deltas_from_items(new):
-    d = {}
+def _diff_items(order: OrderModel, new) -> OrderItemsDiff:
+    """
+    Compara os itens gravados com os enviados e separa o que deve ser
+    inserido, atualizado e removido, junto com o novo total e a variacao de
+    estoque por produto (positivo = consome estoque).
+    """
+    diff = OrderItemsDiff()
+    old = order.items
+    existing = {it.id: it for it in old}
+    seen: set[int] = set()
+
     for it in new:
-        d[it.product_id] = it.quantity - d.get(it.product_id, 0)
-    return d
+        unit_price = Decimal(str(it.unit_price))
+        values = {"product_id": it.product_id, "quantity": it.quantity,
+                  "unit_price": unit_price,
+                  "line_total": line_total(it.quantity, unit_price)}
+        diff.total += values["line_total"]
+
+        current = existing.get(it.id) if it.id not in seen else None
+        if current is None:
+            diff.inserts.append({"order_id": order.id,
+                                 "order_created_at": order.created_at,
+                                 **values})
+            continue
+
+        seen.add(it.id)
+        if ((current.product_id, current.quantity, current.unit_price) !=
+                (it.product_id, it.quantity, unit_price)):
+            diff.updates.append({"id": it.id, **values})
+
+    diff.deletes = [item_id for item_id in existing if item_id not in seen]
+    diff.stock_deltas = _stock_deltas(old, new)
+    return diff
 
 
 class OrderService:
     def __init__(self, session: Session, order: OrderRepository,
-                 product: ProductRepository):
+                 product: ProductRepository,
+                 reports: Optional[SalesReportRepository] = None,
+                 customer: Optional[CustomerRepository] = None,
+                 outbox: Optional[OutboxRepository] = None):
         self.session = session
         self.order = order
         self.product = product
-
-    def get(self, order_id: int) -> OrderGet:
-        order = self.order.get(order_id)
-        order = OrderGet.model_validate(order)
+        self.reports = reports or SalesReportRepository(session)
+        self.customer = customer or CustomerRepository(session)
+        self.outbox = outbox or OutboxRepository(session)
+
+    def _order_event(self, order: OrderModel, event: str) -> None:
+        self.outbox.add("order", order.id, event, {
+            "status": order.status.value, "customer_id": order.customer_id,
+            "total_amount": str(order.total_amount)})
+
+    def _stock_events(self, deltas: dict[int, int], reason: str) -> None:
+        self.outbox.add_many([
+            {"entity": "product", "entity_id": product_id,
+             "event": "stock_adjusted",
+             "payload": {"delta": -delta, "reason": reason}}
+            for product_id, delta in deltas.items() if delta])
+
+    def get(self, order_id: int,
+            include: FrozenSet[str] = FULL_INCLUDE) -> OrderGet:
+        order = self.order.get(order_id, archived=True, include=include)
+        order = OrderGet.model_validate(order, context={"include": include})
         return order
 
     def list(self, q: OrderQuery) -> Page[OrderGet]:
         data = self.order.list(q)
-        items = [OrderGet.model_validate(order) for order in data.items]
+        context = {"include": q.includes}
+        items = [OrderGet.model_validate(order, context=context)
+                 for order in data.items]
 
         orders = Page(items=items, total=data.total, )
 
         return orders
 
+    @retry_on_conflict
     def add(self, data: OrderCreate) -> OrderGet:
         try:
             with self.session.begin():
@@ -74,50 +138,60 @@ class OrderService:
                 order.recalc_total()
                 order = self.order.add(order)
 
-                deltas = _deltas_from_items(new=order.items)
+                deltas = _stock_deltas((), order.items)
                 self.product.adjust_stock(deltas=deltas)
 
                 self.session.flush()
+                self.reports.apply_orders([order.id])
+                self.customer.refresh_stats([order.customer_id])
+                self._order_event(order, "created")
+                self._stock_events(deltas, "order_created")
 
+            metrics.ORDERS.labels("created").inc()
+            metrics.STOCK_ADJUSTMENTS.labels("order_created").inc(len(deltas))
             self.session.refresh(order)
             return OrderGet.model_validate(order)
         except Exception as e:
             self.session.rollback()
             raise e
 
+    @retry_on_conflict
     def edit(self, data: OrderEdit) -> OrderGet:
+        """
+        Carrega o pedido uma unica vez, calcula o diff dos itens e aplica
+        tudo em lote: um INSERT, um UPDATE e um DELETE de itens, um UPDATE do
+        cabecalho e um UPDATE de estoque, independente do numero de itens.
+        """
         try:
             with self.session.begin():
-                existing = self.get(data.id)
-
-                order = OrderModel(id=data.id, customer_id=data.customer_id,
-                                   status=existing.status,
-                                   created_at=existing.created_at)
+                order = self.order.get(data.id)
 
-                # Add order items
-                for item_data in data.items:
-                    order_item = (
-                        OrderItemModel(id=item_data.id,
-                                       order_id=data.id,
-                                       product_id=item_data.product_id,
-                                       unit_price=item_data.unit_price,
-                                       quantity=item_data.quantity))
-
-                    order.items.append(order_item)
-
-                updated = self.order.edit(order)
-
-                deltas = _deltas_from_diff(old=existing.items, new=order.items)
-                self.product.adjust_stock(deltas=deltas)
+                diff = _diff_items(order, new=data.items)
+                customer_ids = [order.customer_id, data.customer_id]
+                # estoque antes dos itens: produto inexistente vira 404
+                self.product.adjust_stock(deltas=diff.stock_deltas)
+                self.reports.apply_orders([order.id], sign=-1)
+                self.order.edit_items(order.id, data.customer_id, diff)
 
                 self.session.flush()
-
-            self.session.refresh(updated)
+                self.reports.apply_orders([order.id])
+                self.customer.refresh_stats(customer_ids)
+                self.outbox.add("order", order.id, "edited", {
+                    "status": order.status.value,
+                    "customer_id": data.customer_id,
+                    "total_amount": str(diff.total)})
+                self._stock_events(diff.stock_deltas, "order_edited")
+
+            metrics.ORDERS.labels("edited").inc()
+            metrics.STOCK_ADJUSTMENTS.labels("order_edited").inc(
+                len(diff.stock_deltas))
+            updated = self.order.get(data.id, refresh=True)
             return OrderGet.model_validate(updated)
         except Exception as e:
             self.session.rollback()
             raise e
 
+    @retry_on_conflict
     def charge(self, order_id: int):
         try:
             with self.session.begin():
@@ -127,17 +201,22 @@ class OrderService:
                     raise NotFoundException(
                         f"Order {order_id} is not in the created state")
 
+                self.reports.apply_orders([order.id], sign=-1)
                 order.status = OrderStatus.PAID
                 order = self.order.edit(order)
 
                 self.session.flush()
+                self.reports.apply_orders([order.id])
+                self._order_event(order, "charged")
 
+            metrics.ORDERS.labels("charged").inc()
             self.session.refresh(order)
             return order
         except Exception as e:
             self.session.rollback()
             raise e
 
+    @retry_on_conflict
     def cancel(self, order_id: int):
         try:
             with self.session.begin():
@@ -147,16 +226,108 @@ class OrderService:
                     raise NotFoundException(
                         f"Order {order_id} is already cancelled")
 
+                self.reports.apply_orders([order.id], sign=-1)
                 order.status = OrderStatus.CANCELLED
                 order = self.order.edit(order)
 
+                deltas: dict[int, int] = {}
                 for item in order.items:
-                    self.product.adjust_stock(
-                        {item.product_id: -item.quantity})
+                    deltas[item.product_id] = (deltas.get(item.product_id, 0)
+                                               - item.quantity)
+                self.product.adjust_stock(deltas)
 
                 self.session.flush()
+                self.customer.refresh_stats([order.customer_id])
+                self._order_event(order, "cancelled")
+                self._stock_events(deltas, "order_cancelled")
+
+            metrics.ORDERS.labels("cancelled").inc()
+            metrics.STOCK_ADJUSTMENTS.labels("order_cancelled").inc(
+                len(order.items))
             self.session.refresh(order)
             return order
         except Exception as e:
             self.session.rollback()
             raise e
+
+    def _transition_many(self, data: OrderBulkAction,
+                         from_status: List[OrderStatus],
+                         to_status: OrderStatus) -> List[OrderTransition]:
+        """
+        Muda o status de varios pedidos de uma vez: trava os candidatos,
+        aplica um UPDATE protegido pelo status atual e, no cancelamento,
+        devolve o estoque agregado por produto com um unico ajuste.
+        """
+        with self.session.begin():
+            # o filtro tem o mesmo teto da lista de ids: um a mais detecta
+            # que passou
+            ids = self.order.lock_for_transition(
+                from_status, data.ids, data.filter,
+                limit=BULK_MAX_ORDERS + 1)
+            if len(ids) > BULK_MAX_ORDERS:
+                raise BusinessRuleException(
+                    f"Filter matches more than {BULK_MAX_ORDERS} orders; "
+                    f"narrow it (e.g. created_min/created_max)")
+            self.reports.apply_orders(ids, sign=-1)
+            changed = self.order.transition(ids, from_status, to_status)
+            changed_ids = [order_id for order_id, _, _ in changed]
+
+            event = ("cancelled" if to_status == OrderStatus.CANCELLED
+                     else "charged")
+            if to_status == OrderStatus.CANCELLED:
+                quantities = self.order.item_quantities(changed_ids)
+                deltas = {product_id: -qty for product_id, qty in
+                          quantities.items()}
+                self.product.adjust_stock(deltas)
+                self.customer.refresh_stats(
+                    list({customer_id for _, customer_id, _ in changed}))
+                self._stock_events(deltas, "order_cancelled")
+            self.reports.apply_orders(changed_ids)
+            self.outbox.add_many([
+                {"entity": "order", "entity_id": order_id, "event": event,
+                 "payload": {"status": to_status.value,
+                             "customer_id": customer_id,
+                             "total_amount": str(total_amount)}}
+                for order_id, customer_id, total_amount in changed])
+
+            outcomes = {order_id: OrderTransition(id=order_id,
+                                                  result="changed",
+                                                  status=to_status)
+                        for order_id in changed_ids}
+            if data.ids is not None:
+                rest = [i for i in dict.fromkeys(data.ids)
+                        if i not in outcomes]
+                current = self.order.statuses(rest)
+                for order_id in rest:
+                    outcomes[order_id] = (
+                        OrderTransition(id=order_id, result="skipped",
+                                        status=current[order_id])
+                        if order_id in current else
+                        OrderTransition(id=order_id, result="not_found"))
+                return [outcomes[i] for i in dict.fromkeys(data.ids)]
+            return list(outcomes.values())
+
+    @retry_on_conflict
+    def charge_many(self, data: OrderBulkAction) -> List[OrderTransition]:
+        try:
+            outcomes = self._transition_many(data, [OrderStatus.CREATED],
+                                             OrderStatus.PAID)
+            metrics.ORDERS.labels("charged").inc(
+                sum(o.result == "changed" for o in outcomes))
+            return outcomes
+        except Exception as e:
+            self.session.rollback()
+            raise e
+
+    @retry_on_conflict
+    def cancel_many(self, data: OrderBulkAction) -> List[OrderTransition]:
+        try:
+            outcomes = self._transition_many(
+                data, [OrderStatus.CREATED, OrderStatus.PAID],
+                OrderStatus.CANCELLED)
+            metrics.ORDERS.labels("cancelled").inc(
+                sum(o.result == "changed" for o in outcomes))
+            return outcomes
+        except Exception as e:
+            self.session.rollback()
+            raise e
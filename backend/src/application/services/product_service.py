@@ -1,18 +1,28 @@
 from datetime import datetime
+from typing import Optional
 
 from backend.src.application.dtos.page import Page
 from backend.src.application.dtos.product import ProductGet, ProductCreate, \
     ProductEdit, ProductQuery
 from backend.src.exceptions import DuplicateEntryException
 from backend.src.infrastructure.models import ProductModel
+from backend.src.infrastructure.repositories.outbox_repository import \
+    OutboxRepository
 from backend.src.infrastructure.repositories.product_repository import \
     ProductRepository
 
 
 class ProductService:
-    def __init__(self, session, product: ProductRepository):
+    def __init__(self, session, product: ProductRepository,
+                 outbox: Optional[OutboxRepository] = None):
         self.session = session
         self.product = product
+        self.outbox = outbox or OutboxRepository(session)
+
+    def _product_event(self, product: ProductModel, event: str) -> None:
+        self.outbox.add("product", product.id, event, {
+            "stock_qty": product.stock_qty, "price": str(product.price),
+            "is_active": product.is_active})
 
     def get(self, product_id: int) -> ProductGet:
         product = self.product.get(product_id)
@@ -50,6 +60,7 @@ class ProductService:
                 product = self.product.add(product)
 
                 self.session.flush()
+                self._product_event(product, "created")
             self.session.refresh(product)
             return ProductGet.model_validate(product)
         except Exception as e:
@@ -73,9 +84,29 @@ class ProductService:
 
                 product = self.product.edit(product)
                 self.session.flush()
+                self._product_event(product, "edited")
+
+            self.session.refresh(product)
+            return ProductGet.model_validate(product)
+        except Exception as e:
+            self.session.rollback()
+            raise e
+
+    def set_stock_shards(self, product_id: int, shards: int) -> ProductGet:
+        try:
+            with self.session.begin():
+                product = self.product.set_stock_shards(product_id, shards)
 
             self.session.refresh(product)
             return ProductGet.model_validate(product)
         except Exception as e:
             self.session.rollback()
             raise e
+
+    def fold_stock_shards(self) -> int:
+        try:
+            with self.session.begin():
+                return self.product.fold_stock_shards()
+        except Exception as e:
+            self.session.rollback()
+            raise e
@@ -0,0 +1,29 @@
+from backend.src.application.dtos.page import Page
+from backend.src.application.dtos.report import ReportQuery, DailySalesGet, \
+    ProductSalesGet, CustomerSalesGet
+from backend.src.infrastructure.repositories.sales_report_repository import \
+    SalesReportRepository
+
+
+class ReportService:
+    def __init__(self, session, reports: SalesReportRepository):
+        self.session = session
+        self.reports = reports
+
+    def daily(self, q: ReportQuery) -> Page[DailySalesGet]:
+        data = self.reports.daily(q)
+        items = [DailySalesGet.model_validate(dict(row)) for row in
+                 data.items]
+        return Page(items=items, total=data.total)
+
+    def by_product(self, q: ReportQuery) -> Page[ProductSalesGet]:
+        data = self.reports.by_product(q)
+        items = [ProductSalesGet.model_validate(dict(row)) for row in
+                 data.items]
+        return Page(items=items, total=data.total)
+
+    def by_customer(self, q: ReportQuery) -> Page[CustomerSalesGet]:
+        data = self.reports.by_customer(q)
+        items = [CustomerSalesGet.model_validate(dict(row)) for row in
+                 data.items]
+        return Page(items=items, total=data.total)
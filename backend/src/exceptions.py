@@ -13,6 +13,14 @@ class DuplicateEntryException(HTTPException):
                          detail=f"{entity} already registered")
 
 
+class InsufficientStockException(HTTPException):
+    def __init__(self, product_ids: list[int]):
+        ids = ", ".join(str(i) for i in sorted(product_ids))
+        super().__init__(status_code=status.HTTP_409_CONFLICT,
+                         detail=f"Insufficient stock for product(s) {ids}")
+        self.product_ids = sorted(product_ids)
+
+
 class BusinessRuleException(HTTPException):
     def __init__(self, detail: str = "Business rule violation"):
         super().__init__(status_code=status.HTTP_422_UNPROCESSABLE_CONTENT,
@@ -23,3 +31,16 @@ class InvalidSortFieldException(HTTPException):
     def __init__(self, field: str, model: str):
         super().__init__(status_code=status.HTTP_400_BAD_REQUEST,
                          detail=f"Invalid sort field '{field}' for {model}")
+
+
+class ForbiddenException(HTTPException):
+    def __init__(self, detail: str = "Invalid admin token"):
+        super().__init__(status_code=status.HTTP_403_FORBIDDEN,
+                         detail=detail)
+
+
+class NPlusOneQueryError(Exception):
+    def __init__(self, shape: str, count: int):
+        super().__init__(f"N+1 query detected ({count}x): {shape}")
+        self.shape = shape
+        self.count = count
@@ -1,14 +1,133 @@
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+import os
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Optional
 
+from alembic.runtime.migration import MigrationContext
+from alembic.script import ScriptDirectory
+from sqlalchemy import create_engine, Engine
+from sqlalchemy.orm import sessionmaker, Session
+
+from backend.src.infrastructure import instrumentation
 from backend.src.settings import settings
 
-engine = create_engine(settings.database_url, pool_pre_ping=True)
-SessionLocal = sessionmaker(bind=engine, autocommit=False, autoflush=False)
-print(settings.database_url)
+MIGRATIONS_DIR = Path(__file__).resolve().parent / "migrations"
+
+_engine: Optional[Engine] = None
+_engine_pid: Optional[int] = None
+_engine_lock = threading.Lock()
+
+# session de um POST /api/batch, usada por todos os sub-requests dele
+_shared_session: ContextVar[Optional[Session]] = ContextVar(
+    "shared_session", default=None)
+
+
+def _connect_args(url: str) -> dict:
+    # limita a espera por locks para que um produto disputado nao segure o
+    # request indefinidamente (o erro cai no retry do servico)
+    if not url.startswith("postgresql"):
+        return {}
+    args = {"options": f"-c lock_timeout={settings.db_lock_timeout_ms}"}
+    if url.startswith("postgresql+psycopg:"):
+        # o SQL gerado pelo cache do SQLAlchemy e estavel, entao os
+        # statements quentes passam a usar prepared statements do servidor
+        threshold = settings.db_prepare_threshold
+        args["prepare_threshold"] = threshold if threshold >= 0 else None
+    return args
+
+
+def _pool_args(url: str) -> dict:
+    # o SQLite usa o pool padrao do dialeto
+    if url.startswith("sqlite"):
+        return {}
+    return {"pool_size": settings.db_pool_size,
+            "max_overflow": settings.db_max_overflow}
+
+
+def pool_capacity() -> int:
+    """Conexoes que um worker pode abrir (pool_size + max_overflow)."""
+    return settings.db_pool_size + settings.db_max_overflow
+
+
+def create_db_engine(url: Optional[str] = None) -> Engine:
+    url = url or settings.database_url
+    engine = create_engine(url, pool_pre_ping=True,
+                           connect_args=_connect_args(url),
+                           **_pool_args(url))
+    instrumentation.install(engine)
+    return engine
+
+
+def get_engine() -> Engine:
+    """
+    Engine do processo atual, criado no primeiro uso (nada conecta no
+    import). Um worker criado por fork depois disso cria o seu proprio
+    engine em vez de usar o pool herdado do processo pai.
+    """
+    global _engine, _engine_pid
+    pid = os.getpid()
+    if _engine is None or _engine_pid != pid:
+        with _engine_lock:
+            if _engine is None or _engine_pid != pid:
+                if _engine is not None:
+                    # as conexoes herdadas sao do pai: descarta sem fecha-las
+                    _engine.dispose(close=False)
+                _engine = create_db_engine()
+                _engine_pid = pid
+    return _engine
+
+
+def set_engine(engine: Engine) -> None:
+    """Troca o engine do processo (testes e scripts)."""
+    global _engine, _engine_pid
+    with _engine_lock:
+        _engine, _engine_pid = engine, os.getpid()
+
+
+class _ProcessSession(Session):
+    """Session ligada ao engine do processo quando nenhum bind e passado."""
+
+    def __init__(self, bind=None, **kw):
+        super().__init__(bind=bind if bind is not None else get_engine(),
+                         **kw)
+
+
+SessionLocal = sessionmaker(class_=_ProcessSession, autocommit=False,
+                            autoflush=False)
+
+
+def check_migrations(engine: Engine) -> None:
+    """
+    Falha se o banco nao estiver na head das migrations do Alembic. O schema
+    e responsabilidade do "alembic upgrade head", nao da API.
+    """
+    expected = set(ScriptDirectory(str(MIGRATIONS_DIR)).get_heads())
+    with engine.connect() as connection:
+        current = set(MigrationContext.configure(
+            connection).get_current_heads())
+    if current != expected:
+        raise RuntimeError(
+            f"Database schema is at {sorted(current) or 'no revision'}, "
+            f"expected {sorted(expected)}: run 'alembic upgrade head'")
+
+
+@contextmanager
+def shared_session(session: Session):
+    """Faz o get_db entregar `session` (sem fecha-la) dentro do bloco."""
+    token = _shared_session.set(session)
+    try:
+        yield session
+    finally:
+        _shared_session.reset(token)
 
 
 def get_db():
+    shared = _shared_session.get()
+    if shared is not None:
+        yield shared
+        return
     db = SessionLocal()
     try:
         yield db
@@ -0,0 +1,181 @@
+import asyncio
+import logging
+from contextlib import suppress
+from typing import Iterable, List, Optional
+
+from anyio import to_thread
+
+from backend.src import metrics
+from backend.src.infrastructure.models.outbox import OutboxEventModel
+from backend.src.infrastructure.repositories.outbox_repository import \
+    OutboxRepository
+from backend.src.settings import settings
+
+logger = logging.getLogger(__name__)
+
+RESYNC = "resync"
+
+
+def notification(event: OutboxEventModel) -> dict:
+    """Aviso compacto de mudanca; o cliente busca a linha se precisar."""
+    return {"entity": event.entity, "id": event.entity_id,
+            "version": event.position, "event": event.event}
+
+
+class OutboxSource:
+    """Le o feed publicado do outbox com uma sessao curta por chamada."""
+
+    def __init__(self, session_factory):
+        self.session_factory = session_factory
+
+    def head(self) -> int:
+        session = self.session_factory()
+        try:
+            return OutboxRepository(session).last_position()
+        finally:
+            session.close()
+
+    def changes(self, since: int, limit: int) -> List[dict]:
+        session = self.session_factory()
+        try:
+            events = OutboxRepository(session).changes(since, limit)
+            return [notification(event) for event in events]
+        finally:
+            session.close()
+
+
+class Subscription:
+    """
+    Fila de uma conexao SSE com os filtros de entidade e id.
+
+    A fila e limitada: se o cliente nao acompanhar, os avisos pendentes sao
+    descartados e ele recebe um unico resync para recarregar a tela.
+    """
+
+    def __init__(self, entities: Iterable[str] = (),
+                 ids: Iterable[int] = (), maxsize: int = 100):
+        self.entities = frozenset(entities)
+        self.ids = frozenset(ids)
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize)
+        self.lagging = False
+        self.closed = False
+
+    def matches(self, item: dict) -> bool:
+        return ((not self.entities or item["entity"] in self.entities) and
+                (not self.ids or item["id"] in self.ids))
+
+    def offer(self, item: dict) -> None:
+        if self.closed or self.lagging or not self.matches(item):
+            return
+        try:
+            self.queue.put_nowait(item)
+        except asyncio.QueueFull:
+            self._drain()
+            self.queue.put_nowait({"event": RESYNC,
+                                   "version": item["version"]})
+            self.lagging = True
+            metrics.SSE_RESYNCS.inc()
+
+    def close(self) -> None:
+        """Encerra o stream assim que a fila for consumida."""
+        if not self.closed:
+            self.closed = True
+            if self.queue.full():
+                self._drain()
+            self.queue.put_nowait(None)
+
+    def _drain(self) -> None:
+        while not self.queue.empty():
+            self.queue.get_nowait()
+
+    async def get(self, timeout: float):
+        """
+        Proximo aviso; False se nada chegar em timeout (hora do heartbeat)
+        e None quando a assinatura foi encerrada.
+        """
+        try:
+            item = await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return False
+        if item is not None and item["event"] == RESYNC:
+            self.lagging = False
+        return item
+
+
+class Broadcaster:
+    """
+    Le o feed do outbox em uma unica task por processo e distribui os avisos
+    para as conexoes SSE abertas.
+
+    Uma consulta por intervalo atende todas as conexoes: uma conexao ociosa
+    custa so a sua fila e a corrotina do stream, sem sessao nem thread.
+    """
+
+    def __init__(self, source, interval: Optional[float] = None,
+                 queue_size: Optional[int] = None,
+                 batch_size: Optional[int] = None):
+        self.source = source
+        self.interval = (settings.events_poll_interval if interval is None
+                         else interval)
+        self.queue_size = queue_size or settings.events_queue_size
+        self.batch_size = batch_size or settings.outbox_batch_size
+        self.position = 0
+        self._subscribers: set = set()
+        self._task: Optional[asyncio.Task] = None
+
+    async def subscribe(self, entities: Iterable[str] = (),
+                        ids: Iterable[int] = ()) -> Subscription:
+        if not self._subscribers:
+            # sem ninguem ouvindo o cursor parou: recomeca do fim do feed
+            head = await to_thread.run_sync(self.source.head)
+            self.position = max(self.position, head)
+
+        subscription = Subscription(entities, ids, self.queue_size)
+        self._subscribers.add(subscription)
+        metrics.SSE_CONNECTIONS.inc()
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        if subscription in self._subscribers:
+            self._subscribers.discard(subscription)
+            metrics.SSE_CONNECTIONS.dec()
+
+    async def replay(self, since: int, limit: int) -> List[dict]:
+        """Avisos publicados depois de since (reconexao com Last-Event-ID)."""
+        return await to_thread.run_sync(self.source.changes, since, limit)
+
+    def publish(self, items: List[dict]) -> None:
+        for item in items:
+            self.position = max(self.position, item["version"])
+            for subscription in self._subscribers:
+                subscription.offer(item)
+
+    async def poll(self) -> int:
+        items = await to_thread.run_sync(self.source.changes, self.position,
+                                         self.batch_size)
+        self.publish(items)
+        return len(items)
+
+    async def _run(self):
+        # sem conexoes a task termina; o proximo subscribe a recria
+        while self._subscribers:
+            fetched = 0
+            try:
+                fetched = await self.poll()
+            except Exception:
+                logger.exception("Event broadcaster poll failed")
+            # lote cheio: provavelmente ha mais avisos, segue sem esperar
+            if fetched < self.batch_size:
+                await asyncio.sleep(self.interval)
+
+    async def stop(self) -> None:
+        """Para a task e encerra os streams abertos."""
+        for subscription in list(self._subscribers):
+            subscription.close()
+        if self._task is not None:
+            self._task.cancel()
+            with suppress(asyncio.CancelledError):
+                await self._task
+            self._task = None
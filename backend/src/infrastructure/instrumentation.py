@@ -0,0 +1,147 @@
+import logging
+import re
+import threading
+import time
+from collections import Counter, deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Optional
+
+from sqlalchemy import event
+
+from backend.src import metrics
+from backend.src.exceptions import NPlusOneQueryError
+from backend.src.infrastructure import slow_queries
+from backend.src.settings import settings
+
+logger = logging.getLogger(__name__)
+
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r"\b\d+(?:\.\d+)?\b")
+_IN_LIST = re.compile(r"\bIN\s*\((?:\s*(?:\?|%\(\w+\)s|%s|:\w+)\s*,?)+\)",
+                      re.IGNORECASE)
+_SPACES = re.compile(r"\s+")
+
+_current: ContextVar[Optional["QueryStats"]] = ContextVar("sql_query_stats",
+                                                          default=None)
+_history: deque = deque(maxlen=settings.sql_debug_history)
+
+
+def normalize_sql(statement: str) -> str:
+    """
+    Reduz um SQL ao seu formato (shape), removendo literais e listas de IN.
+
+    Duas execucoes do mesmo select com ids diferentes geram o mesmo shape,
+    o que permite agrupar e detectar N+1.
+    """
+    sql = _STRING.sub("?", statement)
+    sql = _IN_LIST.sub("IN (...)", sql)
+    sql = _NUMBER.sub("?", sql)
+    return _SPACES.sub(" ", sql).strip()
+
+
+class QueryStats:
+    """Contadores de SQL de uma unidade de trabalho (normalmente um request)."""
+
+    def __init__(self, label: str = "", threshold: Optional[int] = None,
+                 raise_on_n_plus_one: Optional[bool] = None):
+        self.label = label
+        self.threshold = (settings.sql_n_plus_one_threshold
+                          if threshold is None else threshold)
+        self.raise_on_n_plus_one = (settings.sql_raise_on_n_plus_one
+                                    if raise_on_n_plus_one is None
+                                    else raise_on_n_plus_one)
+        self.count = 0
+        self.duration_ms = 0.0
+        self.shapes: Counter = Counter()
+        self._lock = threading.Lock()
+
+    def record(self, statement: str, elapsed_ms: float) -> None:
+        shape = normalize_sql(statement)
+        with self._lock:
+            self.count += 1
+            self.duration_ms += elapsed_ms
+            self.shapes[shape] += 1
+            repeated = self.shapes[shape]
+
+        if self.raise_on_n_plus_one and repeated > self.threshold:
+            raise NPlusOneQueryError(shape, repeated)
+
+    @property
+    def n_plus_one(self) -> dict[str, int]:
+        return {shape: n for shape, n in self.shapes.items()
+                if n > self.threshold}
+
+    def as_dict(self) -> dict:
+        return {
+            "label": self.label,
+            "count": self.count,
+            "duration_ms": round(self.duration_ms, 3),
+            "n_plus_one": self.n_plus_one,
+            "shapes": dict(self.shapes.most_common()),
+        }
+
+
+def current_stats() -> Optional[QueryStats]:
+    return _current.get()
+
+
+@contextmanager
+def track_queries(label: str = "", threshold: Optional[int] = None,
+                  raise_on_n_plus_one: Optional[bool] = None):
+    """
+    Conta os statements executados dentro do bloco.
+
+    Uso em testes:
+        with track_queries(raise_on_n_plus_one=True) as stats:
+            repo.list(q)
+        assert stats.count <= 3
+    """
+    stats = QueryStats(label, threshold, raise_on_n_plus_one)
+    token = _current.set(stats)
+    try:
+        yield stats
+    finally:
+        _current.reset(token)
+        if stats.n_plus_one:
+            logger.warning("N+1 detected in %s: %s", label or "block",
+                           stats.n_plus_one)
+        if stats.count:
+            _history.append(stats.as_dict())
+
+
+def recent_requests() -> list[dict]:
+    return list(_history)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context,
+                           executemany):
+    context.query_start = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context,
+                          executemany):
+    if context.execution_options.get("skip_instrumentation"):
+        return
+
+    elapsed = time.perf_counter() - context.query_start
+    metrics.observe_statement(statement, elapsed)
+
+    elapsed_ms = elapsed * 1000
+    if (settings.slow_query_threshold_ms > 0 and
+            elapsed_ms >= settings.slow_query_threshold_ms):
+        slow_queries.record(conn, statement, parameters, elapsed_ms,
+                            executemany)
+
+    stats = _current.get()
+    if stats is not None:
+        stats.record(statement, elapsed_ms)
+
+
+def install(engine) -> None:
+    """Registra os listeners de instrumentacao no engine (idempotente)."""
+    if event.contains(engine, "before_cursor_execute",
+                      _before_cursor_execute):
+        return
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
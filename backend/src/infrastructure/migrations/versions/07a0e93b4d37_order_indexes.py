@@ -0,0 +1,39 @@
+"""order and order item indexes
+
+Revision ID: 07a0e93b4d37
+Revises: b7e3a1c95f20
+Create Date: 2026-10-19 22:16:47.715059
+
+Indices para os formatos reais de consulta do OrderRepository: o intervalo
+de created_at da listagem (sozinho ou com status), o filtro/estatisticas
+por cliente e os selectin de itens por pedido e por produto. No Postgres os
+indices criados na tabela particionada valem para todas as particoes.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '07a0e93b4d37'
+down_revision: Union[str, Sequence[str], None] = 'b7e3a1c95f20'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index(op.f('ix_orders_customer_id'), 'orders', ['customer_id'], unique=False)
+    op.create_index(op.f('ix_orders_created_at'), 'orders', ['created_at'], unique=False)
+    op.create_index('ix_orders_status_created_at', 'orders', ['status', 'created_at'], unique=False)
+    op.create_index(op.f('ix_order_items_order_id'), 'order_items', ['order_id'], unique=False)
+    op.create_index(op.f('ix_order_items_product_id'), 'order_items', ['product_id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_order_items_product_id'), table_name='order_items')
+    op.drop_index(op.f('ix_order_items_order_id'), table_name='order_items')
+    op.drop_index('ix_orders_status_created_at', table_name='orders')
+    op.drop_index(op.f('ix_orders_created_at'), table_name='orders')
+    op.drop_index(op.f('ix_orders_customer_id'), table_name='orders')
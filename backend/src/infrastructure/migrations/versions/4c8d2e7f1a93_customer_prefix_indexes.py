@@ -0,0 +1,41 @@
+"""customer prefix indexes
+
+Revision ID: 4c8d2e7f1a93
+Revises: 07a0e93b4d37
+Create Date: 2026-10-19 10:12:31.408215
+
+Indices de prefixo para o autocomplete de clientes: lower(name),
+lower(email) e document. No Postgres com text_pattern_ops, para o
+LIKE 'abc%' usar o indice mesmo com collation diferente de C.
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4c8d2e7f1a93'
+down_revision: Union[str, Sequence[str], None] = '07a0e93b4d37'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_customers_name_prefix', 'customers',
+                    [sa.text('lower(name)')], unique=False,
+                    postgresql_ops={'lower(name)': 'text_pattern_ops'})
+    op.create_index('ix_customers_email_prefix', 'customers',
+                    [sa.text('lower(email)')], unique=False,
+                    postgresql_ops={'lower(email)': 'text_pattern_ops'})
+    op.create_index('ix_customers_document_prefix', 'customers',
+                    ['document'], unique=False,
+                    postgresql_ops={'document': 'text_pattern_ops'})
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_customers_document_prefix', table_name='customers')
+    op.drop_index('ix_customers_email_prefix', table_name='customers')
+    op.drop_index('ix_customers_name_prefix', table_name='customers')
@@ -0,0 +1,42 @@
+"""order items product index
+
+Revision ID: 5e1f9b3c8d20
+Revises: 4c8d2e7f1a93
+Create Date: 2026-10-19 15:41:08.227614
+
+Filtro de pedidos por produto/SKU: o semi-join em order_items (e no
+arquivo) le so o indice (product_id, order_created_at, order_id), que
+tambem atende os itens de um produto e substitui o indice simples em
+product_id.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5e1f9b3c8d20'
+down_revision: Union[str, Sequence[str], None] = '4c8d2e7f1a93'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_order_items_product_order', 'order_items',
+                    ['product_id', 'order_created_at', 'order_id'],
+                    unique=False)
+    op.drop_index(op.f('ix_order_items_product_id'), table_name='order_items')
+    op.create_index('ix_order_items_archive_product_order',
+                    'order_items_archive',
+                    ['product_id', 'order_created_at', 'order_id'],
+                    unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_order_items_archive_product_order',
+                  table_name='order_items_archive')
+    op.create_index(op.f('ix_order_items_product_id'), 'order_items',
+                    ['product_id'], unique=False)
+    op.drop_index('ix_order_items_product_order', table_name='order_items')
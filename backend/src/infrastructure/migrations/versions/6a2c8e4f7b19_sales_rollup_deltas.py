@@ -0,0 +1,68 @@
+"""sales rollup deltas
+
+Revision ID: 6a2c8e4f7b19
+Revises: 5e1f9b3c8d20
+Create Date: 2026-10-19 17:02:36.514093
+
+Os pedidos deixam de fazer upsert em daily_product_sales/daily_customer_sales
+na propria transacao (a linha do dia/produto travava pedidos concorrentes do
+mesmo produto) e passam a acrescentar variacoes nestas tabelas, somadas nos
+rollups por "manage.py fold-reports".
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '6a2c8e4f7b19'
+down_revision: Union[str, Sequence[str], None] = '5e1f9b3c8d20'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+_Id = sa.BigInteger().with_variant(sa.Integer(), "sqlite")
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('daily_product_sales_deltas',
+    sa.Column('id', _Id, nullable=False),
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('product_id', sa.Integer(), nullable=False),
+    sa.Column('orders_count', sa.Integer(), nullable=False),
+    sa.Column('quantity', sa.Integer(), nullable=False),
+    sa.Column('revenue', sa.Numeric(precision=14, scale=2), nullable=False),
+    sa.Column('paid_revenue', sa.Numeric(precision=14, scale=2), nullable=False),
+    sa.PrimaryKeyConstraint('id', name=op.f('pk_daily_product_sales_deltas'))
+    )
+    op.create_table('daily_customer_sales_deltas',
+    sa.Column('id', _Id, nullable=False),
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('customer_id', sa.Integer(), nullable=False),
+    sa.Column('orders_count', sa.Integer(), nullable=False),
+    sa.Column('revenue', sa.Numeric(precision=14, scale=2), nullable=False),
+    sa.Column('paid_revenue', sa.Numeric(precision=14, scale=2), nullable=False),
+    sa.PrimaryKeyConstraint('id', name=op.f('pk_daily_customer_sales_deltas'))
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # variacoes pendentes voltam para os rollups antes de sumir
+    for table, key, measures in (
+            ('daily_product_sales', 'product_id',
+             ('orders_count', 'quantity', 'revenue', 'paid_revenue')),
+            ('daily_customer_sales', 'customer_id',
+             ('orders_count', 'revenue', 'paid_revenue'))):
+        columns = ', '.join(measures)
+        sums = ', '.join(f'sum({m})' for m in measures)
+        updates = ', '.join(f'{m} = {table}.{m} + excluded.{m}'
+                            for m in measures)
+        op.execute(
+            f'INSERT INTO {table} (day, {key}, {columns}) '
+            f'SELECT day, {key}, {sums} FROM {table}_deltas WHERE true '
+            f'GROUP BY day, {key} '
+            f'ON CONFLICT (day, {key}) DO UPDATE SET {updates}')
+    op.drop_table('daily_customer_sales_deltas')
+    op.drop_table('daily_product_sales_deltas')
@@ -0,0 +1,38 @@
+"""customer order stats
+
+Revision ID: 8b2e6f1c9a04
+Revises: 3f9c2a7d41b8
+Create Date: 2026-10-19 14:03:27.512930
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8b2e6f1c9a04'
+down_revision: Union[str, Sequence[str], None] = '3f9c2a7d41b8'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.batch_alter_table('customers') as batch_op:
+        batch_op.add_column(sa.Column('orders_count', sa.Integer(), server_default='0', nullable=False))
+        batch_op.add_column(sa.Column('lifetime_value', sa.Numeric(precision=14, scale=2), server_default='0', nullable=False))
+        batch_op.add_column(sa.Column('last_order_at', sa.DateTime(timezone=True), nullable=True))
+        batch_op.create_index(batch_op.f('ix_customers_lifetime_value'), ['lifetime_value'], unique=False)
+        batch_op.create_index(batch_op.f('ix_customers_last_order_at'), ['last_order_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('customers') as batch_op:
+        batch_op.drop_index(batch_op.f('ix_customers_last_order_at'))
+        batch_op.drop_index(batch_op.f('ix_customers_lifetime_value'))
+        batch_op.drop_column('last_order_at')
+        batch_op.drop_column('lifetime_value')
+        batch_op.drop_column('orders_count')
@@ -0,0 +1,191 @@
+"""partition orders and order_items by month
+
+Revision ID: 9d4b1f6a2c37
+Revises: 5e0a93c7d2f6
+Create Date: 2026-10-19 20:41:12.508331
+
+No Postgres orders e order_items viram tabelas particionadas por RANGE
+mensal (orders.created_at e a copia order_items.order_created_at), com uma
+particao DEFAULT de seguranca. As chaves passam a incluir a coluna de
+particionamento: PK (id, created_at) e FK (order_id, order_created_at).
+No SQLite so a coluna order_created_at e criada.
+"""
+from datetime import date
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9d4b1f6a2c37'
+down_revision: Union[str, Sequence[str], None] = '5e0a93c7d2f6'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+MONTHS_AHEAD = 3
+
+_LEGACY_CONSTRAINTS = {
+    "orders": ("pk_orders", "fk_orders_customer_id_customers"),
+    "order_items": ("pk_order_items", "fk_order_items_order_id_orders",
+                    "fk_order_items_product_id_products"),
+}
+
+
+def _add_months(day: date, months: int) -> date:
+    month = day.month - 1 + months
+    return date(day.year + month // 12, month % 12 + 1, 1)
+
+
+def _rename_legacy() -> None:
+    for table, constraints in _LEGACY_CONSTRAINTS.items():
+        op.execute(f"ALTER TABLE {table} RENAME TO {table}_legacy")
+        for name in constraints:
+            op.execute(f"ALTER TABLE {table}_legacy "
+                       f"RENAME CONSTRAINT {name} TO {name}_legacy")
+
+
+def _drop_legacy() -> None:
+    op.execute("ALTER SEQUENCE orders_id_seq OWNED BY orders.id")
+    op.execute("ALTER SEQUENCE order_items_id_seq OWNED BY order_items.id")
+    op.execute("DROP TABLE order_items_legacy")
+    op.execute("DROP TABLE orders_legacy")
+
+
+def _upgrade_postgresql() -> None:
+    _rename_legacy()
+
+    op.execute("""
+        CREATE TABLE orders (
+            id integer NOT NULL DEFAULT nextval('orders_id_seq'),
+            customer_id integer NOT NULL,
+            total_amount numeric(12, 2) NOT NULL,
+            status orderstatus NOT NULL,
+            created_at timestamp without time zone NOT NULL,
+            CONSTRAINT pk_orders PRIMARY KEY (id, created_at),
+            CONSTRAINT fk_orders_customer_id_customers
+                FOREIGN KEY (customer_id) REFERENCES customers (id)
+        ) PARTITION BY RANGE (created_at)
+    """)
+    op.execute("""
+        CREATE TABLE order_items (
+            id integer NOT NULL DEFAULT nextval('order_items_id_seq'),
+            order_id integer NOT NULL,
+            order_created_at timestamp without time zone NOT NULL,
+            product_id integer NOT NULL,
+            unit_price numeric(12, 2) NOT NULL,
+            quantity integer NOT NULL,
+            line_total numeric(12, 2) NOT NULL,
+            CONSTRAINT pk_order_items PRIMARY KEY (id, order_created_at),
+            CONSTRAINT fk_order_items_order_id_orders
+                FOREIGN KEY (order_id, order_created_at)
+                REFERENCES orders (id, created_at),
+            CONSTRAINT fk_order_items_product_id_products
+                FOREIGN KEY (product_id) REFERENCES products (id)
+        ) PARTITION BY RANGE (order_created_at)
+    """)
+
+    # um mes por particao, do pedido mais antigo ate MONTHS_AHEAD a frente
+    oldest = op.get_bind().scalar(
+        sa.text("SELECT min(created_at) FROM orders_legacy"))
+    today = date.today()
+    start = oldest or today
+    month = date(start.year, start.month, 1)
+    last = _add_months(date(today.year, today.month, 1), MONTHS_AHEAD)
+    while month <= last:
+        following = _add_months(month, 1)
+        for table in ("orders", "order_items"):
+            op.execute(f"CREATE TABLE {table}_{month:%Y_%m} "
+                       f"PARTITION OF {table} "
+                       f"FOR VALUES FROM ('{month}') TO ('{following}')")
+        month = following
+    op.execute("CREATE TABLE orders_default PARTITION OF orders DEFAULT")
+    op.execute("CREATE TABLE order_items_default "
+               "PARTITION OF order_items DEFAULT")
+
+    op.execute("""
+        INSERT INTO orders (id, customer_id, total_amount, status, created_at)
+        SELECT id, customer_id, total_amount, status, created_at
+        FROM orders_legacy
+    """)
+    op.execute("""
+        INSERT INTO order_items (id, order_id, order_created_at, product_id,
+                                 unit_price, quantity, line_total)
+        SELECT i.id, i.order_id, o.created_at, i.product_id, i.unit_price,
+               i.quantity, i.line_total
+        FROM order_items_legacy i
+        JOIN orders_legacy o ON o.id = i.order_id
+    """)
+    _drop_legacy()
+
+
+def _downgrade_postgresql() -> None:
+    _rename_legacy()
+
+    op.execute("""
+        CREATE TABLE orders (
+            id integer NOT NULL DEFAULT nextval('orders_id_seq'),
+            customer_id integer NOT NULL,
+            total_amount numeric(12, 2) NOT NULL,
+            status orderstatus NOT NULL,
+            created_at timestamp without time zone NOT NULL,
+            CONSTRAINT pk_orders PRIMARY KEY (id),
+            CONSTRAINT fk_orders_customer_id_customers
+                FOREIGN KEY (customer_id) REFERENCES customers (id)
+        )
+    """)
+    op.execute("""
+        CREATE TABLE order_items (
+            id integer NOT NULL DEFAULT nextval('order_items_id_seq'),
+            order_id integer NOT NULL,
+            product_id integer NOT NULL,
+            unit_price numeric(12, 2) NOT NULL,
+            quantity integer NOT NULL,
+            line_total numeric(12, 2) NOT NULL,
+            CONSTRAINT pk_order_items PRIMARY KEY (id),
+            CONSTRAINT fk_order_items_order_id_orders
+                FOREIGN KEY (order_id) REFERENCES orders (id),
+            CONSTRAINT fk_order_items_product_id_products
+                FOREIGN KEY (product_id) REFERENCES products (id)
+        )
+    """)
+    op.execute("""
+        INSERT INTO orders (id, customer_id, total_amount, status, created_at)
+        SELECT id, customer_id, total_amount, status, created_at
+        FROM orders_legacy
+    """)
+    op.execute("""
+        INSERT INTO order_items (id, order_id, product_id, unit_price,
+                                 quantity, line_total)
+        SELECT id, order_id, product_id, unit_price, quantity, line_total
+        FROM order_items_legacy
+    """)
+    # as particoes saem junto com as tabelas particionadas
+    _drop_legacy()
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    if op.get_bind().dialect.name == "postgresql":
+        _upgrade_postgresql()
+        return
+
+    with op.batch_alter_table('order_items', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('order_created_at', sa.DateTime(),
+                                      nullable=True))
+    op.execute("UPDATE order_items SET order_created_at = "
+               "(SELECT created_at FROM orders "
+               "WHERE orders.id = order_items.order_id)")
+    with op.batch_alter_table('order_items', schema=None) as batch_op:
+        batch_op.alter_column('order_created_at', existing_type=sa.DateTime(),
+                              nullable=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if op.get_bind().dialect.name == "postgresql":
+        _downgrade_postgresql()
+        return
+
+    with op.batch_alter_table('order_items', schema=None) as batch_op:
+        batch_op.drop_column('order_created_at')
@@ -0,0 +1,63 @@
+"""orders archive
+
+Revision ID: b7e3a1c95f20
+Revises: 9d4b1f6a2c37
+Create Date: 2026-10-19 21:37:05.114920
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b7e3a1c95f20'
+down_revision: Union[str, Sequence[str], None] = '9d4b1f6a2c37'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# o tipo orderstatus ja existe (criado com orders)
+orderstatus = sa.Enum('CREATED', 'PAID', 'CANCELLED',
+                      name='orderstatus').with_variant(
+    postgresql.ENUM('CREATED', 'PAID', 'CANCELLED', name='orderstatus',
+                    create_type=False), 'postgresql')
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('orders_archive',
+    sa.Column('id', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('customer_id', sa.Integer(), nullable=False),
+    sa.Column('total_amount', sa.Numeric(precision=12, scale=2), nullable=False),
+    sa.Column('status', orderstatus, nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('archived_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+    sa.ForeignKeyConstraint(['customer_id'], ['customers.id'], name=op.f('fk_orders_archive_customer_id_customers')),
+    sa.PrimaryKeyConstraint('id', name=op.f('pk_orders_archive'))
+    )
+    op.create_index(op.f('ix_orders_archive_customer_id'), 'orders_archive', ['customer_id'], unique=False)
+    op.create_index(op.f('ix_orders_archive_created_at'), 'orders_archive', ['created_at'], unique=False)
+    op.create_table('order_items_archive',
+    sa.Column('id', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('order_id', sa.Integer(), nullable=False),
+    sa.Column('order_created_at', sa.DateTime(), nullable=False),
+    sa.Column('product_id', sa.Integer(), nullable=False),
+    sa.Column('unit_price', sa.Numeric(precision=12, scale=2), nullable=False),
+    sa.Column('quantity', sa.Integer(), nullable=False),
+    sa.Column('line_total', sa.Numeric(precision=12, scale=2), nullable=False),
+    sa.ForeignKeyConstraint(['order_id'], ['orders_archive.id'], name=op.f('fk_order_items_archive_order_id_orders_archive')),
+    sa.ForeignKeyConstraint(['product_id'], ['products.id'], name=op.f('fk_order_items_archive_product_id_products')),
+    sa.PrimaryKeyConstraint('id', name=op.f('pk_order_items_archive'))
+    )
+    op.create_index(op.f('ix_order_items_archive_order_id'), 'order_items_archive', ['order_id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_order_items_archive_order_id'), table_name='order_items_archive')
+    op.drop_table('order_items_archive')
+    op.drop_index(op.f('ix_orders_archive_created_at'), table_name='orders_archive')
+    op.drop_index(op.f('ix_orders_archive_customer_id'), table_name='orders_archive')
+    op.drop_table('orders_archive')
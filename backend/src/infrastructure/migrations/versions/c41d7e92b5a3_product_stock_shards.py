@@ -0,0 +1,42 @@
+"""product stock shards
+
+Revision ID: c41d7e92b5a3
+Revises: 8b2e6f1c9a04
+Create Date: 2026-10-19 16:41:09.274315
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c41d7e92b5a3'
+down_revision: Union[str, Sequence[str], None] = '8b2e6f1c9a04'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.batch_alter_table('products') as batch_op:
+        batch_op.add_column(sa.Column('stock_shards', sa.Integer(), server_default='0', nullable=False))
+    op.create_table('product_stock_shards',
+    sa.Column('product_id', sa.Integer(), nullable=False),
+    sa.Column('shard', sa.Integer(), nullable=False),
+    sa.Column('stock_qty', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['product_id'], ['products.id'], name=op.f('fk_product_stock_shards_product_id_products'), ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('product_id', 'shard', name=op.f('pk_product_stock_shards'))
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # devolve o saldo dos shards para products antes de remover a tabela
+    op.execute("UPDATE products SET stock_qty = (SELECT COALESCE(SUM(s.stock_qty), 0) "
+               "FROM product_stock_shards s WHERE s.product_id = products.id) "
+               "WHERE stock_shards > 0")
+    op.drop_table('product_stock_shards')
+    with op.batch_alter_table('products') as batch_op:
+        batch_op.drop_column('stock_shards')
@@ -72,3 +72,5 @@ def downgrade() -> None:
     op.drop_table('products')
     op.drop_table('customers')
     # ### end Alembic commands ###
+    # no Postgres o enum e um tipo proprio e nao sai com a tabela
+    sa.Enum(name='orderstatus').drop(op.get_bind(), checkfirst=True)
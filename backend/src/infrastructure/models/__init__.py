@@ -2,7 +2,19 @@ from backend.src.infrastructure.models.base import (Base)
 from backend.src.infrastructure.models.customer import CustomerModel
 from backend.src.infrastructure.models.order_items import OrderItemModel
 from backend.src.infrastructure.models.orders import OrderModel
-from backend.src.infrastructure.models.product import ProductModel
+from backend.src.infrastructure.models.orders_archive import \
+    OrderArchiveModel, OrderItemArchiveModel
+from backend.src.infrastructure.models.outbox import OutboxEventModel, \
+    OutboxRelayModel
+from backend.src.infrastructure.models.product import ProductModel, \
+    ProductStockShardModel
+from backend.src.infrastructure.models.sales_rollups import \
+    DailyProductSalesModel, DailyCustomerSalesModel, \
+    DailyProductSalesDeltaModel, DailyCustomerSalesDeltaModel
 
-__all__ = ["Base", "ProductModel", "CustomerModel", "OrderModel",
-           "OrderItemModel"]
+__all__ = ["Base", "ProductModel", "ProductStockShardModel", "CustomerModel",
+           "OrderModel", "OrderItemModel", "OrderArchiveModel",
+           "OrderItemArchiveModel", "DailyProductSalesModel",
+           "DailyCustomerSalesModel", "DailyProductSalesDeltaModel",
+           "DailyCustomerSalesDeltaModel", "OutboxEventModel",
+           "OutboxRelayModel"]
@@ -1,5 +1,8 @@
 from datetime import datetime
-from sqlalchemy import Integer, String, DateTime, func
+from decimal import Decimal
+from typing import Optional
+
+from sqlalchemy import Integer, String, DateTime, Numeric, Index, func
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from backend.src.infrastructure.models.base import Base
@@ -16,4 +19,26 @@ class CustomerModel(Base):
         DateTime(timezone=True), server_default=func.now(), nullable=False
     )
 
+    # Estatisticas de pedidos mantidas pelo OrderService (pedidos cancelados
+    # nao entram), para ordenar/filtrar clientes sem agregar orders.
+    orders_count: Mapped[int] = mapped_column(
+        Integer, nullable=False, default=0, server_default="0")
+    lifetime_value: Mapped[Decimal] = mapped_column(
+        Numeric(14, 2), nullable=False, default=0, server_default="0",
+        index=True)
+    last_order_at: Mapped[Optional[datetime]] = mapped_column(
+        DateTime(timezone=True), nullable=True, index=True)
+
     orders = relationship("OrderModel", back_populates="customer")
+
+
+# Prefixos do autocomplete (GET /api/customers/suggest). No Postgres o
+# text_pattern_ops deixa o LIKE 'abc%' usar o indice com qualquer collation.
+Index("ix_customers_name_prefix",
+      func.lower(CustomerModel.name).label("name_lower"),
+      postgresql_ops={"name_lower": "text_pattern_ops"})
+Index("ix_customers_email_prefix",
+      func.lower(CustomerModel.email).label("email_lower"),
+      postgresql_ops={"email_lower": "text_pattern_ops"})
+Index("ix_customers_document_prefix", CustomerModel.document,
+      postgresql_ops={"document": "text_pattern_ops"})
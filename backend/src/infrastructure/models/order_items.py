@@ -1,5 +1,6 @@
+from datetime import datetime
 from decimal import Decimal
-from sqlalchemy import Integer, ForeignKey, event
+from sqlalchemy import Integer, ForeignKey, DateTime, Index, event, select
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from sqlalchemy.sql.sqltypes import Numeric
 
@@ -8,9 +9,17 @@ from backend.src.infrastructure.models.base import Base
 
 class OrderItemModel(Base):
     __tablename__ = "order_items"
+    # filtro de pedidos por produto/SKU (semi-join so no indice) e os
+    # itens de um produto
+    __table_args__ = (Index("ix_order_items_product_order",
+                            "product_id", "order_created_at", "order_id"),)
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
-    order_id: Mapped[int] = mapped_column(ForeignKey("orders.id"), nullable=False)
+    order_id: Mapped[int] = mapped_column(ForeignKey("orders.id"), nullable=False, index=True)
+    # Copia de orders.created_at: e a chave de particionamento de order_items
+    # no Postgres, onde a FK real e (order_id, order_created_at).
+    order_created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), nullable=False)
     product_id: Mapped[int] = mapped_column(ForeignKey("products.id"), nullable=False)
     unit_price: Mapped[Decimal] = mapped_column(Numeric(12, 2), nullable=False)
     quantity: Mapped[int] = mapped_column(Integer, nullable=False)
@@ -19,21 +28,44 @@ class OrderItemModel(Base):
     order = relationship("OrderModel", back_populates="items")
     product = relationship("ProductModel", back_populates="items")
 
-    def _recalc_line(self) -> None:
-        q = Decimal(self.quantity or 0)
-        p = self.unit_price if isinstance(self.unit_price, Decimal) else Decimal(self.unit_price or 0)
-        self.line_total = (q * p).quantize(Decimal("0.01"))
+    def _set_line(self, quantity, unit_price) -> None:
+        """
+        Atualiza o line_total e repassa so a diferenca para o total do
+        pedido, sem re-somar todos os itens.
+        """
+        old = self.line_total or Decimal("0.00")
+        self.line_total = line_total(quantity, unit_price)
         if self.order is not None:
-            self.order.recalc_total()
+            self.order.apply_delta(self.line_total - old)
 
 
+def line_total(quantity, unit_price) -> Decimal:
+    q = Decimal(quantity or 0)
+    p = (unit_price if isinstance(unit_price, Decimal)
+         else Decimal(str(unit_price or 0)))
+    return (q * p).quantize(Decimal("0.01"))
+
+
+@event.listens_for(OrderItemModel, "before_insert")
+def _fill_order_created_at(mapper, connection, target: OrderItemModel):
+    if target.order_created_at is None:
+        from backend.src.infrastructure.models.orders import OrderModel
+
+        # o pedido ja foi gravado no mesmo flush (ou antes)
+        target.order_created_at = connection.scalar(
+            select(OrderModel.created_at)
+            .where(OrderModel.id == target.order_id))
+
+
+# No evento "set" o atributo ainda tem o valor antigo, por isso o valor novo
+# vem do parametro do evento.
 @event.listens_for(OrderItemModel.quantity, "set", retval=False)
 def _on_quantity_set(target: OrderItemModel, value, oldvalue, initiator):
     if value != oldvalue:
-        target._recalc_line()
+        target._set_line(value, target.unit_price)
 
 
 @event.listens_for(OrderItemModel.unit_price, "set", retval=False)
 def _on_unit_price_set(target: OrderItemModel, value, oldvalue, initiator):
     if value != oldvalue:
-        target._recalc_line()
+        target._set_line(target.quantity, value)
@@ -2,11 +2,12 @@ import enum
 from datetime import datetime
 from decimal import Decimal
 
-from sqlalchemy import Integer, DateTime, ForeignKey, event, func
+from sqlalchemy import Integer, DateTime, ForeignKey, Index, event, func
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from sqlalchemy.sql.sqltypes import Numeric, Enum
 
 from backend.src.infrastructure.models.base import Base
+from backend.src.infrastructure.models.order_items import line_total
 
 
 class OrderStatus(enum.Enum):
@@ -17,9 +18,13 @@ class OrderStatus(enum.Enum):
 
 class OrderModel(Base):
     __tablename__ = "orders"
+    __table_args__ = (
+        # filtro de status sempre vem com o intervalo de created_at
+        Index("ix_orders_status_created_at", "status", "created_at"),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
-    customer_id: Mapped[int] = mapped_column(ForeignKey("customers.id"), nullable=False)
+    customer_id: Mapped[int] = mapped_column(ForeignKey("customers.id"), nullable=False, index=True)
 
     total_amount: Mapped[Decimal] = mapped_column(
         Numeric(12, 2),
@@ -38,6 +43,7 @@ class OrderModel(Base):
         DateTime(timezone=True),
         server_default=func.now(),
         nullable=False,
+        index=True,
     )
 
     customer = relationship("CustomerModel", back_populates="orders")
@@ -49,16 +55,25 @@ class OrderModel(Base):
         lazy="selectin",
     )
 
+    def apply_delta(self, delta: Decimal) -> None:
+        """Soma ao total a variacao de um item (inclusao/edicao/remocao)."""
+        # a coluna Numeric aceita float (ex: total_amount=199.98); str evita
+        # levar o erro binario do float para o Decimal
+        self.total_amount = (Decimal(str(self.total_amount or "0.00")) +
+                             Decimal(str(delta)))
+
     def recalc_total(self):
+        """Reconciliacao final: re-soma todos os itens uma unica vez."""
         self.total_amount = sum((item.line_total or Decimal("0.00")) for item in self.items)
 
 
 @event.listens_for(OrderModel.items, "append")
 def _on_item_append(order: OrderModel, item, initiator):
-    item._recalc_line()
-    order.recalc_total()
+    item.order_created_at = order.created_at
+    item.line_total = line_total(item.quantity, item.unit_price)
+    order.apply_delta(item.line_total)
 
 
 @event.listens_for(OrderModel.items, "remove")
 def _on_item_remove(order: OrderModel, item, initiator):
-    order.recalc_total()
+    order.apply_delta(-(item.line_total or Decimal("0.00")))
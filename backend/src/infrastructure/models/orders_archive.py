@@ -0,0 +1,81 @@
+from datetime import datetime
+from decimal import Decimal
+
+from sqlalchemy import Integer, DateTime, ForeignKey, Numeric, Enum, func, \
+    Index, select, union_all
+from sqlalchemy.orm import Mapped, mapped_column, relationship
+
+from backend.src.infrastructure.models.base import Base
+from backend.src.infrastructure.models.order_items import OrderItemModel
+from backend.src.infrastructure.models.orders import OrderModel, OrderStatus
+
+
+class OrderArchiveModel(Base):
+    """
+    Pedido PAID/CANCELLED antigo movido de orders pelo job de arquivamento.
+
+    Tem as mesmas colunas (e o mesmo id) do pedido original, entao serve
+    direto para o OrderGet. Pedidos arquivados nao sao mais editados.
+    """
+    __tablename__ = "orders_archive"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True,
+                                    autoincrement=False)
+    customer_id: Mapped[int] = mapped_column(ForeignKey("customers.id"),
+                                             nullable=False, index=True)
+    total_amount: Mapped[Decimal] = mapped_column(Numeric(12, 2),
+                                                  nullable=False)
+    status: Mapped[OrderStatus] = mapped_column(
+        Enum(OrderStatus, name="orderstatus"), nullable=False)
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True),
+                                                 nullable=False, index=True)
+    archived_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now(), nullable=False)
+
+    customer = relationship("CustomerModel")
+    items = relationship("OrderItemArchiveModel", back_populates="order",
+                         lazy="selectin")
+
+
+class OrderItemArchiveModel(Base):
+    __tablename__ = "order_items_archive"
+    __table_args__ = (Index("ix_order_items_archive_product_order",
+                            "product_id", "order_created_at", "order_id"),)
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True,
+                                    autoincrement=False)
+    order_id: Mapped[int] = mapped_column(ForeignKey("orders_archive.id"),
+                                          nullable=False, index=True)
+    order_created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), nullable=False)
+    product_id: Mapped[int] = mapped_column(ForeignKey("products.id"),
+                                            nullable=False)
+    unit_price: Mapped[Decimal] = mapped_column(Numeric(12, 2),
+                                                nullable=False)
+    quantity: Mapped[int] = mapped_column(Integer, nullable=False)
+    line_total: Mapped[Decimal] = mapped_column(Numeric(12, 2),
+                                                nullable=False)
+
+    order = relationship("OrderArchiveModel", back_populates="items")
+    product = relationship("ProductModel")
+
+
+ORDER_COLUMNS = ("id", "customer_id", "total_amount", "status", "created_at")
+ITEM_COLUMNS = ("id", "order_id", "order_created_at", "product_id",
+                "unit_price", "quantity", "line_total")
+
+
+def all_orders():
+    """orders UNION ALL orders_archive, para agregacoes sobre o historico."""
+    return union_all(
+        select(*(getattr(OrderModel, c) for c in ORDER_COLUMNS)),
+        select(*(getattr(OrderArchiveModel, c) for c in ORDER_COLUMNS)),
+    ).subquery("all_orders")
+
+
+def all_order_items():
+    """order_items UNION ALL order_items_archive."""
+    return union_all(
+        select(*(getattr(OrderItemModel, c) for c in ITEM_COLUMNS)),
+        select(*(getattr(OrderItemArchiveModel, c) for c in ITEM_COLUMNS)),
+    ).subquery("all_order_items")
@@ -0,0 +1,49 @@
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import BigInteger, Integer, String, DateTime, JSON, Index, \
+    func
+from sqlalchemy.orm import Mapped, mapped_column
+
+from backend.src.infrastructure.models.base import Base
+
+# BIGINT no Postgres; no SQLite so INTEGER PRIMARY KEY e autoincremento
+_Id = BigInteger().with_variant(Integer, "sqlite")
+
+
+class OutboxEventModel(Base):
+    """
+    Evento de mudanca gravado na mesma transacao que a alteracao.
+
+    O id segue a ordem de insercao, nao a de commit; o cursor publico e
+    position, atribuido pelo relay em sequencia quando o evento e publicado.
+    """
+    __tablename__ = "outbox_events"
+
+    id: Mapped[int] = mapped_column(_Id, primary_key=True)
+    entity: Mapped[str] = mapped_column(String(32), nullable=False)
+    entity_id: Mapped[int] = mapped_column(Integer, nullable=False)
+    event: Mapped[str] = mapped_column(String(32), nullable=False)
+    payload: Mapped[dict] = mapped_column(JSON, nullable=False, default=dict)
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now(), nullable=False)
+    position: Mapped[Optional[int]] = mapped_column(BigInteger, nullable=True,
+                                                    unique=True)
+    published_at: Mapped[Optional[datetime]] = mapped_column(
+        DateTime(timezone=True), nullable=True)
+
+    __table_args__ = (
+        # fila do relay: so os ainda nao publicados
+        Index("ix_outbox_events_unpublished", "id",
+              postgresql_where=position.is_(None),
+              sqlite_where=position.is_(None)),
+    )
+
+
+class OutboxRelayModel(Base):
+    """Ultima position atribuida; a linha serializa os relays."""
+    __tablename__ = "outbox_relay"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    position: Mapped[int] = mapped_column(BigInteger, nullable=False,
+                                          default=0)
@@ -1,12 +1,29 @@
 from datetime import datetime
 from decimal import Decimal
 
-from sqlalchemy import Integer, String, Numeric, Boolean, DateTime, func
-from sqlalchemy.orm import Mapped, mapped_column, relationship
+from sqlalchemy import Integer, String, Numeric, Boolean, DateTime, \
+    ForeignKey, case, func, select
+from sqlalchemy.orm import Mapped, mapped_column, relationship, \
+    column_property
 
 from backend.src.infrastructure.models.base import Base
 
 
+class ProductStockShardModel(Base):
+    """
+    Sub-contador de estoque de um produto com estoque fragmentado.
+
+    Cada baixa cai em um shard sorteado, entao pedidos simultaneos do mesmo
+    produto disputam linhas diferentes em vez do lock de products.
+    """
+    __tablename__ = "product_stock_shards"
+
+    product_id: Mapped[int] = mapped_column(
+        ForeignKey("products.id", ondelete="CASCADE"), primary_key=True)
+    shard: Mapped[int] = mapped_column(Integer, primary_key=True)
+    stock_qty: Mapped[int] = mapped_column(Integer, nullable=False)
+
+
 class ProductModel(Base):
     __tablename__ = "products"
 
@@ -14,12 +31,25 @@ class ProductModel(Base):
     name: Mapped[str] = mapped_column(String(120), nullable=False)
     sku: Mapped[str] = mapped_column(String(32), unique=True, index=True, nullable=False)
     price: Mapped[Decimal] = mapped_column(Numeric(12, 2), nullable=False)
+    # Com stock_shards > 0 guarda o total da ultima consolidacao; o saldo
+    # real e available_stock (soma dos shards).
     stock_qty: Mapped[int] = mapped_column(Integer, nullable=False)
+    stock_shards: Mapped[int] = mapped_column(
+        Integer, nullable=False, default=0, server_default="0")
     is_active: Mapped[bool] = mapped_column(Boolean, nullable=False, server_default="true")
     created_at: Mapped[datetime] = mapped_column(
         DateTime(timezone=True), server_default=func.now(), nullable=False
     )
 
+    available_stock: Mapped[int] = column_property(
+        case((stock_shards > 0,
+              select(func.coalesce(func.sum(ProductStockShardModel.stock_qty),
+                                   0))
+              .where(ProductStockShardModel.product_id == id)
+              .correlate_except(ProductStockShardModel)
+              .scalar_subquery()),
+             else_=stock_qty))
+
     items = relationship(
         "OrderItemModel",
         back_populates="product",
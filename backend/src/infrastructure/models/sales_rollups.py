@@ -0,0 +1,64 @@
+from datetime import date
+from decimal import Decimal
+
+from sqlalchemy import BigInteger, Integer, Date, ForeignKey
+from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy.sql.sqltypes import Numeric
+
+from backend.src.infrastructure.models.base import Base
+
+# BIGINT no Postgres; no SQLite so INTEGER PRIMARY KEY e autoincremento
+_Id = BigInteger().with_variant(Integer, "sqlite")
+
+
+class DailyProductSalesModel(Base):
+    """Vendas por produto por dia (pedidos nao cancelados)."""
+    __tablename__ = "daily_product_sales"
+
+    day: Mapped[date] = mapped_column(Date, primary_key=True)
+    product_id: Mapped[int] = mapped_column(ForeignKey("products.id"), primary_key=True)
+    orders_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    quantity: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    revenue: Mapped[Decimal] = mapped_column(Numeric(14, 2), nullable=False, default=0)
+    paid_revenue: Mapped[Decimal] = mapped_column(Numeric(14, 2), nullable=False, default=0)
+
+
+class DailyCustomerSalesModel(Base):
+    """Vendas por cliente por dia (pedidos nao cancelados)."""
+    __tablename__ = "daily_customer_sales"
+
+    day: Mapped[date] = mapped_column(Date, primary_key=True)
+    customer_id: Mapped[int] = mapped_column(ForeignKey("customers.id"), primary_key=True)
+    orders_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    revenue: Mapped[Decimal] = mapped_column(Numeric(14, 2), nullable=False, default=0)
+    paid_revenue: Mapped[Decimal] = mapped_column(Numeric(14, 2), nullable=False, default=0)
+
+
+class DailyProductSalesDeltaModel(Base):
+    """
+    Variacoes de daily_product_sales ainda nao consolidadas.
+
+    So recebe INSERTs (sem chave por dia/produto), entao pedidos concorrentes
+    do mesmo produto nao disputam a linha do rollup; o fold soma e apaga.
+    """
+    __tablename__ = "daily_product_sales_deltas"
+
+    id: Mapped[int] = mapped_column(_Id, primary_key=True)
+    day: Mapped[date] = mapped_column(Date, nullable=False)
+    product_id: Mapped[int] = mapped_column(Integer, nullable=False)
+    orders_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    quantity: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    revenue: Mapped[Decimal] = mapped_column(Numeric(14, 2), nullable=False, default=0)
+    paid_revenue: Mapped[Decimal] = mapped_column(Numeric(14, 2), nullable=False, default=0)
+
+
+class DailyCustomerSalesDeltaModel(Base):
+    """Variacoes de daily_customer_sales ainda nao consolidadas."""
+    __tablename__ = "daily_customer_sales_deltas"
+
+    id: Mapped[int] = mapped_column(_Id, primary_key=True)
+    day: Mapped[date] = mapped_column(Date, nullable=False)
+    customer_id: Mapped[int] = mapped_column(Integer, nullable=False)
+    orders_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    revenue: Mapped[Decimal] = mapped_column(Numeric(14, 2), nullable=False, default=0)
+    paid_revenue: Mapped[Decimal] = mapped_column(Numeric(14, 2), nullable=False, default=0)
@@ -0,0 +1,126 @@
+import json
+import logging
+import threading
+from pathlib import Path
+from typing import List, Optional
+
+import httpx
+
+from backend.src.infrastructure.models.outbox import OutboxEventModel
+from backend.src.infrastructure.repositories.outbox_repository import \
+    OutboxRepository
+from backend.src.settings import settings
+
+logger = logging.getLogger(__name__)
+
+
+def serialize(event: OutboxEventModel) -> dict:
+    return {"position": event.position, "entity": event.entity,
+            "entity_id": event.entity_id, "event": event.event,
+            "payload": event.payload,
+            "created_at": event.created_at.isoformat()
+            if event.created_at else None}
+
+
+class MemorySink:
+    """Guarda os lotes em memoria (testes)."""
+
+    def __init__(self):
+        self.events: List[dict] = []
+
+    def publish(self, batch: List[dict]) -> None:
+        self.events.extend(batch)
+
+
+class FileSink:
+    """Acrescenta os eventos em um arquivo JSON lines."""
+
+    def __init__(self, path: str):
+        self.path = Path(path)
+
+    def publish(self, batch: List[dict]) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self.path.open("a", encoding="utf-8") as f:
+            for event in batch:
+                f.write(json.dumps(event) + "\n")
+
+
+class HttpSink:
+    """Envia o lote como POST {"events": [...]} para uma URL."""
+
+    def __init__(self, url: str, timeout: float = 5.0):
+        self.url = url
+        self.timeout = timeout
+
+    def publish(self, batch: List[dict]) -> None:
+        response = httpx.post(self.url, json={"events": batch},
+                              timeout=self.timeout)
+        response.raise_for_status()
+
+
+def build_sinks(spec: str) -> list:
+    """
+    Monta os sinks a partir de OUTBOX_SINKS, separados por virgula:
+    file:/caminho/eventos.jsonl, http(s)://host/rota ou memory.
+    """
+    sinks = []
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        if item.startswith("file:"):
+            sinks.append(FileSink(item[len("file:"):]))
+        elif item.startswith(("http://", "https://")):
+            sinks.append(HttpSink(item))
+        elif item == "memory":
+            sinks.append(MemorySink())
+        else:
+            raise ValueError(f"Unknown outbox sink: {item}")
+    return sinks
+
+
+def relay_once(session, sinks: list,
+               batch_size: Optional[int] = None) -> int:
+    """
+    Publica o proximo lote de eventos nos sinks e atribui as positions do
+    feed. Se algum sink falhar a transacao volta e o lote e reenviado na
+    proxima rodada (entrega at-least-once). Retorna o tamanho do lote.
+    """
+    with session.begin():
+        repo = OutboxRepository(session)
+        position, events = repo.claim(batch_size or
+                                      settings.outbox_batch_size)
+        if not events:
+            return 0
+
+        repo.mark_published(events, position)
+        batch = [serialize(event) for event in events]
+        for sink in sinks:
+            sink.publish(batch)
+    return len(events)
+
+
+class OutboxRelay(threading.Thread):
+    """Roda relay_once em intervalos fixos ate stop()."""
+
+    def __init__(self, session_factory, sinks: list, interval: float):
+        super().__init__(daemon=True, name="outbox-relay")
+        self.session_factory = session_factory
+        self.sinks = sinks
+        self.interval = interval
+        self._done = threading.Event()
+
+    def run(self):
+        while not self._done.is_set():
+            published = 0
+            session = self.session_factory()
+            try:
+                published = relay_once(session, self.sinks)
+            except Exception:
+                logger.exception("Outbox relay failed")
+            finally:
+                session.close()
+            # lote cheio: provavelmente ha mais eventos, segue sem esperar
+            if published < settings.outbox_batch_size:
+                self._done.wait(self.interval)
+
+    def stop(self):
+        self._done.set()
+        self.join()
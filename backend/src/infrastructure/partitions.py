@@ -0,0 +1,56 @@
+from datetime import date
+from typing import List, Optional
+
+from sqlalchemy import text
+
+from backend.src.settings import settings
+
+# tabela particionada -> coluna de particionamento (RANGE mensal)
+PARTITIONED = {"orders": "created_at", "order_items": "order_created_at"}
+
+
+def _add_months(day: date, months: int) -> date:
+    month = day.month - 1 + months
+    return date(day.year + month // 12, month % 12 + 1, 1)
+
+
+def monthly_ranges(start: date, months: int) -> List[tuple[str, date, date]]:
+    """(sufixo, inicio, fim) de cada mes a partir do mes de start."""
+    first = date(start.year, start.month, 1)
+    ranges = []
+    for offset in range(months):
+        low = _add_months(first, offset)
+        ranges.append((f"{low:%Y_%m}", low, _add_months(low, 1)))
+    return ranges
+
+
+def ensure_partitions(connection, months_ahead: Optional[int] = None,
+                      start: Optional[date] = None) -> List[str]:
+    """
+    Cria as particoes mensais de orders e order_items que faltam, do mes de
+    start (padrao: mes atual) ate months_ahead meses a frente, e retorna os
+    nomes criados.
+
+    So existe particionamento no Postgres; no SQLite as tabelas sao unicas e
+    nada e feito. Linhas fora das particoes caem na particao DEFAULT, entao
+    rode com antecedencia: criar uma particao cujo intervalo ja tem linhas
+    na DEFAULT falha.
+    """
+    if connection.dialect.name != "postgresql":
+        return []
+
+    if months_ahead is None:
+        months_ahead = settings.orders_partition_months_ahead
+    created = []
+    for suffix, low, high in monthly_ranges(start or date.today(),
+                                            months_ahead + 1):
+        for table in PARTITIONED:
+            name = f"{table}_{suffix}"
+            if connection.scalar(text("SELECT to_regclass(:name)"),
+                                 {"name": name}) is not None:
+                continue
+            connection.execute(text(
+                f"CREATE TABLE {name} PARTITION OF {table} "
+                f"FOR VALUES FROM ('{low}') TO ('{high}')"))
+            created.append(name)
+    return created
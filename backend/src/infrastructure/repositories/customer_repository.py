@@ -1,10 +1,17 @@
-from sqlalchemy import select, func, and_, or_
+import re
+from typing import List, Optional
+
+from sqlalchemy import select, func, and_, or_, update, lambda_stmt
 from sqlalchemy.orm import Session
+from sqlalchemy.sql import operators
+from sqlalchemy.sql.expression import UnaryExpression
 
 from backend.src.application.dtos.customer import CustomerQuery
 from backend.src.application.dtos.page import Page
 from backend.src.exceptions import NotFoundException
 from backend.src.infrastructure.models.customer import CustomerModel
+from backend.src.infrastructure.models.orders import OrderStatus
+from backend.src.infrastructure.models.orders_archive import all_orders
 from backend.src.infrastructure.repositories.base_repository import \
     BaseRepository
 
@@ -14,7 +21,8 @@ class CustomerRepository(BaseRepository[CustomerModel]):
         super().__init__(session, CustomerModel)
 
     def get(self, customer_id: int) -> CustomerModel:
-        stmt = select(CustomerModel).where(CustomerModel.id == customer_id)
+        stmt = lambda_stmt(lambda: select(CustomerModel)
+                           .where(CustomerModel.id == customer_id))
         customer = self.session.execute(stmt).scalars().one_or_none()
 
         if not customer:
@@ -39,6 +47,13 @@ class CustomerRepository(BaseRepository[CustomerModel]):
             expressions.append(CustomerModel.document.ilike(f"%{q.document}%"))
         if q.created_min:
             expressions.append(CustomerModel.created_at >= q.created_min)
+        if q.orders_min is not None:
+            expressions.append(CustomerModel.orders_count >= q.orders_min)
+        if q.lifetime_value_min is not None:
+            expressions.append(
+                CustomerModel.lifetime_value >= q.lifetime_value_min)
+        if q.last_order_min:
+            expressions.append(CustomerModel.last_order_at >= q.last_order_min)
 
         if len(expressions) > 0:
             if logic == "and":
@@ -58,6 +73,34 @@ class CustomerRepository(BaseRepository[CustomerModel]):
 
         return Page(items=customers, total=total)
 
+    def suggest(self, prefix: str, field: str,
+                limit: int) -> List[CustomerModel]:
+        """
+        Ate `limit` clientes cujo `field` (name, email ou document) comeca
+        com `prefix` (ja em minusculas), em ordem alfabetica e sem COUNT.
+        Filtra e ordena pela mesma expressao dos indices *_prefix.
+        """
+        column = getattr(CustomerModel, field)
+        if field != "document":
+            column = func.lower(column)
+
+        if self.session.get_bind().dialect.name == "postgresql":
+            # LIKE com prefixo literal vira faixa no indice text_pattern_ops;
+            # ordenar com o operador da mesma classe deixa o LIMIT parar cedo
+            escaped = re.sub(r"([/%_])", r"/\1", prefix)
+            condition = column.like(f"{escaped}%", escape="/")
+            order = UnaryExpression(column,
+                                    modifier=operators.custom_op("USING ~<~"))
+        else:
+            # o SQLite so usa indice no LIKE com NOCASE; a faixa usa sempre
+            condition = and_(column >= prefix,
+                             column < prefix + "\U0010ffff")
+            order = column
+
+        stmt = (select(CustomerModel).where(condition)
+                .order_by(order, CustomerModel.id).limit(limit))
+        return list(self.session.scalars(stmt).all())
+
     def add(self, customer: CustomerModel) -> CustomerModel:
         self.session.add(customer)
 
@@ -70,3 +113,30 @@ class CustomerRepository(BaseRepository[CustomerModel]):
         existing.document = customer.document
 
         return existing
+
+    def refresh_stats(self, customer_ids: Optional[List[int]] = None) -> None:
+        """
+        Recalcula orders_count, lifetime_value e last_order_at com um unico
+        UPDATE correlacionado. Sem customer_ids recalcula todos (backfill).
+        """
+        if customer_ids is not None and not customer_ids:
+            return
+
+        # pedidos arquivados continuam contando no historico do cliente
+        o = all_orders()
+        orders = and_(o.c.customer_id == CustomerModel.id,
+                      o.c.status != OrderStatus.CANCELLED)
+        stmt = update(CustomerModel).values(
+            orders_count=select(func.count(o.c.id))
+            .where(orders).scalar_subquery(),
+            lifetime_value=select(
+                func.coalesce(func.sum(o.c.total_amount), 0))
+            .where(orders).scalar_subquery(),
+            last_order_at=select(func.max(o.c.created_at))
+            .where(orders).scalar_subquery(),
+        )
+        if customer_ids is not None:
+            stmt = stmt.where(CustomerModel.id.in_(set(customer_ids)))
+
+        self.session.execute(stmt, execution_options={
+            "synchronize_session": "fetch"})
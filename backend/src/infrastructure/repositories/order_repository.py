@@ -1,56 +1,185 @@
-from sqlalchemy import select, func, or_
-from sqlalchemy.orm import Session, selectinload
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from decimal import Decimal
+from functools import lru_cache
+from typing import FrozenSet, List, Optional
 
-from backend.src.application.dtos.order import OrderQuery
+from sqlalchemy import select, func, or_, insert, update, delete, \
+    literal, union_all, lambda_stmt, Select
+from sqlalchemy.orm import Session, selectinload, noload
+
+from backend.src.application.dtos.order import OrderQuery, FULL_INCLUDE
 from backend.src.application.dtos.page import Page
-from backend.src.exceptions import NotFoundException
-from backend.src.infrastructure.models import OrderItemModel, CustomerModel
-from backend.src.infrastructure.models.orders import OrderModel
+from backend.src.exceptions import NotFoundException, \
+    InvalidSortFieldException
+from backend.src.infrastructure.models import OrderItemModel, CustomerModel, \
+    ProductModel
+from backend.src.infrastructure.models.orders import OrderModel, \
+    OrderStatus
+from backend.src.infrastructure.models.orders_archive import \
+    OrderArchiveModel, OrderItemArchiveModel, ORDER_COLUMNS, ITEM_COLUMNS
 from backend.src.infrastructure.repositories.base_repository import \
     BaseRepository
+from backend.src.settings import settings
+
+
+@dataclass
+class OrderItemsDiff:
+    """Diferenca entre os itens gravados e os itens enviados na edicao."""
+    inserts: list[dict] = field(default_factory=list)
+    updates: list[dict] = field(default_factory=list)
+    deletes: list[int] = field(default_factory=list)
+    stock_deltas: dict[int, int] = field(default_factory=dict)
+    total: Decimal = Decimal("0.00")
 
 
 class OrderRepository(BaseRepository[OrderModel]):
     def __init__(self, session: Session):
         super().__init__(session, OrderModel)
 
-    def get(self, order_id: int) -> OrderModel:
-        stmt = (select(OrderModel)
-                .options(
-            selectinload(OrderModel.items),
-            selectinload(OrderModel.customer)
-        )
-                .where(OrderModel.id == order_id))
+    @staticmethod
+    @lru_cache(maxsize=None)
+    def _load_options(include: FrozenSet[str], model=OrderModel) -> tuple:
+        """
+        Loaders dos relacionamentos pedidos no include (um SELECT ... IN por
+        relacionamento); os demais, inclusive os itens do produto, nao sao
+        carregados nem geram SQL. Os loaders sao imutaveis, entao cada
+        include monta os seus uma vez.
+        """
+        item_model = (OrderItemArchiveModel if model is OrderArchiveModel
+                      else OrderItemModel)
+        options = [selectinload(model.customer) if "customer" in include
+                   else noload(model.customer)]
+        if "items" not in include:
+            options.append(noload(model.items))
+        elif "items.product" in include:
+            # ProductModel.items e selectin: sem o lazyload o produto traria
+            # os itens de todos os pedidos em que aparece
+            options.append(selectinload(model.items)
+                           .selectinload(item_model.product)
+                           .lazyload(ProductModel.items))
+        else:
+            options.append(selectinload(model.items)
+                           .noload(item_model.product))
+        return tuple(options)
+
+    def get(self, order_id: int, refresh: bool = False,
+            archived: bool = False,
+            include: FrozenSet[str] = FULL_INCLUDE) -> OrderModel:
+        """
+        Busca o pedido com os relacionamentos do include (por padrao itens,
+        produtos e cliente). Com archived=True um pedido que nao esta em
+        orders e procurado em orders_archive (somente leitura).
+        """
+        # statements em cache, um por include: so o id muda entre chamadas
+        loaders = self._load_options(include)
+        stmt = lambda_stmt(lambda: select(OrderModel)
+                           .where(OrderModel.id == order_id))
+        stmt = stmt.add_criteria(lambda s: s.options(*loaders),
+                                 track_on=[include])
+        options = {"populate_existing": True} if refresh else {}
 
-        order = self.session.execute(stmt).scalars().one_or_none()
+        order = self.session.execute(
+            stmt, execution_options=options).scalars().one_or_none()
+
+        if not order and archived:
+            loaders = self._load_options(include, OrderArchiveModel)
+            stmt = lambda_stmt(lambda: select(OrderArchiveModel)
+                               .where(OrderArchiveModel.id == order_id))
+            stmt = stmt.add_criteria(lambda s: s.options(*loaders),
+                                     track_on=[include])
+            order = self.session.scalars(stmt).one_or_none()
 
         if not order:
             raise NotFoundException("Order", order_id)
 
         return order
 
-    def list(self, q: OrderQuery) -> Page[OrderModel]:
-        stmt = (select(OrderModel)
-                .options(selectinload(OrderModel.items),
-                         selectinload(OrderModel.customer))
-                )
+    def _created_min(self, q: OrderQuery,
+                     window: bool = True) -> Optional[datetime]:
+        # com ORDERS_LIST_WINDOW_DAYS a listagem sem created_min ganha um
+        # limite em created_at para o Postgres podar as particoes mensais
+        if (window and q.created_min is None and
+                settings.orders_list_window_days > 0):
+            return datetime.now() - timedelta(
+                days=settings.orders_list_window_days)
+        return q.created_min
+
+    def _orders_with_product(self, q: OrderQuery, model=OrderModel,
+                             window: bool = True) -> Select:
+        """
+        Ids dos pedidos com o produto (por id ou SKU), lidos do indice
+        (product_id, order_created_at, order_id) dos itens sem carregar os
+        itens. O intervalo de created_at vai junto para o Postgres podar as
+        particoes de order_items.
+        """
+        item_model = (OrderItemArchiveModel if model is OrderArchiveModel
+                      else OrderItemModel)
+        stmt = select(item_model.order_id)
+        if q.product_id:
+            stmt = stmt.where(item_model.product_id == q.product_id)
+        if q.sku and q.sku.strip():
+            stmt = stmt.where(item_model.product_id == select(ProductModel.id)
+                              .where(ProductModel.sku ==
+                                     q.sku.strip().upper())
+                              .scalar_subquery())
+        created_min = self._created_min(q, window)
+        if created_min:
+            stmt = stmt.where(item_model.order_created_at >= created_min)
+        if q.created_max:
+            stmt = stmt.where(item_model.order_created_at <= q.created_max)
+        return stmt
 
-        # Apply filters
+    def _filters(self, q: OrderQuery, model=OrderModel,
+                 window: bool = True) -> list:
+        """
+        Filtros da OrderQuery; window=False ignora a janela padrao da
+        listagem (so created_min/created_max explicitos limitam o periodo).
+        """
+        expressions = []
         if q.id:
-            stmt = stmt.where(OrderModel.id == q.id)
+            expressions.append(model.id == q.id)
         if q.customer and q.customer.strip():
             customer = f"%{q.customer.strip()}%"
-            stmt = stmt.where(OrderModel.customer.has(or_(
+            expressions.append(model.customer.has(or_(
                 CustomerModel.name.ilike(customer),
                 CustomerModel.email.ilike(customer),
                 CustomerModel.document.ilike(customer),
             )))
+        if q.product_id or (q.sku and q.sku.strip()):
+            expressions.append(
+                model.id.in_(self._orders_with_product(q, model, window)))
         if q.total_amount:
-            stmt = stmt.where(OrderModel.total_amount >= q.total_amount)
+            expressions.append(model.total_amount >= q.total_amount)
         if q.status:
-            stmt = stmt.where(OrderModel.status == q.status)
-        if q.created_min:
-            stmt = stmt.where(OrderModel.created_at >= q.created_min)
+            expressions.append(model.status == q.status)
+        created_min = self._created_min(q, window)
+        if created_min:
+            expressions.append(model.created_at >= created_min)
+        if q.created_max:
+            expressions.append(model.created_at <= q.created_max)
+        return expressions
+
+    def _needs_archive(self, q: OrderQuery) -> bool:
+        """
+        O arquivo so e consultado quando pedido (include_archived) ou quando
+        o periodo da query (created_min ou a janela) comeca antes do corte do
+        arquivamento; sem periodo a listagem fica na tabela quente.
+        """
+        if q.include_archived:
+            return True
+        created_min = self._created_min(q)
+        cutoff = datetime.now() - timedelta(
+            days=settings.orders_archive_after_days)
+        return created_min is not None and created_min < cutoff
+
+    def list(self, q: OrderQuery) -> Page[OrderModel]:
+        if self._needs_archive(q):
+            return self._list_with_archive(q)
+
+        stmt = select(OrderModel).options(*self._load_options(q.includes))
+
+        stmt = stmt.where(*self._filters(q))
 
         total = self.session.scalar(
             select(func.count()).select_from(stmt.subquery())
@@ -66,6 +195,84 @@ class OrderRepository(BaseRepository[OrderModel]):
 
         return Page(items=orders, total=total)
 
+    def _list_with_archive(self, q: OrderQuery) -> Page:
+        """
+        Pagina orders UNION ALL orders_archive pelas colunas do cabecalho e
+        depois carrega a pagina de cada tabela com os relacionamentos.
+        """
+        rows = union_all(*(
+            select(*(getattr(model, c) for c in ORDER_COLUMNS),
+                   literal(archived).label("archived"))
+            .where(*self._filters(q, model))
+            for model, archived in ((OrderModel, False),
+                                    (OrderArchiveModel, True)))).subquery()
+
+        total = self.session.scalar(
+            select(func.count()).select_from(rows)) or 0
+
+        stmt = select(rows.c.id, rows.c.archived)
+        if q.sort_order != 0:
+            column = rows.c.get(q.sort_field)
+            if column is None:
+                raise InvalidSortFieldException(q.sort_field,
+                                                OrderModel.__name__)
+            stmt = stmt.order_by(column.desc() if q.sort_order == -1
+                                 else column.asc())
+        page = [(order_id, bool(archived)) for order_id, archived in
+                self.session.execute(stmt.offset(q.first).limit(q.rows))]
+
+        loaded = {}
+        for model, archived in ((OrderModel, False),
+                                (OrderArchiveModel, True)):
+            ids = [order_id for order_id, a in page if a == archived]
+            if not ids:
+                continue
+            for order in self.session.scalars(
+                    select(model)
+                    .options(*self._load_options(q.includes, model))
+                    .where(model.id.in_(ids))):
+                loaded[(order.id, archived)] = order
+
+        return Page(items=[loaded[key] for key in page], total=total)
+
+    def archive(self, before: datetime, batch_size: int) -> int:
+        """
+        Move um lote de pedidos PAID/CANCELLED criados antes de before, com
+        os itens, para orders_archive/order_items_archive. Retorna quantos
+        pedidos foram movidos (0 quando nao ha mais nada a arquivar).
+        """
+        ids = list(self.session.scalars(
+            select(OrderModel.id)
+            .where(OrderModel.status.in_([OrderStatus.PAID,
+                                          OrderStatus.CANCELLED]),
+                   OrderModel.created_at < before)
+            .order_by(OrderModel.created_at)
+            .limit(batch_size)
+            .with_for_update(skip_locked=True)))
+        if not ids:
+            return 0
+
+        self.session.execute(insert(OrderArchiveModel).from_select(
+            ORDER_COLUMNS,
+            select(*(getattr(OrderModel, c) for c in ORDER_COLUMNS))
+            .where(OrderModel.id.in_(ids))))
+        self.session.execute(insert(OrderItemArchiveModel).from_select(
+            ITEM_COLUMNS,
+            select(*(getattr(OrderItemModel, c) for c in ITEM_COLUMNS))
+            .where(OrderItemModel.order_id.in_(ids))))
+
+        # o limite de data deixa o Postgres podar as particoes
+        self.session.execute(
+            delete(OrderItemModel)
+            .where(OrderItemModel.order_id.in_(ids),
+                   OrderItemModel.order_created_at < before)
+            .execution_options(synchronize_session=False))
+        self.session.execute(
+            delete(OrderModel)
+            .where(OrderModel.id.in_(ids), OrderModel.created_at < before)
+            .execution_options(synchronize_session=False))
+        return len(ids)
+
     def add(self, order: OrderModel) -> OrderModel:
         self.session.add(order)
 
@@ -104,3 +311,81 @@ class OrderRepository(BaseRepository[OrderModel]):
         existing.recalc_total()
 
         return existing
+
+    def edit_items(self, order_id: int, customer_id: int,
+                   diff: OrderItemsDiff) -> None:
+        """
+        Aplica o diff dos itens com statements em lote, sem passar pelos
+        eventos do ORM item a item.
+        """
+        if diff.deletes:
+            self.session.execute(
+                delete(OrderItemModel)
+                .where(OrderItemModel.id.in_(diff.deletes))
+                .execution_options(synchronize_session=False))
+        if diff.updates:
+            self.session.execute(update(OrderItemModel), diff.updates)
+        if diff.inserts:
+            self.session.execute(insert(OrderItemModel), diff.inserts)
+
+        self.session.execute(
+            update(OrderModel)
+            .where(OrderModel.id == order_id)
+            .values(customer_id=customer_id, total_amount=diff.total)
+            .execution_options(synchronize_session=False))
+
+    def lock_for_transition(self, from_status: List[OrderStatus],
+                            order_ids: Optional[List[int]] = None,
+                            q: Optional[OrderQuery] = None,
+                            limit: Optional[int] = None) -> List[int]:
+        """
+        Trava (em ordem de id) ate limit pedidos que podem sair de
+        from_status, selecionados por ids ou pelos filtros de uma OrderQuery
+        (paginacao, ordenacao e a janela padrao da listagem sao ignoradas).
+        """
+        stmt = (select(OrderModel.id)
+                .where(OrderModel.status.in_(from_status))
+                .order_by(OrderModel.id)
+                .with_for_update())
+        if order_ids is not None:
+            stmt = stmt.where(OrderModel.id.in_(order_ids))
+        if q is not None:
+            stmt = stmt.where(*self._filters(q, window=False))
+        if limit is not None:
+            stmt = stmt.limit(limit)
+        return list(self.session.scalars(stmt))
+
+    def transition(self, order_ids: List[int], from_status: List[OrderStatus],
+                   to_status: OrderStatus) -> List[tuple[int, int, Decimal]]:
+        """
+        Muda o status de varios pedidos com um unico UPDATE protegido pelo
+        status atual e retorna (id, customer_id, total_amount) dos que
+        mudaram.
+        """
+        if not order_ids:
+            return []
+        stmt = (update(OrderModel)
+                .where(OrderModel.id.in_(order_ids),
+                       OrderModel.status.in_(from_status))
+                .values(status=to_status)
+                .returning(OrderModel.id, OrderModel.customer_id,
+                           OrderModel.total_amount)
+                .execution_options(synchronize_session=False))
+        return [tuple(row) for row in self.session.execute(stmt)]
+
+    def statuses(self, order_ids: List[int]) -> dict[int, OrderStatus]:
+        if not order_ids:
+            return {}
+        stmt = (select(OrderModel.id, OrderModel.status)
+                .where(OrderModel.id.in_(order_ids)))
+        return dict(self.session.execute(stmt).tuples().all())
+
+    def item_quantities(self, order_ids: List[int]) -> dict[int, int]:
+        """Quantidade total por produto nos itens dos pedidos."""
+        if not order_ids:
+            return {}
+        stmt = (select(OrderItemModel.product_id,
+                       func.sum(OrderItemModel.quantity))
+                .where(OrderItemModel.order_id.in_(order_ids))
+                .group_by(OrderItemModel.product_id))
+        return dict(self.session.execute(stmt).tuples().all())
@@ -0,0 +1,75 @@
+from datetime import datetime
+from typing import List, Optional
+
+from sqlalchemy import select, insert, func
+from sqlalchemy.orm import Session
+
+from backend.src.infrastructure.models.outbox import OutboxEventModel, \
+    OutboxRelayModel
+
+
+class OutboxRepository:
+    """Grava e le os eventos de mudanca (outbox transacional)."""
+
+    def __init__(self, session: Session):
+        self.session = session
+
+    def add(self, entity: str, entity_id: int, event: str,
+            payload: Optional[dict] = None) -> None:
+        self.add_many([{"entity": entity, "entity_id": entity_id,
+                        "event": event, "payload": payload or {}}])
+
+    def add_many(self, events: List[dict]) -> None:
+        """Grava varios eventos com um unico INSERT (executemany)."""
+        if events:
+            self.session.execute(insert(OutboxEventModel), events)
+
+    def claim(self, batch_size: int) -> tuple[int, List[OutboxEventModel]]:
+        """
+        Trava a linha do relay e retorna a ultima position atribuida com o
+        proximo lote de eventos nao publicados, em ordem de id.
+        """
+        relay = self.session.scalars(
+            select(OutboxRelayModel).where(OutboxRelayModel.id == 1)
+            .with_for_update()).one_or_none()
+        if relay is None:
+            relay = OutboxRelayModel(id=1, position=self.last_position())
+            self.session.add(relay)
+            self.session.flush()
+
+        events = self.session.scalars(
+            select(OutboxEventModel)
+            .where(OutboxEventModel.position.is_(None))
+            .order_by(OutboxEventModel.id)
+            .limit(batch_size)).all()
+        return relay.position, list(events)
+
+    def mark_published(self, events: List[OutboxEventModel],
+                       last_position: int) -> int:
+        """Atribui positions sequenciais ao lote e avanca o relay."""
+        now = datetime.now()
+        for offset, event in enumerate(events, start=1):
+            event.position = last_position + offset
+            event.published_at = now
+
+        position = last_position + len(events)
+        relay = self.session.get(OutboxRelayModel, 1)
+        relay.position = position
+        self.session.flush()
+        return position
+
+    def last_position(self) -> int:
+        """Position do ultimo evento publicado (0 sem eventos)."""
+        return self.session.scalar(
+            select(func.coalesce(func.max(OutboxEventModel.position), 0)))
+
+    def changes(self, since: int, limit: int,
+                entity: Optional[str] = None) -> List[OutboxEventModel]:
+        """Eventos publicados depois do cursor since, em ordem."""
+        stmt = (select(OutboxEventModel)
+                .where(OutboxEventModel.position > since)
+                .order_by(OutboxEventModel.position)
+                .limit(limit))
+        if entity:
+            stmt = stmt.where(OutboxEventModel.entity == entity)
+        return list(self.session.scalars(stmt))
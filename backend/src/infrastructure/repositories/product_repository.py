@@ -1,10 +1,15 @@
-from sqlalchemy import select, update, func, and_, or_
-from sqlalchemy.orm import Session
+from typing import List, Optional
+
+from sqlalchemy import select, update, insert, delete, func, and_, or_, \
+    case, lambda_stmt
+from sqlalchemy.orm import Session, lazyload
 
 from backend.src.application.dtos.page import Page
 from backend.src.application.dtos.product import ProductQuery
-from backend.src.exceptions import NotFoundException
-from backend.src.infrastructure.models.product import ProductModel
+from backend.src.exceptions import NotFoundException, \
+    InsufficientStockException
+from backend.src.infrastructure.models.product import ProductModel, \
+    ProductStockShardModel
 from backend.src.infrastructure.repositories.base_repository import \
     BaseRepository
 
@@ -14,7 +19,11 @@ class ProductRepository(BaseRepository[ProductModel]):
         super().__init__(session, ProductModel)
 
     def get(self, product_id: int) -> ProductModel:
-        stmt = select(ProductModel).where(ProductModel.id == product_id)
+        # lambda_stmt: o select e montado uma vez e reaproveitado (so o id
+        # muda); os itens de pedido do produto so carregam se acessados
+        stmt = lambda_stmt(lambda: select(ProductModel)
+                           .options(lazyload(ProductModel.items))
+                           .where(ProductModel.id == product_id))
         product = self.session.execute(stmt).scalars().one_or_none()
 
         if not product:
@@ -23,7 +32,7 @@ class ProductRepository(BaseRepository[ProductModel]):
         return product
 
     def list(self, q: ProductQuery, logic = "and") -> Page[ProductModel]:
-        stmt = select(ProductModel)
+        stmt = select(ProductModel).options(lazyload(ProductModel.items))
 
         expressions = []
 
@@ -36,7 +45,7 @@ class ProductRepository(BaseRepository[ProductModel]):
         if q.price:
             expressions.append(ProductModel.price >= q.price)
         if q.stock_qty:
-            expressions.append(ProductModel.stock_qty >= q.stock_qty)
+            expressions.append(ProductModel.available_stock >= q.stock_qty)
         if q.is_active is not None:
             expressions.append(ProductModel.is_active == q.is_active)
         if q.created_min:
@@ -56,7 +65,9 @@ class ProductRepository(BaseRepository[ProductModel]):
 
         # Apply sorting using the base repository method
         if q.sort_order != 0:
-            stmt = self._apply_sorting(stmt, q.sort_field, q.sort_order)
+            sort_field = ("available_stock" if q.sort_field == "stock_qty"
+                          else q.sort_field)
+            stmt = self._apply_sorting(stmt, sort_field, q.sort_order)
 
         products = self.session.scalars(stmt).all()
 
@@ -68,11 +79,7 @@ class ProductRepository(BaseRepository[ProductModel]):
         return product
 
     def edit(self, data: ProductModel) -> ProductModel:
-        stmt = select(ProductModel).where(ProductModel.id == data.id)
-        product = self.session.execute(stmt).scalars().one_or_none()
-
-        if not product:
-            raise NotFoundException("Product", data.id)
+        product = self.get(data.id)
 
         product.name = data.name
         product.sku = data.sku
@@ -80,12 +87,173 @@ class ProductRepository(BaseRepository[ProductModel]):
         product.stock_qty = data.stock_qty
         product.is_active = data.is_active
 
+        if product.stock_shards:
+            self._spread(product.id, product.stock_shards, data.stock_qty)
+            self.session.expire(product, ["available_stock"])
+
         return product
 
     def adjust_stock(self, deltas):
-        for product_id, delta in deltas.items():
+        """
+        Baixa (delta positivo) ou devolve (delta negativo) estoque de varios
+        produtos com um unico UPDATE condicional (stock_qty >= delta).
+
+        As linhas sao travadas antes em ordem de id, para que pedidos
+        concorrentes com os mesmos produtos nao entrem em deadlock. Produtos
+        com estoque fragmentado nao travam a linha de products: a baixa vai
+        para um shard (ver _adjust_sharded). Produto inexistente levanta
+        NotFoundException; se algum produto nao tiver saldo,
+        InsufficientStockException e levantada (a transacao do servico faz o
+        rollback).
+        """
+        if not deltas:
+            return
+
+        ids = sorted(deltas)
+        plain = self.session.scalars(
+            select(ProductModel.id)
+            .where(ProductModel.id.in_(ids), ProductModel.stock_shards == 0)
+            .order_by(ProductModel.id)
+            .with_for_update()).all()
+
+        # o que nao veio no select acima e fragmentado ou nao existe
+        rest = [i for i in ids if i not in set(plain)]
+        if rest:
+            found = set(self.session.scalars(
+                select(ProductModel.id).where(ProductModel.id.in_(rest))))
+            unknown = [i for i in rest if i not in found]
+            if unknown:
+                raise NotFoundException("Product", unknown[0])
+
+        missing = []
+        if plain:
+            delta = case({i: deltas[i] for i in plain},
+                         value=ProductModel.id)
             stmt = (update(ProductModel)
-                    .where(ProductModel.id == product_id)
+                    .where(ProductModel.id.in_(plain),
+                           ProductModel.stock_qty >= delta)
                     .values(stock_qty=ProductModel.stock_qty - delta)
-                    .returning(ProductModel))
-            self.session.execute(stmt)
+                    .returning(ProductModel.id)
+                    .execution_options(synchronize_session="fetch"))
+            updated = set(self.session.scalars(stmt).all())
+            missing += [i for i in plain if i not in updated]
+
+        for product_id in rest:
+            if not self._adjust_sharded(product_id, deltas[product_id]):
+                missing.append(product_id)
+
+        if missing:
+            raise InsufficientStockException(missing)
+
+    def _adjust_sharded(self, product_id: int, delta: int) -> bool:
+        """
+        Aplica o delta em um shard sorteado que tenha saldo, pulando os que
+        estao travados por outras transacoes. Se nenhum shard sozinho cobre
+        o delta, trava todos (em ordem) e baixa de varios.
+        """
+        shard = ProductStockShardModel
+        pick = (select(shard.shard)
+                .where(shard.product_id == product_id,
+                       shard.stock_qty >= delta)
+                .order_by(func.random())
+                .limit(1)
+                .with_for_update(skip_locked=True)
+                .scalar_subquery())
+        done = self.session.scalar(
+            update(shard)
+            .where(shard.product_id == product_id, shard.shard == pick)
+            .values(stock_qty=shard.stock_qty - delta)
+            .returning(shard.shard)
+            .execution_options(synchronize_session=False))
+
+        if done is None:
+            rows = self.session.execute(
+                select(shard.shard, shard.stock_qty)
+                .where(shard.product_id == product_id)
+                .order_by(shard.shard)
+                .with_for_update()).all()
+            if not rows or sum(qty for _, qty in rows) < delta:
+                return False
+
+            remaining = delta
+            for number, qty in rows:
+                take = min(qty, remaining) if delta > 0 else remaining
+                if take:
+                    self.session.execute(
+                        update(shard)
+                        .where(shard.product_id == product_id,
+                               shard.shard == number)
+                        .values(stock_qty=shard.stock_qty - take)
+                        .execution_options(synchronize_session=False))
+                    remaining -= take
+                if not remaining:
+                    break
+
+        product = self.session.identity_map.get(
+            self.session.identity_key(ProductModel, product_id))
+        if product is not None:
+            self.session.expire(product, ["available_stock"])
+        return True
+
+    def _spread(self, product_id: int, shards: int, total: int) -> None:
+        """Reparte o total igualmente entre os shards do produto."""
+        self.session.execute(delete(ProductStockShardModel).where(
+            ProductStockShardModel.product_id == product_id))
+        if shards:
+            self.session.execute(insert(ProductStockShardModel), [
+                {"product_id": product_id, "shard": n,
+                 "stock_qty": total // shards + (n < total % shards)}
+                for n in range(shards)])
+
+    def set_stock_shards(self, product_id: int, shards: int) -> ProductModel:
+        """
+        Liga (shards > 0), muda ou desliga (shards = 0) o estoque
+        fragmentado, preservando o saldo atual.
+        """
+        product = self.session.scalars(
+            select(ProductModel).where(ProductModel.id == product_id)
+            .with_for_update()).one_or_none()
+        if not product:
+            raise NotFoundException("Product", product_id)
+
+        self.session.execute(
+            select(ProductStockShardModel.shard)
+            .where(ProductStockShardModel.product_id == product_id)
+            .with_for_update())
+        total = self.session.scalar(
+            select(ProductModel.available_stock)
+            .where(ProductModel.id == product_id))
+
+        self._spread(product_id, shards, total)
+        product.stock_qty = total
+        product.stock_shards = shards
+        self.session.flush()
+        self.session.expire(product, ["available_stock"])
+        return product
+
+    def fold_stock_shards(self,
+                          product_ids: Optional[List[int]] = None) -> int:
+        """
+        Consolidacao periodica: grava a soma dos shards em products.stock_qty
+        e redistribui o saldo, reabastecendo shards que zeraram. Retorna o
+        numero de produtos consolidados.
+        """
+        shard = ProductStockShardModel
+        stmt = (select(shard.product_id, shard.stock_qty)
+                .join(ProductModel, ProductModel.id == shard.product_id)
+                .where(ProductModel.stock_shards > 0)
+                .order_by(shard.product_id, shard.shard)
+                .with_for_update(of=shard))
+        if product_ids is not None:
+            stmt = stmt.where(shard.product_id.in_(product_ids))
+
+        totals: dict[int, int] = {}
+        for product_id, qty in self.session.execute(stmt):
+            totals[product_id] = totals.get(product_id, 0) + qty
+
+        for product_id, total in totals.items():
+            product = self.session.get(ProductModel, product_id)
+            self._spread(product_id, product.stock_shards, total)
+            product.stock_qty = total
+        self.session.flush()
+        return len(totals)
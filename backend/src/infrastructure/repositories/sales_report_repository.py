@@ -0,0 +1,277 @@
+from decimal import Decimal
+from typing import Optional
+
+from sqlalchemy import select, func, and_, case, delete, literal, union_all
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from backend.src.application.dtos.page import Page
+from backend.src.application.dtos.report import ReportQuery
+from backend.src.exceptions import InvalidSortFieldException
+from backend.src.infrastructure.models import OrderModel, OrderItemModel, \
+    ProductModel, CustomerModel
+from backend.src.infrastructure.models.orders import OrderStatus
+from backend.src.infrastructure.models.orders_archive import all_orders, \
+    all_order_items
+from backend.src.infrastructure.models.sales_rollups import \
+    DailyProductSalesModel, DailyCustomerSalesModel, \
+    DailyProductSalesDeltaModel, DailyCustomerSalesDeltaModel
+
+_PRODUCT_MEASURES = ("orders_count", "quantity", "revenue", "paid_revenue")
+_CUSTOMER_MEASURES = ("orders_count", "revenue", "paid_revenue")
+
+# (rollup, variacoes pendentes, chave, medidas)
+_ROLLUPS = (
+    (DailyProductSalesModel, DailyProductSalesDeltaModel, "product_id",
+     _PRODUCT_MEASURES),
+    (DailyCustomerSalesModel, DailyCustomerSalesDeltaModel, "customer_id",
+     _CUSTOMER_MEASURES),
+)
+
+
+class SalesReportRepository:
+    """
+    Mantem e consulta os rollups diarios de vendas.
+
+    Os rollups consideram apenas pedidos nao cancelados, agrupados pelo dia
+    de criacao do pedido. Cada mudanca de estado de um pedido retira a
+    contribuicao antiga (sign=-1) e aplica a nova (sign=1).
+
+    Na transacao do pedido as contribuicoes so sao acrescentadas nas tabelas
+    de variacoes (*_deltas); fold() as soma nos rollups fora dela. As
+    consultas leem rollup + variacoes pendentes, entao nao ficam atrasadas.
+    """
+
+    def __init__(self, session: Session):
+        self.session = session
+
+    # Manutencao
+
+    def _product_source(self, orders, items, where, sign: int = 1):
+        day = func.date(orders.c.created_at)
+        paid = case((orders.c.status == OrderStatus.PAID,
+                     items.c.line_total), else_=0)
+        return (select(day.label("day"),
+                       items.c.product_id,
+                       literal(sign) * func.count(orders.c.id.distinct()),
+                       literal(sign) * func.sum(items.c.quantity),
+                       literal(sign) * func.sum(items.c.line_total),
+                       literal(sign) * func.sum(paid))
+                .select_from(items)
+                .join(orders, orders.c.id == items.c.order_id)
+                .where(where)
+                .group_by(day, items.c.product_id))
+
+    def _customer_source(self, orders, where, sign: int = 1):
+        day = func.date(orders.c.created_at)
+        paid = case((orders.c.status == OrderStatus.PAID,
+                     orders.c.total_amount), else_=0)
+        return (select(day.label("day"),
+                       orders.c.customer_id,
+                       literal(sign) * func.count(orders.c.id),
+                       literal(sign) * func.sum(orders.c.total_amount),
+                       literal(sign) * func.sum(paid))
+                .where(where)
+                .group_by(day, orders.c.customer_id))
+
+    def _history_sources(self) -> tuple:
+        """Fontes de todos os pedidos nao cancelados, incluindo o arquivo."""
+        orders, items = all_orders(), all_order_items()
+        where = orders.c.status != OrderStatus.CANCELLED
+        return (self._product_source(orders, items, where),
+                self._customer_source(orders, where))
+
+    def _insert(self):
+        dialect = self.session.get_bind().dialect.name
+        return postgresql.insert if dialect == "postgresql" else sqlite.insert
+
+    def _upsert(self, model, keys: tuple, measures: tuple, stmt) -> None:
+        stmt = stmt.on_conflict_do_update(
+            index_elements=list(keys),
+            set_={m: getattr(model, m) + getattr(stmt.excluded, m)
+                  for m in measures})
+        self.session.execute(stmt)
+
+    def _upsert_from(self, model, keys: tuple, measures: tuple, source):
+        self._upsert(model, keys, measures,
+                     self._insert()(model).from_select(keys + measures,
+                                                       source))
+
+    def apply_orders(self, order_ids, sign: int = 1) -> None:
+        """
+        Soma (sign=1) ou retira (sign=-1) a contribuicao dos pedidos,
+        acrescentando linhas nas tabelas de variacoes com um INSERT ...
+        SELECT por tabela. Nao ha conflito de chave: pedidos concorrentes do
+        mesmo produto/dia nao se bloqueiam aqui.
+        """
+        if not order_ids:
+            return
+
+        orders, items = OrderModel.__table__, OrderItemModel.__table__
+        where = and_(orders.c.id.in_(order_ids),
+                     orders.c.status != OrderStatus.CANCELLED)
+        self.session.execute(
+            self._insert()(DailyProductSalesDeltaModel).from_select(
+                ("day", "product_id") + _PRODUCT_MEASURES,
+                self._product_source(orders, items, where, sign)))
+        self.session.execute(
+            self._insert()(DailyCustomerSalesDeltaModel).from_select(
+                ("day", "customer_id") + _CUSTOMER_MEASURES,
+                self._customer_source(orders, where, sign)))
+
+    def fold(self, batch_size: int = 10000) -> int:
+        """
+        Move ate batch_size variacoes pendentes de cada tabela para os
+        rollups: o DELETE ... RETURNING e o upsert rodam na mesma transacao,
+        entao cada variacao entra uma unica vez. Retorna quantas variacoes
+        foram consolidadas.
+        """
+        folded = 0
+        for model, delta, key, measures in _ROLLUPS:
+            batch = (select(delta.id).order_by(delta.id).limit(batch_size)
+                     .scalar_subquery())
+            rows = self.session.execute(
+                delete(delta).where(delta.id.in_(batch))
+                .returning(delta.day, getattr(delta, key),
+                           *(getattr(delta, m) for m in measures))
+                .execution_options(synchronize_session=False)).all()
+            if not rows:
+                continue
+
+            totals: dict[tuple, list] = {}
+            for row in rows:
+                sums = totals.setdefault(tuple(row[:2]), [0] * len(measures))
+                for i, value in enumerate(row[2:]):
+                    sums[i] += value
+            # ordem fixa de chave: folds concorrentes nao entram em deadlock
+            values = [{"day": k[0], key: k[1], **dict(zip(measures, sums))}
+                      for k, sums in sorted(totals.items())]
+            self._upsert(model, ("day", key), measures,
+                         self._insert()(model).values(values))
+            folded += len(rows)
+        return folded
+
+    def _combined(self, model, delta, key: str, measures: tuple):
+        """Rollup consolidado + variacoes pendentes, como uma subquery."""
+        columns = ("day", key) + measures
+        return union_all(
+            select(*(getattr(model, c) for c in columns)),
+            select(*(getattr(delta, c) for c in columns)),
+        ).subquery(model.__tablename__)
+
+    def rebuild(self) -> None:
+        """
+        Recalcula todos os rollups a partir dos pedidos, incluindo os
+        arquivados.
+        """
+        product_source, customer_source = self._history_sources()
+        for model, delta, _, _ in _ROLLUPS:
+            self.session.execute(delete(delta))
+            self.session.execute(delete(model))
+        self._upsert_from(DailyProductSalesModel, ("day", "product_id"),
+                          _PRODUCT_MEASURES, product_source)
+        self._upsert_from(DailyCustomerSalesModel, ("day", "customer_id"),
+                          _CUSTOMER_MEASURES, customer_source)
+
+    def check(self) -> list[dict]:
+        """
+        Compara os rollups com a agregacao dos dados brutos e retorna as
+        divergencias encontradas (lista vazia quando consistente).
+        """
+        mismatches = []
+        for (model, delta, key, measures), source in zip(
+                _ROLLUPS, self._history_sources()):
+            raw = {(str(row[0]), row[1]): self._normalize(row[2:])
+                   for row in self.session.execute(source)}
+            combined = self._combined(model, delta, key, measures)
+            stored = {(str(row[0]), row[1]): self._normalize(row[2:])
+                      for row in self.session.execute(
+                          select(combined.c.day, combined.c[key],
+                                 *(func.sum(combined.c[m])
+                                   for m in measures))
+                          .group_by(combined.c.day, combined.c[key]))}
+
+            for k in set(raw) | set(stored):
+                zero = self._normalize([0] * len(measures))
+                expected, actual = raw.get(k, zero), stored.get(k, zero)
+                if expected != actual:
+                    mismatches.append({
+                        "table": model.__tablename__, "day": k[0], key: k[1],
+                        "expected": dict(zip(measures, map(str, expected))),
+                        "actual": dict(zip(measures, map(str, actual))),
+                    })
+        return mismatches
+
+    @staticmethod
+    def _normalize(values) -> tuple:
+        return tuple(Decimal(str(v or 0)).quantize(Decimal("0.01"))
+                     for v in values)
+
+    # Consultas
+
+    def _period(self, model, q: ReportQuery) -> list:
+        expressions = []
+        if q.start:
+            expressions.append(model.c.day >= q.start)
+        if q.end:
+            expressions.append(model.c.day <= q.end)
+        return expressions
+
+    def _page(self, stmt, q: ReportQuery, default: str) -> Page:
+        total = self.session.scalar(
+            select(func.count()).select_from(stmt.subquery())) or 0
+
+        if q.sort_order != 0:
+            columns = {c.name: c for c in stmt.selected_columns}
+            sort_field = q.sort_field if q.sort_field != "id" else default
+            if sort_field not in columns:
+                raise InvalidSortFieldException(sort_field, "SalesReport")
+            column = columns[sort_field]
+            stmt = stmt.order_by(column.desc() if q.sort_order == -1
+                                 else column.asc())
+
+        stmt = stmt.offset(q.first).limit(q.rows)
+        rows = self.session.execute(stmt).mappings().all()
+        return Page(items=rows, total=total)
+
+    def daily(self, q: ReportQuery) -> Page:
+        model = self._combined(*_ROLLUPS[1])
+        stmt = (select(model.c.day,
+                       func.sum(model.c.orders_count).label("orders_count"),
+                       func.sum(model.c.revenue).label("revenue"),
+                       func.sum(model.c.paid_revenue).label("paid_revenue"))
+                .where(*self._period(model, q))
+                .group_by(model.c.day))
+        return self._page(stmt, q, "day")
+
+    def by_product(self, q: ReportQuery,
+                   product_id: Optional[int] = None) -> Page:
+        model = self._combined(*_ROLLUPS[0])
+        stmt = (select(model.c.product_id, ProductModel.name,
+                       ProductModel.sku,
+                       func.sum(model.c.orders_count).label("orders_count"),
+                       func.sum(model.c.quantity).label("quantity"),
+                       func.sum(model.c.revenue).label("revenue"),
+                       func.sum(model.c.paid_revenue).label("paid_revenue"))
+                .join(ProductModel, ProductModel.id == model.c.product_id)
+                .where(*self._period(model, q))
+                .group_by(model.c.product_id, ProductModel.name,
+                          ProductModel.sku))
+        if product_id:
+            stmt = stmt.where(model.c.product_id == product_id)
+        return self._page(stmt, q, "revenue")
+
+    def by_customer(self, q: ReportQuery,
+                    customer_id: Optional[int] = None) -> Page:
+        model = self._combined(*_ROLLUPS[1])
+        stmt = (select(model.c.customer_id, CustomerModel.name,
+                       func.sum(model.c.orders_count).label("orders_count"),
+                       func.sum(model.c.revenue).label("revenue"),
+                       func.sum(model.c.paid_revenue).label("paid_revenue"))
+                .join(CustomerModel,
+                      CustomerModel.id == model.c.customer_id)
+                .where(*self._period(model, q))
+                .group_by(model.c.customer_id, CustomerModel.name))
+        if customer_id:
+            stmt = stmt.where(model.c.customer_id == customer_id)
+        return self._page(stmt, q, "revenue")
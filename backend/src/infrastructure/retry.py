@@ -0,0 +1,51 @@
+import functools
+import logging
+import random
+import time
+
+from sqlalchemy.exc import DBAPIError
+
+from backend.src import metrics
+from backend.src.settings import settings
+
+logger = logging.getLogger(__name__)
+
+# serialization_failure, deadlock_detected, lock_not_available
+_RETRYABLE_SQLSTATES = {"40001", "40P01", "55P03"}
+
+
+def is_retryable(error: Exception) -> bool:
+    """Erros de concorrencia que somem ao repetir a transacao inteira."""
+    if not isinstance(error, DBAPIError):
+        return False
+    if getattr(error.orig, "sqlstate", None) in _RETRYABLE_SQLSTATES:
+        return True
+    # SQLite: outro writer segurando o banco alem do busy timeout
+    return "database is locked" in str(error.orig)
+
+
+def retry_on_conflict(func):
+    """
+    Repete o metodo do servico quando o banco aborta a transacao por
+    deadlock, falha de serializacao ou lock_timeout, com backoff exponencial
+    e jitter. O metodo precisa abrir e fechar a propria transacao.
+    """
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        attempt = 1
+        while True:
+            try:
+                return func(*args, **kwargs)
+            except DBAPIError as e:
+                if (not is_retryable(e) or
+                        attempt >= settings.db_retry_attempts):
+                    raise
+                metrics.DB_RETRIES.labels(func.__qualname__).inc()
+                delay = (settings.db_retry_backoff_ms / 1000 *
+                         2 ** (attempt - 1) * random.uniform(0.5, 1.5))
+                logger.info("Retrying %s after %s (attempt %d)",
+                            func.__qualname__, e.orig, attempt)
+                time.sleep(delay)
+                attempt += 1
+
+    return wrapper
@@ -0,0 +1,115 @@
+import heapq
+import itertools
+import logging
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import create_engine, Engine
+from sqlalchemy.pool import NullPool
+
+from backend.src.settings import settings
+
+logger = logging.getLogger(__name__)
+
+_EXPLAINABLE = ("SELECT", "INSERT", "UPDATE", "DELETE", "WITH")
+
+_lock = threading.Lock()
+_worst: list = []
+_sequence = itertools.count()
+_explainer = ThreadPoolExecutor(max_workers=1,
+                                thread_name_prefix="slow-query-explain")
+# engines do EXPLAIN por URL: sem pool, para nao disputar as conexoes que o
+# pool dos requests dimensiona 1:1 com as threads (DB_POOL_SIZE)
+_explain_engines: dict[str, Engine] = {}
+
+
+def redact(parameters):
+    """Troca os valores dos parametros pelo tipo, para nao vazar dados."""
+    if isinstance(parameters, dict):
+        return {key: f"<{type(value).__name__}>"
+                for key, value in parameters.items()}
+    if isinstance(parameters, (list, tuple)):
+        return [f"<{type(value).__name__}>" for value in parameters]
+    return parameters
+
+
+def find_caller() -> Optional[str]:
+    """Primeiro metodo de repositorio na pilha (ex: OrderRepository.list)."""
+    frame = sys._getframe(1)
+    fallback = None
+    while frame is not None:
+        filename = frame.f_code.co_filename.replace("\\", "/")
+        if "/infrastructure/repositories/" in filename:
+            return frame.f_code.co_qualname
+        if (fallback is None and "/backend/src/" in filename and
+                "/infrastructure/" not in filename):
+            fallback = frame.f_code.co_qualname
+        frame = frame.f_back
+    return fallback
+
+
+def record(conn, statement: str, parameters, elapsed_ms: float,
+           executemany: bool) -> None:
+    """Registra um statement lento e agenda o EXPLAIN no Postgres."""
+    entry = {
+        "sql": statement,
+        "parameters": redact(parameters) if not executemany else "<many>",
+        "caller": find_caller(),
+        "duration_ms": round(elapsed_ms, 3),
+        "at": datetime.now().isoformat(),
+        "plan": None,
+    }
+    logger.warning("Slow query (%.1fms) in %s: %s | params=%s",
+                   elapsed_ms, entry["caller"], statement,
+                   entry["parameters"])
+
+    with _lock:
+        item = (elapsed_ms, next(_sequence), entry)
+        if len(_worst) < settings.slow_query_buffer_size:
+            heapq.heappush(_worst, item)
+        elif elapsed_ms > _worst[0][0]:
+            heapq.heapreplace(_worst, item)
+        else:
+            return
+
+    if (settings.slow_query_explain and not executemany and
+            conn.dialect.name == "postgresql" and
+            statement.lstrip()[:6].upper().startswith(_EXPLAINABLE)):
+        _explainer.submit(_explain, conn.engine, statement, parameters, entry)
+
+
+def explain_engine(engine: Engine) -> Engine:
+    """Engine sem pool (NullPool) para o EXPLAIN, fora do pool do engine."""
+    key = engine.url.render_as_string(hide_password=False)
+    with _lock:
+        if key not in _explain_engines:
+            _explain_engines[key] = create_engine(engine.url,
+                                                  poolclass=NullPool)
+        return _explain_engines[key]
+
+
+def _explain(engine, statement: str, parameters, entry: dict) -> None:
+    try:
+        # abre e fecha uma conexao propria: com o pool dos requests cheio o
+        # EXPLAIN nao espera por uma conexao nem ocupa uma de um request
+        with explain_engine(engine).connect() as conn:
+            plan = conn.exec_driver_sql(
+                f"EXPLAIN (ANALYZE off, FORMAT JSON) {statement}",
+                parameters).scalar()
+            conn.rollback()
+        entry["plan"] = plan
+    except Exception as e:
+        logger.info("Could not EXPLAIN slow query: %s", e)
+
+
+def worst() -> list[dict]:
+    with _lock:
+        return [entry for _, _, entry in sorted(_worst, reverse=True)]
+
+
+def clear() -> None:
+    with _lock:
+        _worst.clear()
@@ -1,99 +1,168 @@
 import asyncio
 import logging
+from contextlib import asynccontextmanager
 
 import uvicorn
+from anyio import CapacityLimiter, to_thread
 from fastapi import FastAPI, Request, HTTPException
 from fastapi.exceptions import RequestValidationError
 from starlette.middleware.cors import CORSMiddleware
 from starlette.responses import JSONResponse
 
-from backend.src.api.routers import products, customers, orders, health
+from backend.src import metrics
+from backend.src.api.compression import CompressionMiddleware
+from backend.src.api.dependencies import broadcaster
+from backend.src.api.middleware import timing_middleware, \
+    metrics_middleware, profiling_middleware, admission_middleware
+from backend.src.api.routers import products, customers, orders, health, \
+    debug, admin, reports, changes, events, batch, \
+    metrics as metrics_router
 from backend.src.exceptions import NotFoundException, BusinessRuleException, \
     DuplicateEntryException
-from backend.src.infrastructure.database import engine
-from backend.src.infrastructure.models import Base
+from backend.src.infrastructure.database import SessionLocal, get_engine, \
+    check_migrations, pool_capacity
+from backend.src.infrastructure.outbox import OutboxRelay, build_sinks
 from backend.src.settings import settings
 
-# Create database tables
-Base.metadata.create_all(bind=engine)
-
 # Configure logging
 logging.basicConfig(
     level=getattr(logging, settings.log_level),
     format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
 )
 
-app = FastAPI()
-request_locks = {}
-
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=settings.cors_origins,
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
-
-
-@app.middleware("http")
-async def idempotency_lock_middleware(request: Request, call_next):
-    if request.method != "POST":
-        return await call_next(request)
-
-    key = request.headers.get("Idempotency-Key")
-    if not key:
-        return await call_next(request)
 
-    lock = request_locks.setdefault(key, asyncio.Lock())
-
-    if lock.locked():
-        raise HTTPException(status_code=409,
-                            detail="Request already in progress")
-
-    async with lock:
-        try:
-            response = await call_next(request)
-        finally:
-            request_locks.pop(key, None)
-        return response
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # o engine nasce aqui, ja no processo do worker (depois do fork)
+    engine = get_engine()
+    if settings.db_check_migrations:
+        check_migrations(engine)
+    # threads para os handlers sincronos deste worker: uma por conexao do
+    # pool, para nenhuma thread ficar parada esperando conexao; a admissao
+    # deixa no maximo esse numero de requests em execucao
+    threads = settings.threadpool_size or pool_capacity()
+    to_thread.current_default_thread_limiter().total_tokens = threads
+    app.state.admission = CapacityLimiter(threads)
+
+    relay = None
+    if settings.outbox_relay_interval > 0:
+        relay = OutboxRelay(SessionLocal, build_sinks(settings.outbox_sinks),
+                            settings.outbox_relay_interval)
+        relay.start()
+    yield
+    await broadcaster.stop()
+    if relay is not None:
+        relay.stop()
 
 
 def _payload(code: int, msg: str):
     return {"cod_retorno": code, "mensagem": msg, "data": None}
 
 
-@app.exception_handler(NotFoundException)
 async def not_found_handler(request: Request, exc: NotFoundException):
     return JSONResponse(status_code=404, content=_payload(404, exc.detail))
 
 
-@app.exception_handler(DuplicateEntryException)
 async def duplicate_entry_handler(request: Request,
                                   exc: DuplicateEntryException):
     return JSONResponse(status_code=409, content=_payload(409, exc.detail))
 
 
-@app.exception_handler(BusinessRuleException)
 async def business_rule_handler(request: Request, exc: BusinessRuleException):
     return JSONResponse(status_code=422, content=_payload(422, exc.detail))
 
 
-@app.exception_handler(HTTPException)
 async def http_exception_handler(request: Request, exc: HTTPException):
     return JSONResponse(status_code=exc.status_code,
                         content=_payload(exc.status_code, exc.detail))
 
 
-@app.exception_handler(RequestValidationError)
 async def validation_handler(request: Request, exc: RequestValidationError):
     return JSONResponse(status_code=422,
                         content=_payload(422, "Validation error"))
 
 
-app.include_router(products.router, prefix="/api")
-app.include_router(customers.router, prefix="/api")
-app.include_router(orders.router, prefix="/api")
-app.include_router(health.router, prefix="/api")
+def create_app() -> FastAPI:
+    """
+    Monta a aplicacao sem tocar no banco: engine e checagem do schema ficam
+    no lifespan, que roda em cada worker.
+    """
+    app = FastAPI(lifespan=lifespan)
+    request_locks = {}
+
+    # a mais interna: as middlewares "http" repassam o body em pedacos e a
+    # compressao veria toda resposta como stream
+    app.add_middleware(
+        CompressionMiddleware,
+        minimum_size=settings.compression_min_size,
+        encodings=settings.compression_encodings,
+        gzip_level=settings.compression_gzip_level,
+        brotli_quality=settings.compression_brotli_quality,
+        zstd_level=settings.compression_zstd_level,
+    )
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=settings.cors_origins,
+        allow_credentials=True,
+        allow_methods=["*"],
+        allow_headers=["*"],
+    )
+
+    @app.middleware("http")
+    async def idempotency_lock_middleware(request: Request, call_next):
+        if request.method != "POST":
+            return await call_next(request)
+
+        key = request.headers.get("Idempotency-Key")
+        if not key:
+            return await call_next(request)
+
+        lock = request_locks.setdefault(key, asyncio.Lock())
+
+        if lock.locked():
+            metrics.IDEMPOTENCY_CONFLICTS.inc()
+            return JSONResponse(status_code=409,
+                                content=_payload(409,
+                                                 "Request already in "
+                                                 "progress"))
+
+        async with lock:
+            try:
+                response = await call_next(request)
+            finally:
+                request_locks.pop(key, None)
+            return response
+
+    app.middleware("http")(profiling_middleware)
+    app.middleware("http")(timing_middleware)
+    app.middleware("http")(admission_middleware)
+    app.middleware("http")(metrics_middleware)
+
+    app.add_exception_handler(NotFoundException, not_found_handler)
+    app.add_exception_handler(DuplicateEntryException,
+                              duplicate_entry_handler)
+    app.add_exception_handler(BusinessRuleException, business_rule_handler)
+    app.add_exception_handler(HTTPException, http_exception_handler)
+    app.add_exception_handler(RequestValidationError, validation_handler)
+
+    app.include_router(products.router, prefix="/api")
+    app.include_router(customers.router, prefix="/api")
+    app.include_router(orders.router, prefix="/api")
+    app.include_router(reports.router, prefix="/api")
+    app.include_router(changes.router, prefix="/api")
+    app.include_router(events.router, prefix="/api")
+    app.include_router(batch.router, prefix="/api")
+    app.include_router(health.router, prefix="/api")
+    app.include_router(admin.router, prefix="/api")
+    app.include_router(metrics_router.router)
+
+    if settings.debug:
+        app.include_router(debug.router, prefix="/api")
+
+    return app
+
+
+app = create_app()
 
 if __name__ == "__main__":
     uvicorn.run(
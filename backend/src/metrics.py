@@ -0,0 +1,108 @@
+import os
+
+from prometheus_client import (CONTENT_TYPE_LATEST, REGISTRY,
+                               CollectorRegistry, Counter, Gauge, Histogram,
+                               generate_latest, multiprocess)
+
+# Com varios workers o prometheus_client grava os valores em arquivos mmap
+# dentro de PROMETHEUS_MULTIPROC_DIR e o scrape agrega todos os processos.
+MULTIPROCESS = "PROMETHEUS_MULTIPROC_DIR" in os.environ
+
+HTTP_REQUESTS = Counter(
+    "http_requests_total", "HTTP requests by route and status",
+    ["method", "route", "status"])
+HTTP_LATENCY = Histogram(
+    "http_request_duration_seconds", "HTTP request latency by route",
+    ["method", "route"])
+HTTP_IN_FLIGHT = Gauge(
+    "http_requests_in_flight", "HTTP requests being processed",
+    multiprocess_mode="livesum")
+
+DB_POOL = Gauge(
+    "db_pool_connections", "Database pool connections by state",
+    ["state"], multiprocess_mode="livesum")
+DB_STATEMENT_LATENCY = Histogram(
+    "db_statement_duration_seconds", "SQL statement latency by operation",
+    ["operation"],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25,
+             0.5, 1.0, 2.5))
+
+THREADPOOL = Gauge(
+    "threadpool_threads", "Sync handler threadpool usage by state",
+    ["state"], multiprocess_mode="livesum")
+THREADPOOL_QUEUED = Gauge(
+    "threadpool_queued_requests",
+    "Requests waiting for admission to the sync handler threadpool",
+    multiprocess_mode="livesum")
+THREADPOOL_QUEUE_WAIT = Histogram(
+    "threadpool_queue_wait_seconds",
+    "Time requests waited for admission to the sync handler threadpool",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0))
+THREADPOOL_REJECTED = Counter(
+    "threadpool_rejected_requests_total",
+    "Requests answered with 503 because the threadpool queue wait exceeded "
+    "the budget")
+
+IDEMPOTENCY_CONFLICTS = Counter(
+    "idempotency_conflicts_total",
+    "POST requests rejected because the Idempotency-Key was in progress")
+
+DB_RETRIES = Counter(
+    "db_transaction_retries_total",
+    "Transactions retried after a deadlock/serialization/lock timeout",
+    ["operation"])
+
+SSE_CONNECTIONS = Gauge(
+    "sse_connections", "Open /api/events streams",
+    multiprocess_mode="livesum")
+SSE_RESYNCS = Counter(
+    "sse_resyncs_total",
+    "Slow SSE clients whose queue overflowed and were told to resync")
+
+CUSTOMER_SUGGEST_CACHE = Counter(
+    "customer_suggest_cache_total",
+    "Customer autocomplete lookups by cache result", ["result"])
+
+ORDERS = Counter("orders_total", "Order state changes", ["event"])
+STOCK_ADJUSTMENTS = Counter(
+    "stock_adjustments_total", "Product stock adjustments", ["reason"])
+
+_OPERATIONS = {"SELECT", "INSERT", "UPDATE", "DELETE"}
+
+
+def observe_statement(statement: str, elapsed_seconds: float) -> None:
+    operation = statement.lstrip()[:6].upper()
+    if operation not in _OPERATIONS:
+        operation = "OTHER"
+    DB_STATEMENT_LATENCY.labels(operation).observe(elapsed_seconds)
+
+
+def observe_pool(engine) -> None:
+    pool = engine.pool
+    if not hasattr(pool, "checkedout"):
+        return
+    DB_POOL.labels("checked_out").set(pool.checkedout())
+    DB_POOL.labels("idle").set(pool.checkedin())
+    DB_POOL.labels("overflow").set(max(pool.overflow(), 0))
+    DB_POOL.labels("size").set(pool.size())
+
+
+def observe_threadpool(limiter) -> None:
+    THREADPOOL.labels("busy").set(limiter.borrowed_tokens)
+    THREADPOOL.labels("total").set(limiter.total_tokens)
+    THREADPOOL.labels("waiting").set(limiter.statistics().tasks_waiting)
+
+
+def mark_process_dead(pid: int) -> None:
+    """Descarta os gauges live* de um worker que terminou (reciclado)."""
+    if MULTIPROCESS:
+        multiprocess.mark_process_dead(pid)
+
+
+def render() -> tuple[bytes, str]:
+    if MULTIPROCESS:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
@@ -0,0 +1,125 @@
+"""
+Servidor de producao: N workers uvicorn atras de um supervisor.
+
+    python -m backend.src.server [--workers N] [--max-requests M]
+
+- WEB_CONCURRENCY workers (padrao: um por CPU); cada worker cria o seu
+  engine e ajusta o threadpool dos handlers sincronos (THREADPOOL_SIZE) no
+  startup.
+- SIGTERM para de aceitar conexoes e espera ate GRACEFUL_TIMEOUT segundos
+  pelos requests em andamento (um pedido sendo gravado termina o commit).
+- Com MAX_REQUESTS o worker sai depois de M requests (+ ate
+  MAX_REQUESTS_JITTER) e o supervisor sobe outro, limitando o crescimento
+  de memoria.
+"""
+import argparse
+import logging
+import os
+import random
+from pathlib import Path
+from typing import Optional
+
+import uvicorn
+from uvicorn.supervisors import Multiprocess
+
+from backend.src import metrics
+from backend.src.settings import settings
+
+logger = logging.getLogger(__name__)
+
+APP = "backend.src.main:app"
+
+
+def worker_count(workers: Optional[int] = None) -> int:
+    workers = settings.web_concurrency if workers is None else workers
+    return workers if workers > 0 else (os.cpu_count() or 1)
+
+
+def build_config(workers: Optional[int] = None,
+                 max_requests: Optional[int] = None,
+                 host: Optional[str] = None,
+                 port: Optional[int] = None) -> uvicorn.Config:
+    max_requests = (settings.max_requests if max_requests is None
+                    else max_requests)
+    return uvicorn.Config(
+        APP,
+        host=host or settings.host,
+        port=port or settings.port,
+        workers=worker_count(workers),
+        limit_max_requests=max_requests or None,
+        timeout_graceful_shutdown=settings.graceful_timeout,
+        log_level=settings.log_level.lower(),
+        proxy_headers=True,
+    )
+
+
+class Server(uvicorn.Server):
+    """Worker com reciclagem escalonada e que fecha os streams SSE no dreno."""
+
+    def run(self, sockets=None) -> None:
+        # roda ja no processo do worker: cada um sorteia o seu limite
+        limit = self.config.limit_max_requests
+        if limit and settings.max_requests_jitter > 0:
+            self.config.limit_max_requests = limit + random.randint(
+                0, settings.max_requests_jitter)
+        super().run(sockets)
+
+    async def shutdown(self, sockets=None) -> None:
+        # streams SSE nao terminam sozinhos e segurariam o dreno ate o
+        # timeout; fecha antes de esperar os requests em andamento
+        from backend.src.api.dependencies import broadcaster
+        await broadcaster.stop()
+        await super().shutdown(sockets)
+
+
+class Supervisor(Multiprocess):
+    """Multiprocess do uvicorn que limpa as metricas dos workers reciclados."""
+
+    def keep_subprocess_alive(self) -> None:
+        before = {process.pid for process in self.processes}
+        super().keep_subprocess_alive()
+        for pid in before - {process.pid for process in self.processes}:
+            metrics.mark_process_dead(pid)
+
+
+def _reset_metrics_dir() -> None:
+    directory = os.environ.get("PROMETHEUS_MULTIPROC_DIR")
+    if directory:
+        # arquivos de uma execucao anterior somariam no scrape
+        for path in Path(directory).glob("*.db"):
+            path.unlink()
+    else:
+        logger.warning("PROMETHEUS_MULTIPROC_DIR is not set: /metrics will "
+                       "only show the worker that answers the scrape")
+
+
+def run(config: uvicorn.Config) -> None:
+    server = Server(config)
+    if config.workers <= 1:
+        server.run()
+        return
+
+    _reset_metrics_dir()
+    sock = config.bind_socket()
+    Supervisor(config, target=server.run, sockets=[sock]).run()
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse
+                                     .RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, default=None,
+                        help="padrao WEB_CONCURRENCY (0 = um por CPU)")
+    parser.add_argument("--max-requests", type=int, default=None,
+                        help="padrao MAX_REQUESTS (0 desliga)")
+    parser.add_argument("--host", default=None)
+    parser.add_argument("--port", type=int, default=None)
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=getattr(logging, settings.log_level))
+    run(build_config(args.workers, args.max_requests, args.host, args.port))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
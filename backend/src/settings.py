@@ -22,6 +22,78 @@ class Settings(BaseModel):
                   ":5432"
                   "/topsaudehub_db"))
 
+    # Concorrencia: espera maxima por lock (Postgres) e retentativas em
+    # deadlock/serializacao
+    db_lock_timeout_ms: int = int(os.getenv("DB_LOCK_TIMEOUT_MS", "2000"))
+    db_retry_attempts: int = int(os.getenv("DB_RETRY_ATTEMPTS", "3"))
+    db_retry_backoff_ms: float = float(os.getenv("DB_RETRY_BACKOFF_MS", "20"))
+    # Pool de conexoes por worker (Postgres): o threadpool dos handlers
+    # sincronos acompanha pool_size + max_overflow
+    db_pool_size: int = int(os.getenv("DB_POOL_SIZE", "5"))
+    db_max_overflow: int = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+    # psycopg prepara no servidor o statement executado N vezes na mesma
+    # conexao (negativo desliga, p.ex. atras de PgBouncer em modo transaction)
+    db_prepare_threshold: int = int(os.getenv("DB_PREPARE_THRESHOLD", "5"))
+    # No startup a API confere se o banco esta na head do Alembic
+    db_check_migrations: bool = os.getenv(
+        "DB_CHECK_MIGRATIONS", "true").lower() == "true"
+
+    # Outbox: sinks do relay (file:/caminho, http://url, memory), tamanho do
+    # lote e intervalo do relay dentro da API (0 desliga)
+    outbox_sinks: str = os.getenv("OUTBOX_SINKS", "")
+    outbox_batch_size: int = int(os.getenv("OUTBOX_BATCH_SIZE", "500"))
+    outbox_relay_interval: float = float(
+        os.getenv("OUTBOX_RELAY_INTERVAL", "0"))
+
+    # Pedidos: janela padrao da listagem sem created_min (dias; pedidos mais
+    # antigos so aparecem com created_min, 0 desliga e a listagem varre todas
+    # as particoes) e quantos meses de particoes futuras manter criados
+    orders_list_window_days: int = int(
+        os.getenv("ORDERS_LIST_WINDOW_DAYS", "365"))
+    orders_partition_months_ahead: int = int(
+        os.getenv("ORDERS_PARTITION_MONTHS_AHEAD", "3"))
+    # Arquivamento: pedidos PAID/CANCELLED mais velhos que N dias vao para
+    # orders_archive (mantenha acima da janela da listagem)
+    orders_archive_after_days: int = int(
+        os.getenv("ORDERS_ARCHIVE_AFTER_DAYS", "400"))
+    orders_archive_batch_size: int = int(
+        os.getenv("ORDERS_ARCHIVE_BATCH_SIZE", "1000"))
+
+    # Server-Sent Events (/api/events): intervalo de leitura do feed, fila
+    # por conexao e intervalo do heartbeat (segundos)
+    events_poll_interval: float = float(
+        os.getenv("EVENTS_POLL_INTERVAL", "1.0"))
+    events_queue_size: int = int(os.getenv("EVENTS_QUEUE_SIZE", "100"))
+    events_heartbeat: float = float(os.getenv("EVENTS_HEARTBEAT", "15"))
+
+    # Compressao das respostas: codificacoes em ordem de preferencia (br e
+    # zstd exigem os pacotes brotli/zstandard; vazio desliga), tamanho minimo
+    # em bytes e nivel de cada algoritmo
+    compression_encodings: List[str] = [
+        name.strip() for name in
+        os.getenv("COMPRESSION_ENCODINGS", "zstd,br,gzip").split(",")
+        if name.strip()]
+    compression_min_size: int = int(os.getenv("COMPRESSION_MIN_SIZE", "1024"))
+    compression_gzip_level: int = int(
+        os.getenv("COMPRESSION_GZIP_LEVEL", "6"))
+    compression_brotli_quality: int = int(
+        os.getenv("COMPRESSION_BROTLI_QUALITY", "4"))
+    compression_zstd_level: int = int(os.getenv("COMPRESSION_ZSTD_LEVEL", "3"))
+
+    # Autocomplete de clientes: maximo de sugestoes e cache por prefixo
+    # (segundos de validade e quantidade de prefixos por processo)
+    customer_suggest_limit: int = int(
+        os.getenv("CUSTOMER_SUGGEST_LIMIT", "10"))
+    customer_suggest_cache_ttl: float = float(
+        os.getenv("CUSTOMER_SUGGEST_CACHE_TTL", "30"))
+    customer_suggest_cache_size: int = int(
+        os.getenv("CUSTOMER_SUGGEST_CACHE_SIZE", "1000"))
+
+    # POST /api/batch: maximo de sub-requests por chamada e quantos rodam ao
+    # mesmo tempo com parallel=true (cada um com a sua conexao)
+    batch_max_requests: int = int(os.getenv("BATCH_MAX_REQUESTS", "20"))
+    batch_max_concurrency: int = int(os.getenv("BATCH_MAX_CONCURRENCY", "4"))
+
     # CORS
     cors_origins: List[str] = os.getenv("CORS_ORIGINS",
                                         "http://localhost:4200,"
@@ -31,9 +103,50 @@ class Settings(BaseModel):
     # Server
     host: str = os.getenv("HOST", "0.0.0.0")
     port: int = int(os.getenv("PORT", "8000"))
+    # python -m backend.src.server: workers (0 = um por CPU), threads para os
+    # handlers sincronos (0 = uma por conexao do pool), reciclagem do worker
+    # apos N requests (0 desliga) com jitter para nao reciclar todos juntos e
+    # espera maxima pelos requests em andamento no SIGTERM
+    web_concurrency: int = int(os.getenv("WEB_CONCURRENCY", "0"))
+    threadpool_size: int = int(os.getenv("THREADPOOL_SIZE", "0"))
+    max_requests: int = int(os.getenv("MAX_REQUESTS", "0"))
+    max_requests_jitter: int = int(os.getenv("MAX_REQUESTS_JITTER", "0"))
+    graceful_timeout: float = float(os.getenv("GRACEFUL_TIMEOUT", "30"))
+    # Admissao: request que espera mais que isso por uma thread volta 503
+    # com Retry-After (segundos) em vez de enfileirar (0 desliga)
+    threadpool_queue_timeout_ms: float = float(
+        os.getenv("THREADPOOL_QUEUE_TIMEOUT_MS", "1000"))
+    threadpool_retry_after: int = int(
+        os.getenv("THREADPOOL_RETRY_AFTER", "1"))
 
     # Logging
     log_level: str = os.getenv("LOG_LEVEL", "INFO")
 
+    # SQL instrumentation
+    sql_n_plus_one_threshold: int = int(
+        os.getenv("SQL_N_PLUS_ONE_THRESHOLD", "10"))
+    sql_raise_on_n_plus_one: bool = os.getenv(
+        "SQL_RAISE_ON_N_PLUS_ONE", "false").lower() == "true"
+    sql_debug_history: int = int(os.getenv("SQL_DEBUG_HISTORY", "50"))
+
+    # Slow query log
+    slow_query_threshold_ms: float = float(
+        os.getenv("SLOW_QUERY_THRESHOLD_MS", "200"))
+    slow_query_buffer_size: int = int(os.getenv("SLOW_QUERY_BUFFER_SIZE", "50"))
+    slow_query_explain: bool = os.getenv(
+        "SLOW_QUERY_EXPLAIN", "true").lower() == "true"
+
+    # Admin
+    admin_token: str = os.getenv("ADMIN_TOKEN", "")
+
+    # Profiling
+    profiling_enabled: bool = os.getenv(
+        "PROFILING_ENABLED", "false").lower() == "true"
+    profiling_mode: str = os.getenv("PROFILING_MODE", "sampling")
+    profiling_sample_rate: int = int(os.getenv("PROFILING_SAMPLE_RATE", "0"))
+    profiling_interval_ms: float = float(
+        os.getenv("PROFILING_INTERVAL_MS", "5"))
+    profiling_dir: str = os.getenv("PROFILING_DIR", "/tmp/topsaudehub-profiles")
+
 
 settings = Settings()
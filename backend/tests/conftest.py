@@ -30,9 +30,19 @@ def engine(sqlite_url):
         cur.execute("PRAGMA foreign_keys=ON;")
         cur.close()
 
-    # 2) criar as tabelas no engine de teste
+    from backend.src.infrastructure.instrumentation import install
+    install(engine)
+
+    # 2) criar as tabelas no engine de teste e marcar a head do Alembic
+    #    (o startup da API confere a revisao do banco)
+    from alembic.runtime.migration import MigrationContext
+    from alembic.script import ScriptDirectory
+    from backend.src.infrastructure.database import MIGRATIONS_DIR
     from backend.src.infrastructure.models import Base
     Base.metadata.create_all(bind=engine)
+    with engine.begin() as connection:
+        MigrationContext.configure(connection).stamp(
+            ScriptDirectory(str(MIGRATIONS_DIR)), "head")
     yield engine
     engine.dispose()
 
@@ -74,9 +84,9 @@ def test_session(engine) -> Generator[Session, None, None]:
 #    mas ligada ao MESMO connection do test_session (enxerga as fixtures)
 @pytest.fixture(scope="function")
 def client(engine, test_session):
-    # MONKEYPATCH no módulo de DB para usar nosso engine
+    # o engine do processo passa a ser o de teste
     import backend.src.infrastructure.database as dbmod
-    dbmod.engine = engine
+    dbmod.set_engine(engine)
 
     # (recarregar main se ele cria coisas no import)
     import backend.src.main as mainmod
@@ -99,6 +109,11 @@ def client(engine, test_session):
 
     app.dependency_overrides[dbmod.get_db] = override_get_db
 
+    # o cache do autocomplete e por processo: nao pode vazar entre testes
+    from backend.src.application.services.customer_service import \
+        suggestion_cache
+    suggestion_cache.clear()
+
     from fastapi.testclient import TestClient
     with TestClient(app) as c:
         yield c
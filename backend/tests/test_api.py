@@ -1,6 +1,7 @@
 import json
 
 import pytest
+from sqlalchemy import event
 
 
 class TestProductEndpoints:
@@ -212,6 +213,79 @@ class TestCustomerEndpoints:
         assert len(data["data"]["items"]) == 1
 
 
+    def test_customer_stats_follow_orders(self, client, sample_customer,
+                                          sample_product):
+        """Test order stats maintained on the customer by order changes."""
+        created = []
+        for _ in range(2):
+            created.append(client.post("/api/orders/", json={
+                "customer_id": sample_customer.id,
+                "items": [{"product_id": sample_product.id, "quantity": 1}]
+            }).json()["data"])
+        client.put(f"/api/orders/{created[0]['id']}/cancel")
+
+        data = client.get(f"/api/customers/{sample_customer.id}").json()["data"]
+        listed = client.get("/api/customers/?sort_field=lifetime_value"
+                            "&sort_order=-1&orders_min=1").json()["data"]
+
+        assert data["orders_count"] == 1
+        assert data["lifetime_value"] == created[1]["total_amount"]
+        assert data["last_order_at"] is not None
+        assert listed["total"] == 1
+        assert listed["items"][0]["id"] == sample_customer.id
+
+    def test_suggest_customers_by_name_prefix(self, client, engine,
+                                              multiple_customers):
+        """Test autocomplete by name prefix, in order and without a count."""
+        statements = []
+
+        def _record(conn, cursor, statement, *args):
+            statements.append(statement)
+
+        event.listen(engine, "before_cursor_execute", _record)
+        try:
+            response = client.get("/api/customers/suggest?q=CUSTOMER &limit=3")
+        finally:
+            event.remove(engine, "before_cursor_execute", _record)
+
+        assert response.status_code == 200
+        data = response.json()["data"]
+        assert [c["name"] for c in data] == ["Customer a", "Customer b",
+                                             "Customer c"]
+        assert set(data[0]) == {"id", "name", "email", "document"}
+        assert not [s for s in statements if "count(" in s.lower()]
+
+    def test_suggest_customers_by_email_and_document(self, client,
+                                                     multiple_customers):
+        """Test autocomplete falling back to e-mail and by document."""
+        by_email = client.get("/api/customers/suggest?q=customer1").json()
+        by_document = client.get(
+            "/api/customers/suggest?q=000.000.000-2").json()
+
+        assert sorted(c["email"] for c in by_email["data"]) == [
+            "customer10@example.com", "customer11@example.com",
+            "customer12@example.com", "customer1@example.com"]
+        assert [c["document"] for c in by_document["data"]] == [
+            f"000000000{i}" for i in range(20, 30)]
+
+    def test_suggest_cache_cleared_by_create(self, client, sample_customer):
+        """Test cached suggestions dropped when a customer is created."""
+        first = client.get("/api/customers/suggest?q=jane").json()["data"]
+        client.post("/api/customers", json={
+            "name": "Jane Roe", "email": "jane.roe@example.com",
+            "document": "12345678901"})
+        second = client.get("/api/customers/suggest?q=jane").json()["data"]
+
+        assert first == []
+        assert [c["name"] for c in second] == ["Jane Roe"]
+
+    def test_suggest_requires_term(self, client):
+        """Test autocomplete rejecting an empty term."""
+        response = client.get("/api/customers/suggest?q=")
+
+        assert response.status_code == 422
+
+
 class TestOrderEndpoints:
     """Test order API endpoints."""
 
@@ -234,6 +308,66 @@ class TestOrderEndpoints:
         assert "total_amount" in order
         assert "status" in order
 
+    def test_list_orders_by_product(self, client, sample_order,
+                                    multiple_orders, sample_product,
+                                    multiple_products):
+        """Test filtering orders that contain a product, by id or SKU."""
+        def totals(params):
+            response = client.get(f"/api/orders?first=0&rows=20&{params}")
+            assert response.status_code == 200
+            return response.json()["data"]["total"]
+
+        assert totals("sku=tes-001") == 10
+        assert totals(f"product_id={sample_product.id}") == 10
+        assert totals(f"product_id={multiple_products[2].id}") == 1
+        assert totals(f"sku={multiple_products[2].sku}"
+                      f"&product_id={sample_product.id}") == 0
+        assert totals("sku=ZZZ-999") == 0
+
+    def test_list_orders_headers_only(self, client, multiple_orders):
+        response = client.get("/api/orders?first=0&rows=10&include=")
+
+        orders = response.json()["data"]["items"]
+        assert response.status_code == 200
+        assert len(orders) == 10
+        assert all(o["items"] is None and o["customer"] is None
+                   for o in orders)
+
+    def test_list_orders_full_graph_is_bounded(self, client, multiple_orders):
+        def sql_count(query):
+            response = client.get(f"/api/orders?first=0&{query}")
+            assert response.status_code == 200
+            assert response.headers["X-SQL-N-Plus-One"] == "0"
+            return int(response.headers["X-SQL-Count"])
+
+        response = client.get("/api/orders?first=0&rows=10")
+        orders = response.json()["data"]["items"]
+        assert all(o["customer"]["id"] == o["customer_id"] for o in orders)
+        assert all(i["product"]["id"] == i["product_id"]
+                   for o in orders for i in o["items"])
+
+        headers = sql_count("rows=10&include=")
+        # um SELECT ... IN por relacionamento, qualquer que seja a pagina
+        assert sql_count("rows=5") == sql_count("rows=10") == headers + 3
+        assert sql_count("rows=10&include=customer") == headers + 1
+
+    def test_get_order_with_include(self, client, sample_order):
+        response = client.get(
+            f"/api/orders/{sample_order.id}?include=customer,items")
+
+        order = response.json()["data"]
+        assert order["customer"]["id"] == order["customer_id"]
+        assert order["items"]
+        assert all(i["product"] is None and i["product_id"]
+                   for i in order["items"])
+
+    def test_invalid_include_is_rejected(self, client, sample_order):
+        listing = client.get("/api/orders?include=payments")
+        single = client.get(f"/api/orders/{sample_order.id}?include=items,x")
+
+        assert listing.status_code == 422
+        assert single.status_code == 422
+
     def test_get_order_by_id(self, client, sample_order):
         """Test listing orders."""
         response = client.get("/api/orders/1")
@@ -251,6 +385,37 @@ class TestOrderEndpoints:
         assert "total_amount" in order
         assert "status" in order
 
+    def test_get_and_list_archived_order(self, client, test_session,
+                                         sample_order):
+        """Test archived orders stay readable by id and with include_archived."""
+        from datetime import datetime, timedelta
+
+        from backend.src.infrastructure.models.orders import OrderStatus
+        from backend.src.infrastructure.repositories.order_repository import \
+            OrderRepository
+
+        sample_order.status = OrderStatus.PAID
+        sample_order.created_at = datetime.now() - timedelta(days=500)
+        for item in sample_order.items:
+            item.order_created_at = sample_order.created_at
+        test_session.flush()
+        OrderRepository(test_session).archive(
+            datetime.now() - timedelta(days=400), batch_size=10)
+        test_session.expunge_all()
+
+        order = client.get(f"/api/orders/{sample_order.id}")
+        default = client.get("/api/orders/?first=0&rows=10")
+        archived = client.get("/api/orders/", params={
+            "first": 0, "rows": 10, "include_archived": True,
+            "created_min": (datetime.now() - timedelta(days=600)).isoformat()})
+
+        assert order.status_code == 200
+        assert order.json()["data"]["status"] == "PAID"
+        assert len(order.json()["data"]["items"]) == len(sample_order.items)
+        assert default.json()["data"]["total"] == 0
+        assert [o["id"] for o in archived.json()["data"]["items"]] == \
+            [sample_order.id]
+
     def test_list_orders_with_sorting(self, client, sample_order):
         """Test listing orders with ascending sort."""
         response = client.get("/api/orders/?first=0&rows=10&sort_field=id&sort_order=1")
@@ -259,6 +424,20 @@ class TestOrderEndpoints:
         data = response.json()
         assert data["cod_retorno"] == 200
 
+    def test_create_order_insufficient_stock(self, client, sample_customer,
+                                             sample_product):
+        """Test ordering more than the stock returns 409 and keeps stock."""
+        response = client.post("/api/orders/", json={
+            "customer_id": sample_customer.id,
+            "items": [{"product_id": sample_product.id,
+                       "quantity": sample_product.stock_qty + 1}]})
+        product = client.get(f"/api/products/{sample_product.id}").json()
+
+        assert response.status_code == 409
+        assert response.json()["cod_retorno"] == 409
+        assert str(sample_product.id) in response.json()["mensagem"]
+        assert product["data"]["stock_qty"] == sample_product.stock_qty
+
     def test_create_order(self, client, sample_customer, sample_product):
         """Test creating a new order."""
         new_order = {
@@ -338,6 +517,425 @@ class TestOrderEndpoints:
         assert data["data"]["status"] == "CANCELLED"
 
 
+class TestBulkOrderTransitions:
+    """Test bulk charge/cancel endpoints."""
+
+    def _orders(self, client, customer, product, count):
+        return [client.post("/api/orders/", json={
+            "customer_id": customer.id,
+            "items": [{"product_id": product.id, "quantity": 1}]
+        }).json()["data"]["id"] for _ in range(count)]
+
+    def test_charge_many_by_ids(self, client, sample_customer,
+                                sample_product):
+        ids = self._orders(client, sample_customer, sample_product, 3)
+        client.put(f"/api/orders/{ids[0]}/cancel")
+
+        response = client.post("/api/orders/charge",
+                               json={"ids": ids + [999]})
+
+        data = response.json()["data"]
+        assert response.status_code == 200
+        assert [o["result"] for o in data] == ["skipped", "changed",
+                                               "changed", "not_found"]
+        assert data[0]["status"] == "CANCELLED"
+        assert client.get(f"/api/orders/{ids[1]}").json()["data"][
+                   "status"] == "PAID"
+        daily = client.get("/api/reports/daily").json()["data"]["items"][0]
+        assert daily["orders_count"] == 2
+        assert daily["paid_revenue"] == daily["revenue"]
+
+    def test_cancel_many_by_filter_restocks(self, client, sample_customer,
+                                            sample_product):
+        ids = self._orders(client, sample_customer, sample_product, 4)
+        client.post("/api/orders/charge", json={"ids": ids[:1]})
+
+        response = client.post("/api/orders/cancel",
+                               json={"filter": {"status": "CREATED"}})
+
+        data = response.json()["data"]
+        assert sorted(o["id"] for o in data) == ids[1:]
+        assert all(o["result"] == "changed" for o in data)
+        product = client.get(f"/api/products/{sample_product.id}").json()
+        assert product["data"]["stock_qty"] == sample_product.stock_qty - 1
+        customer = client.get(f"/api/customers/{sample_customer.id}").json()
+        assert customer["data"]["orders_count"] == 1
+
+    def test_bulk_events_carry_total_amount(self, client, test_session,
+                                            sample_customer, sample_product):
+        from sqlalchemy import select
+        from backend.src.infrastructure.models import OutboxEventModel
+
+        ids = self._orders(client, sample_customer, sample_product, 2)
+
+        client.post("/api/orders/charge", json={"ids": ids})
+
+        events = test_session.scalars(
+            select(OutboxEventModel)
+            .where(OutboxEventModel.event == "charged")
+            .order_by(OutboxEventModel.entity_id)).all()
+        totals = [client.get(f"/api/orders/{i}").json()["data"][
+                      "total_amount"] for i in ids]
+        assert [e.entity_id for e in events] == ids
+        assert [float(e.payload["total_amount"]) for e in events] == totals
+
+    def test_bulk_filter_is_capped(self, client, sample_customer,
+                                   sample_product, monkeypatch):
+        from backend.src.application.services import order_service
+
+        ids = self._orders(client, sample_customer, sample_product, 3)
+        monkeypatch.setattr(order_service, "BULK_MAX_ORDERS", 2)
+
+        response = client.post("/api/orders/cancel",
+                               json={"filter": {"status": "CREATED"}})
+
+        assert response.status_code == 422
+        assert "more than 2 orders" in response.json()["mensagem"]
+        assert all(client.get(f"/api/orders/{i}").json()["data"]["status"]
+                   == "CREATED" for i in ids)
+
+    def test_bulk_requires_ids_or_filter(self, client):
+        neither = client.post("/api/orders/charge", json={})
+        both = client.post("/api/orders/charge",
+                           json={"ids": [1], "filter": {}})
+
+        assert neither.status_code == 422
+        assert both.status_code == 422
+
+
+class TestBatchEndpoint:
+    """Test POST /api/batch."""
+
+    @pytest.fixture
+    def other_order(self, test_session):
+        from datetime import datetime
+
+        from backend.src.infrastructure.models import CustomerModel, \
+            OrderModel
+        from backend.src.infrastructure.models.orders import OrderStatus
+
+        customer = CustomerModel(name="Jane Roe", email="jane.roe@example.com",
+                                 document="98765432100",
+                                 created_at=datetime.now())
+        test_session.add(customer)
+        test_session.flush()
+        order = OrderModel(customer_id=customer.id, total_amount=10,
+                           status=OrderStatus.CREATED,
+                           created_at=datetime.now())
+        test_session.add(order)
+        test_session.flush()
+        return order
+
+    def _form_batch(self, customer, product, parallel=False):
+        return {"parallel": parallel, "requests": [
+            {"path": f"/api/customers/{customer.id}"},
+            {"path": f"/api/products/{product.id}"},
+            {"path": "/api/orders",
+             "query": {"first": 0, "rows": 5, "customer": customer.document}},
+        ]}
+
+    def test_runs_sub_requests_in_order(self, client, sample_customer,
+                                        sample_product, sample_order,
+                                        other_order):
+        response = client.post("/api/batch", json=self._form_batch(
+            sample_customer, sample_product))
+
+        data = response.json()["data"]
+        assert response.status_code == 200
+        assert [item["status"] for item in data] == [200, 200, 200]
+        assert data[0]["body"]["data"]["id"] == sample_customer.id
+        assert data[1]["body"]["data"]["sku"] == sample_product.sku
+        assert [o["id"] for o in data[2]["body"]["data"]["items"]] == \
+            [sample_order.id]
+
+    def test_parallel_matches_sequential(self, client, sample_customer,
+                                         sample_product, sample_order,
+                                         other_order, monkeypatch):
+        from backend.src.settings import settings
+
+        # as sessions de teste dividem uma conexao: um sub-request por vez
+        monkeypatch.setattr(settings, "batch_max_concurrency", 1)
+        sequential = client.post("/api/batch", json=self._form_batch(
+            sample_customer, sample_product)).json()["data"]
+        parallel = client.post("/api/batch", json=self._form_batch(
+            sample_customer, sample_product, parallel=True)).json()["data"]
+
+        assert parallel == sequential
+
+    def _track_concurrency(self, monkeypatch):
+        import anyio
+
+        import backend.src.api.batch as batchmod
+
+        dispatch, running = batchmod._dispatch, {"now": 0, "max": 0}
+
+        async def tracked(parent, item):
+            running["now"] += 1
+            running["max"] = max(running["max"], running["now"])
+            try:
+                await anyio.sleep(0.01)
+                return await dispatch(parent, item)
+            finally:
+                running["now"] -= 1
+
+        monkeypatch.setattr(batchmod, "_dispatch", tracked)
+        return running
+
+    def test_parallel_without_free_admission_slots_runs_in_sequence(
+            self, client, monkeypatch):
+        from anyio import CapacityLimiter
+
+        # a unica vaga fica com o proprio batch
+        monkeypatch.setattr(client.app.state, "admission", CapacityLimiter(1))
+        running = self._track_concurrency(monkeypatch)
+
+        response = client.post("/api/batch", json={
+            "parallel": True, "requests": [{"path": "/api/health/"}] * 4})
+
+        assert [item["status"] for item in response.json()["data"]] == \
+            [200] * 4
+        assert running["max"] == 1
+        assert client.app.state.admission.borrowed_tokens == 0
+
+    def test_parallel_sub_requests_take_admission_slots(self, client,
+                                                        monkeypatch):
+        from anyio import CapacityLimiter
+
+        from backend.src.settings import settings
+
+        monkeypatch.setattr(settings, "batch_max_concurrency", 4)
+        # o batch e mais um sub-request; os demais dividem a vaga do batch
+        monkeypatch.setattr(client.app.state, "admission", CapacityLimiter(2))
+        running = self._track_concurrency(monkeypatch)
+
+        response = client.post("/api/batch", json={
+            "parallel": True, "requests": [{"path": "/api/health/"}] * 4})
+
+        assert [item["status"] for item in response.json()["data"]] == \
+            [200] * 4
+        assert running["max"] == 2
+        assert client.app.state.admission.borrowed_tokens == 0
+
+    def test_failures_are_reported_per_item(self, client, sample_product):
+        response = client.post("/api/batch", json={"requests": [
+            {"path": "/api/products/999999"},
+            {"path": "/api/unknown"},
+            {"path": "/api/products", "query": {"rows": 1000}},
+            {"path": "/api/batch"},
+            {"path": f"/api/products/{sample_product.id}"},
+        ]})
+
+        data = response.json()["data"]
+        assert response.status_code == 200
+        assert [item["status"] for item in data] == [404, 404, 422, 400, 200]
+        assert data[0]["body"]["cod_retorno"] == 404
+        assert data[4]["body"]["data"]["id"] == sample_product.id
+
+    def test_list_query_values(self, client, multiple_products):
+        response = client.post("/api/batch", json={"requests": [
+            {"path": "/api/products",
+             "query": {"first": 0, "rows": 5, "is_active": True,
+                       "sort_field": "price", "sort_order": 1}},
+        ]})
+
+        body = response.json()["data"][0]["body"]
+        assert all(p["is_active"] for p in body["data"]["items"])
+        prices = [p["price"] for p in body["data"]["items"]]
+        assert prices == sorted(prices)
+
+    def test_rejects_invalid_batches(self, client):
+        from backend.src.settings import settings
+
+        empty = client.post("/api/batch", json={"requests": []})
+        write = client.post("/api/batch", json={"requests": [
+            {"method": "POST", "path": "/api/orders"}]})
+        outside = client.post("/api/batch", json={"requests": [
+            {"path": "/metrics"}]})
+        too_many = client.post("/api/batch", json={"requests": [
+            {"path": "/api/health/"}] * (settings.batch_max_requests + 1)})
+
+        assert [r.status_code for r in (empty, write, outside, too_many)] \
+            == [422, 422, 422, 422]
+
+    def test_sequential_batch_shares_one_session(self, client, monkeypatch):
+        import backend.src.api.batch as batchmod
+        from backend.src.infrastructure.database import SessionLocal
+
+        created = []
+
+        def session_factory():
+            created.append(SessionLocal())
+            return created[-1]
+
+        # sem o override de teste o get_db usa a session do batch
+        client.app.dependency_overrides.clear()
+        monkeypatch.setattr(batchmod, "SessionLocal", session_factory)
+
+        response = client.post("/api/batch", json={
+            "requests": [{"path": "/api/health/"}] * 3})
+
+        assert [item["status"] for item in response.json()["data"]] == \
+            [200, 200, 200]
+        assert len(created) == 1
+
+    def test_get_db_yields_shared_session(self):
+        from unittest.mock import MagicMock
+
+        from backend.src.infrastructure.database import get_db, \
+            shared_session
+
+        session = MagicMock()
+        with shared_session(session):
+            dependency = get_db()
+            assert next(dependency) is session
+            with pytest.raises(StopIteration):
+                next(dependency)
+
+        session.close.assert_not_called()
+
+
+class TestChangeFeed:
+    """Test the outbox-backed change feed."""
+
+    def _relay(self, test_session):
+        from sqlalchemy.orm import sessionmaker
+        from backend.src.infrastructure.outbox import MemorySink, relay_once
+
+        sink = MemorySink()
+        session = sessionmaker(bind=test_session.bind)()
+        try:
+            relay_once(session, [sink])
+        finally:
+            session.close()
+        return sink
+
+    def test_changes_follow_cursor(self, client, test_session,
+                                   sample_customer, sample_product):
+        order = client.post("/api/orders/", json={
+            "customer_id": sample_customer.id,
+            "items": [{"product_id": sample_product.id, "quantity": 2}]
+        }).json()["data"]
+
+        assert client.get("/api/changes").json()["data"]["items"] == []
+        sink = self._relay(test_session)
+        first = client.get("/api/changes?since=0").json()["data"]
+
+        client.put(f"/api/orders/{order['id']}/charge")
+        self._relay(test_session)
+        second = client.get(f"/api/changes?since={first['next']}").json()
+
+        assert [(c["entity"], c["event"]) for c in first["items"]] == [
+            ("order", "created"), ("product", "stock_adjusted")]
+        assert first["items"][1]["payload"] == {"delta": -2,
+                                                "reason": "order_created"}
+        assert [e["position"] for e in sink.events] == [1, 2]
+        assert first["next"] == 2
+        assert [c["event"] for c in second["data"]["items"]] == ["charged"]
+        assert second["data"]["next"] == 3
+
+    def test_changes_entity_filter(self, client, test_session,
+                                   sample_product):
+        client.put("/api/products/", json={
+            "id": sample_product.id, "name": "Renamed", "sku": "REN-001",
+            "price": 10.0, "stock_qty": 3, "is_active": True})
+        self._relay(test_session)
+
+        orders = client.get("/api/changes?entity=order").json()["data"]
+        products = client.get("/api/changes?entity=product").json()["data"]
+
+        assert orders == {"items": [], "next": 0}
+        assert products["items"][0]["payload"]["stock_qty"] == 3
+
+
+class TestEventStream:
+    """Test the SSE change notifications."""
+
+    @pytest.fixture
+    def stream(self, client, test_session):
+        """Broadcaster que entrega o feed ja publicado e fecha o stream."""
+        from sqlalchemy.orm import sessionmaker
+        from backend.src.api.dependencies import get_broadcaster
+        from backend.src.infrastructure.events import Broadcaster, \
+            OutboxSource
+
+        class OneShotBroadcaster(Broadcaster):
+            async def _run(self):
+                # sem polling em paralelo: a conexao do teste e compartilhada
+                return
+
+            async def subscribe(self, entities=(), ids=()):
+                subscription = await super().subscribe(entities, ids)
+                self.position = 0
+                await self.poll()
+                subscription.close()
+                return subscription
+
+        broadcaster = OneShotBroadcaster(
+            OutboxSource(sessionmaker(bind=test_session.bind)),
+            interval=0.01, queue_size=10)
+        client.app.dependency_overrides[get_broadcaster] = \
+            lambda: broadcaster
+
+        def get(url, **kwargs):
+            response = client.get(url, **kwargs)
+            events = [dict(line.split(": ", 1) for line in block.splitlines())
+                      for block in response.text.split("\n\n")
+                      if block.startswith("id:")]
+            return response, events
+
+        return get
+
+    def _publish(self, client, test_session, sample_customer, sample_product):
+        from sqlalchemy.orm import sessionmaker
+        from backend.src.infrastructure.outbox import relay_once
+
+        order = client.post("/api/orders/", json={
+            "customer_id": sample_customer.id,
+            "items": [{"product_id": sample_product.id, "quantity": 1}]
+        }).json()["data"]
+        session = sessionmaker(bind=test_session.bind)()
+        try:
+            relay_once(session, [])
+        finally:
+            session.close()
+        return order
+
+    def test_stream_filters_by_entity(self, client, stream, test_session,
+                                      sample_customer, sample_product):
+        order = self._publish(client, test_session, sample_customer,
+                              sample_product)
+
+        response, events = stream("/api/events?entity=order")
+
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith(
+            "text/event-stream")
+        assert response.headers["cache-control"] == "no-cache"
+        assert response.text.startswith("retry: ")
+        assert [(e["id"], e["event"]) for e in events] == [("1", "change")]
+        assert json.loads(events[0]["data"]) == {
+            "entity": "order", "id": order["id"], "version": 1,
+            "event": "created"}
+
+    def test_stream_replays_after_last_event_id(self, client, stream,
+                                                test_session, sample_customer,
+                                                sample_product):
+        self._publish(client, test_session, sample_customer, sample_product)
+
+        _, events = stream(f"/api/events?entity=product"
+                           f"&id={sample_product.id}",
+                           headers={"Last-Event-ID": "1"})
+
+        # o replay e o broadcaster entregam o aviso 2 uma unica vez
+        assert [json.loads(e["data"])["event"] for e in events] == [
+            "stock_adjusted"]
+
+    def test_stream_rejects_unknown_entity(self, client):
+        response = client.get("/api/events?entity=customer")
+
+        assert response.status_code == 422
+
+
 class TestErrorHandling:
     """Test error handling middleware."""
 
@@ -427,3 +1025,489 @@ class TestPaginationAndSorting:
         items = data["data"]["items"]
         prices = [item["price"] for item in items]
         assert prices == sorted(prices, reverse=True)
+
+
+class TestAppStartup:
+    """Test the app factory and the startup schema check."""
+
+    @pytest.fixture
+    def process_engine(self, monkeypatch):
+        import backend.src.infrastructure.database as dbmod
+
+        # restaura o engine do processo no fim do teste
+        monkeypatch.setattr(dbmod, "_engine", None)
+        monkeypatch.setattr(dbmod, "_engine_pid", None)
+        return dbmod
+
+    def test_psycopg_prepare_threshold(self, process_engine, monkeypatch):
+        from backend.src.settings import settings
+
+        url = "postgresql+psycopg://u:p@db/app"
+        monkeypatch.setattr(settings, "db_prepare_threshold", 2)
+        prepared = process_engine._connect_args(url)
+        monkeypatch.setattr(settings, "db_prepare_threshold", -1)
+        disabled = process_engine._connect_args(url)
+
+        assert prepared["prepare_threshold"] == 2
+        assert disabled["prepare_threshold"] is None
+        assert "prepare_threshold" not in process_engine._connect_args(
+            "postgresql://u:p@db/app")
+        assert process_engine._connect_args("sqlite:///app.db") == {}
+
+    def test_create_app_does_not_touch_database(self, process_engine):
+        from backend.src.main import create_app
+
+        app = create_app()
+
+        assert any(route.path == "/api/health/" for route in app.routes)
+        assert process_engine._engine is None
+
+    def test_startup_requires_alembic_head(self, process_engine, tmp_path):
+        from fastapi.testclient import TestClient
+
+        from backend.src.infrastructure.models import Base
+        from backend.src.main import create_app
+
+        engine = process_engine.create_db_engine(
+            f"sqlite:///{tmp_path / 'unmigrated.db'}")
+        Base.metadata.create_all(bind=engine)
+        process_engine.set_engine(engine)
+
+        with pytest.raises(RuntimeError, match="alembic upgrade head"):
+            with TestClient(create_app()):
+                pass
+        engine.dispose()
+
+    def test_startup_sizes_threadpool(self, process_engine, engine,
+                                      monkeypatch):
+        from fastapi.testclient import TestClient
+
+        from backend.src.main import create_app
+        from backend.src.settings import settings
+
+        monkeypatch.setattr(settings, "threadpool_size", 17)
+        process_engine.set_engine(engine)
+
+        with TestClient(create_app()) as client:
+            body = client.get("/metrics").text
+
+        assert 'threadpool_threads{state="total"} 17.0' in body
+
+    def test_threadpool_follows_db_pool(self, process_engine, engine,
+                                        monkeypatch):
+        from fastapi.testclient import TestClient
+
+        from backend.src.main import create_app
+        from backend.src.settings import settings
+
+        monkeypatch.setattr(settings, "threadpool_size", 0)
+        monkeypatch.setattr(settings, "db_pool_size", 3)
+        monkeypatch.setattr(settings, "db_max_overflow", 4)
+        process_engine.set_engine(engine)
+
+        with TestClient(create_app()) as client:
+            body = client.get("/metrics").text
+            assert client.app.state.admission.total_tokens == 7
+
+        assert 'threadpool_threads{state="total"} 7.0' in body
+
+    def test_startup_check_can_be_disabled(self, process_engine, tmp_path,
+                                           monkeypatch):
+        from fastapi.testclient import TestClient
+
+        from backend.src.main import create_app
+        from backend.src.settings import settings
+
+        monkeypatch.setattr(settings, "db_check_migrations", False)
+        engine = process_engine.create_db_engine(
+            f"sqlite:///{tmp_path / 'empty.db'}")
+        process_engine.set_engine(engine)
+
+        with TestClient(create_app()) as client:
+            response = client.get("/api/health/")
+
+        assert response.status_code == 200
+        engine.dispose()
+
+
+class TestServerLauncher:
+    """Test the production launcher configuration and worker hooks."""
+
+    def test_workers_default_to_cpu_count(self, monkeypatch):
+        import os
+
+        from backend.src import server
+        from backend.src.settings import settings
+
+        monkeypatch.setattr(settings, "web_concurrency", 0)
+        monkeypatch.setattr(settings, "max_requests", 0)
+
+        config = server.build_config()
+
+        assert config.workers == (os.cpu_count() or 1)
+        assert config.limit_max_requests is None
+        assert config.timeout_graceful_shutdown == settings.graceful_timeout
+        assert server.build_config(workers=3, max_requests=500).workers == 3
+
+    def test_recycling_limit_gets_jitter(self, monkeypatch):
+        import uvicorn
+
+        from backend.src import server
+        from backend.src.settings import settings
+
+        monkeypatch.setattr(settings, "max_requests_jitter", 50)
+        limits = []
+        monkeypatch.setattr(uvicorn.Server, "run", lambda self, sockets=None:
+                            limits.append(self.config.limit_max_requests))
+
+        for _ in range(20):
+            server.Server(server.build_config(workers=1,
+                                              max_requests=1000)).run()
+
+        assert all(1000 <= limit <= 1050 for limit in limits)
+        assert len(set(limits)) > 1
+
+    def test_shutdown_closes_event_streams(self, monkeypatch):
+        import asyncio
+
+        import uvicorn
+
+        from backend.src import server
+        from backend.src.api.dependencies import broadcaster
+
+        async def drain(self, sockets=None):
+            pass
+
+        monkeypatch.setattr(uvicorn.Server, "shutdown", drain)
+        monkeypatch.setattr(broadcaster.source, "head", lambda: 0)
+
+        async def scenario():
+            subscription = await broadcaster.subscribe()
+            await server.Server(server.build_config(workers=1)).shutdown()
+            return subscription
+
+        subscription = asyncio.run(scenario())
+
+        assert subscription.closed
+        assert subscription.queue.get_nowait() is None
+        broadcaster.unsubscribe(subscription)
+
+
+class TestMetricsEndpoint:
+    """Test Prometheus metrics exposition."""
+
+    def test_metrics_exposition(self, client, sample_product):
+        client.get(f"/api/products/{sample_product.id}")
+
+        response = client.get("/metrics")
+
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/plain")
+        body = response.text
+        assert ('http_requests_total{method="GET",'
+                'route="/api/products/{product_id}",status="200"}') in body
+        assert "http_request_duration_seconds_bucket" in body
+        assert "http_requests_in_flight" in body
+        assert "db_statement_duration_seconds_count" in body
+        assert 'db_pool_connections{state="checked_out"}' in body
+        assert 'threadpool_threads{state="total"}' in body
+
+    def test_business_counters(self, client, sample_customer, sample_product):
+        from backend.src import metrics
+
+        before = metrics.ORDERS.labels("created")._value.get()
+        client.post("/api/orders/", json={
+            "customer_id": sample_customer.id,
+            "items": [{"product_id": sample_product.id, "quantity": 1}]
+        })
+
+        assert metrics.ORDERS.labels("created")._value.get() == before + 1
+        assert 'orders_total{event="created"}' in client.get("/metrics").text
+
+
+class TestThreadpoolAdmission:
+    """Test the admission limit in front of the sync handler threadpool."""
+
+    class FullLimiter:
+        async def acquire_on_behalf_of(self, borrower):
+            import anyio
+            await anyio.sleep_forever()
+
+    def test_admitted_request_releases_slot(self, client, sample_product):
+        from backend.src import metrics
+
+        before = metrics.THREADPOOL_QUEUE_WAIT._sum.get()
+        response = client.get(f"/api/products/{sample_product.id}")
+
+        assert response.status_code == 200
+        assert client.app.state.admission.borrowed_tokens == 0
+        assert metrics.THREADPOOL_QUEUE_WAIT._sum.get() > before
+
+    def test_rejects_when_queue_wait_exceeds_budget(self, client,
+                                                    monkeypatch):
+        from backend.src import metrics
+        from backend.src.settings import settings
+
+        monkeypatch.setattr(settings, "threadpool_queue_timeout_ms", 20)
+        monkeypatch.setattr(settings, "threadpool_retry_after", 2)
+        monkeypatch.setattr(client.app.state, "admission", self.FullLimiter())
+        before = metrics.THREADPOOL_REJECTED._value.get()
+
+        response = client.get("/api/products?first=0&rows=10")
+
+        assert response.status_code == 503
+        assert response.headers["Retry-After"] == "2"
+        assert response.json()["cod_retorno"] == 503
+        assert metrics.THREADPOOL_REJECTED._value.get() == before + 1
+        assert "threadpool_rejected_requests_total" in \
+            client.get("/metrics").text
+
+    def test_health_is_not_rejected(self, client, monkeypatch):
+        from backend.src.settings import settings
+
+        monkeypatch.setattr(settings, "threadpool_queue_timeout_ms", 20)
+        monkeypatch.setattr(client.app.state, "admission", self.FullLimiter())
+
+        assert client.get("/api/health/").status_code == 200
+
+    def test_budget_zero_disables_admission(self, client, sample_product,
+                                            monkeypatch):
+        from backend.src.settings import settings
+
+        monkeypatch.setattr(settings, "threadpool_queue_timeout_ms", 0)
+        monkeypatch.setattr(client.app.state, "admission", self.FullLimiter())
+
+        response = client.get(f"/api/products/{sample_product.id}")
+
+        assert response.status_code == 200
+
+
+class TestCompression:
+    """Test Accept-Encoding negotiated response compression."""
+
+    def test_large_list_is_gzipped(self, client, multiple_products):
+        response = client.get("/api/products?first=0&rows=15",
+                              headers={"Accept-Encoding": "gzip"})
+
+        assert response.status_code == 200
+        assert response.headers["content-encoding"] == "gzip"
+        assert "Accept-Encoding" in response.headers["vary"]
+        assert int(response.headers["content-length"]) < len(response.content)
+        assert len(response.json()["data"]["items"]) == 15
+
+    def test_small_response_is_not_compressed(self, client):
+        response = client.get("/api/health/",
+                              headers={"Accept-Encoding": "gzip"})
+
+        assert response.status_code == 200
+        assert "content-encoding" not in response.headers
+
+    def test_identity_when_client_refuses(self, client, multiple_products):
+        for accept in ("identity", "gzip;q=0"):
+            response = client.get("/api/products?first=0&rows=15",
+                                  headers={"Accept-Encoding": accept})
+
+            assert "content-encoding" not in response.headers
+            assert len(response.json()["data"]["items"]) == 15
+
+    def test_choose_encoding(self):
+        from backend.src.api.compression import choose_encoding
+
+        available = ["zstd", "br", "gzip"]
+        assert choose_encoding("gzip, br, zstd", available) == "zstd"
+        assert choose_encoding("gzip, br;q=0.5", available) == "gzip"
+        assert choose_encoding("*", ["gzip"]) == "gzip"
+        assert choose_encoding("br;q=0, *;q=0.1", ["br", "gzip"]) == "gzip"
+        assert choose_encoding("deflate", available) is None
+        assert choose_encoding("", available) is None
+
+    def test_streaming_response_is_compressed_per_chunk(self):
+        import gzip
+
+        from fastapi import FastAPI
+        from fastapi.responses import StreamingResponse
+        from fastapi.testclient import TestClient
+
+        from backend.src.api.compression import CompressionMiddleware
+
+        rows = [f"{i};product {i};{i * 10}\n".encode() for i in range(500)]
+        app = FastAPI()
+        app.add_middleware(CompressionMiddleware, minimum_size=10,
+                           encodings=["gzip"])
+
+        @app.get("/export")
+        def export():
+            return StreamingResponse(iter(rows), media_type="text/csv")
+
+        response = TestClient(app).get(
+            "/export", headers={"Accept-Encoding": "gzip"})
+
+        assert response.headers["content-encoding"] == "gzip"
+        assert "content-length" not in response.headers
+        assert response.content == b"".join(rows)
+        assert len(gzip.compress(response.content)) < len(response.content)
+
+    def test_unavailable_encodings_are_ignored(self):
+        from backend.src.api.compression import available_encodings
+
+        assert "gzip" in available_encodings(["zstd", "br", "gzip"])
+        assert available_encodings(["deflate"]) == []
+
+
+class TestProfiling:
+    """Test on-demand request profiling."""
+
+    @pytest.fixture
+    def profiling(self, monkeypatch, tmp_path):
+        from backend.src.settings import settings
+
+        monkeypatch.setattr(settings, "profiling_enabled", True)
+        monkeypatch.setattr(settings, "admin_token", "secret")
+        monkeypatch.setattr(settings, "profiling_dir",
+                            str(tmp_path / "profiles"))
+        monkeypatch.setattr(settings, "profiling_interval_ms", 0.1)
+        return tmp_path / "profiles"
+
+    def test_profile_on_demand_cprofile(self, client, profiling,
+                                        sample_product):
+        import pstats
+
+        response = client.get(f"/api/products/{sample_product.id}",
+                              headers={"X-Profile": "cprofile",
+                                       "X-Admin-Token": "secret"})
+
+        assert response.status_code == 200
+        name = response.headers["X-Profile-Id"]
+        assert name.endswith(".pstats")
+        stats = pstats.Stats(str(profiling / name))
+        assert any(func[2] == "get_product" for func in stats.stats)
+
+    def test_profile_requires_admin_token(self, client, profiling,
+                                          sample_product):
+        response = client.get(f"/api/products/{sample_product.id}",
+                              headers={"X-Profile": "cprofile",
+                                       "X-Admin-Token": "wrong"})
+
+        assert response.status_code == 403
+        assert not profiling.exists()
+
+    def test_random_sample_writes_collapsed_stacks(self, client, profiling,
+                                                   monkeypatch,
+                                                   multiple_products):
+        from backend.src.settings import settings
+        monkeypatch.setattr(settings, "profiling_sample_rate", 1)
+
+        response = client.get("/api/products/?first=0&rows=10")
+
+        name = response.headers["X-Profile-Id"]
+        assert name.endswith(".collapsed")
+        assert (profiling / name).exists()
+
+    def test_admin_profiles_endpoints(self, client, profiling,
+                                      sample_product):
+        name = client.get(f"/api/products/{sample_product.id}",
+                          headers={"X-Profile": "cprofile",
+                                   "X-Admin-Token": "secret"}
+                          ).headers["X-Profile-Id"]
+
+        listing = client.get("/api/admin/profiles",
+                             headers={"X-Admin-Token": "secret"})
+        download = client.get(f"/api/admin/profiles/{name}",
+                              headers={"X-Admin-Token": "secret"})
+        forbidden = client.get("/api/admin/profiles")
+
+        assert listing.json()["data"] == [name]
+        assert download.status_code == 200
+        assert download.content == (profiling / name).read_bytes()
+        assert forbidden.status_code == 403
+
+
+class TestStockShardEndpoints:
+    """Test admin endpoints for sharded stock counters."""
+
+    @pytest.fixture
+    def admin(self, monkeypatch):
+        from backend.src.settings import settings
+        monkeypatch.setattr(settings, "admin_token", "secret")
+        return {"X-Admin-Token": "secret"}
+
+    def test_shard_product_and_order(self, client, admin, sample_customer,
+                                     sample_product):
+        response = client.put(
+            f"/api/admin/products/{sample_product.id}/stock-shards?shards=4",
+            headers=admin)
+        client.post("/api/orders/", json={
+            "customer_id": sample_customer.id,
+            "items": [{"product_id": sample_product.id, "quantity": 3}]})
+        product = client.get(f"/api/products/{sample_product.id}").json()
+        folded = client.post("/api/admin/stock-shards/fold", headers=admin)
+
+        assert response.status_code == 200
+        assert response.json()["data"]["stock_shards"] == 4
+        assert product["data"]["stock_qty"] == 7
+        assert folded.json()["data"]["folded"] == 1
+
+    def test_shard_requires_admin_token(self, client, sample_product):
+        response = client.put(
+            f"/api/admin/products/{sample_product.id}/stock-shards?shards=4")
+
+        assert response.status_code == 403
+
+
+class TestReportEndpoints:
+    """Test sales report endpoints backed by rollups."""
+
+    def _create_order(self, client, customer, product, quantity):
+        return client.post("/api/orders/", json={
+            "customer_id": customer.id,
+            "items": [{"product_id": product.id, "quantity": quantity}]
+        }).json()["data"]
+
+    def test_reports_follow_order_lifecycle(self, client, sample_customer,
+                                            sample_product):
+        first = self._create_order(client, sample_customer, sample_product, 2)
+        second = self._create_order(client, sample_customer, sample_product,
+                                    1)
+        client.put(f"/api/orders/{first['id']}/charge")
+        client.put(f"/api/orders/{second['id']}/cancel")
+
+        daily = client.get("/api/reports/daily").json()["data"]
+        products = client.get("/api/reports/products").json()["data"]
+        customers = client.get("/api/reports/customers").json()["data"]
+
+        assert daily["total"] == 1
+        assert daily["items"][0]["orders_count"] == 1
+        assert daily["items"][0]["revenue"] == first["total_amount"]
+        assert daily["items"][0]["paid_revenue"] == first["total_amount"]
+        assert products["items"][0]["sku"] == sample_product.sku
+        assert products["items"][0]["quantity"] == 2
+        assert customers["items"][0]["customer_id"] == sample_customer.id
+        assert customers["items"][0]["revenue"] == first["total_amount"]
+
+    def test_reports_follow_order_edit(self, client, sample_customer,
+                                       sample_product):
+        order = self._create_order(client, sample_customer, sample_product, 2)
+        client.put("/api/orders/", json={
+            "id": order["id"], "customer_id": sample_customer.id,
+            "items": [{"id": order["items"][0]["id"],
+                       "product_id": sample_product.id, "quantity": 5,
+                       "unit_price": 99.99}]})
+
+        products = client.get("/api/reports/products").json()["data"]
+
+        assert products["items"][0]["quantity"] == 5
+        assert products["items"][0]["revenue"] == 499.95
+
+    def test_reports_period_filter(self, client, sample_customer,
+                                   sample_product):
+        self._create_order(client, sample_customer, sample_product, 1)
+
+        response = client.get("/api/reports/daily?start=2000-01-01"
+                              "&end=2000-01-31")
+
+        assert response.json()["data"]["total"] == 0
+
+    def test_reports_invalid_sort_field(self, client):
+        response = client.get("/api/reports/products?sort_field=nope")
+
+        assert response.status_code == 400
@@ -0,0 +1,166 @@
+import os
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.pool import NullPool
+
+from backend.src.application.dtos.order import OrderQuery
+from backend.src.application.dtos.product import ProductQuery
+from backend.src.exceptions import NPlusOneQueryError
+from backend.src.infrastructure import slow_queries
+from backend.src.infrastructure.instrumentation import normalize_sql, \
+    track_queries
+from backend.src.infrastructure.repositories.order_repository import \
+    OrderRepository
+from backend.src.infrastructure.repositories.product_repository import \
+    ProductRepository
+
+
+class TestNormalizeSql:
+    def test_literals_and_in_lists_are_collapsed(self):
+        a = normalize_sql("SELECT * FROM t WHERE id IN (?, ?, ?) AND x = 'a'")
+        b = normalize_sql("SELECT *  FROM t WHERE id IN (?)\nAND x = 'bb'")
+
+        assert a == b
+        assert a == "SELECT * FROM t WHERE id IN (...) AND x = ?"
+
+    def test_psycopg_params_are_collapsed(self):
+        sql = normalize_sql("SELECT 1 FROM t WHERE id IN (%(id_1_1)s, "
+                            "%(id_1_2)s) LIMIT 10")
+
+        assert sql == "SELECT ? FROM t WHERE id IN (...) LIMIT ?"
+
+
+class TestTrackQueries:
+    def test_counts_statements(self, test_session, multiple_products):
+        repository = ProductRepository(test_session)
+
+        with track_queries("get") as stats:
+            repository.get(multiple_products[0].id)
+
+        assert stats.count >= 1
+        assert stats.duration_ms >= 0
+        assert not stats.n_plus_one
+
+    def test_flags_repeated_shapes(self, test_session, multiple_products):
+        repository = ProductRepository(test_session)
+
+        with track_queries("loop", threshold=3) as stats:
+            for product in multiple_products[:5]:
+                test_session.expunge(product)
+                repository.get(product.id)
+
+        assert any("FROM products WHERE products.id = ?" in shape
+                   for shape in stats.n_plus_one)
+
+    def test_raises_when_enabled(self, test_session, multiple_products):
+        repository = ProductRepository(test_session)
+
+        with pytest.raises(NPlusOneQueryError):
+            with track_queries("loop", threshold=2, raise_on_n_plus_one=True):
+                for product in multiple_products[:5]:
+                    test_session.expunge(product)
+                    repository.get(product.id)
+
+    def test_order_list_is_bounded(self, test_session, multiple_orders):
+        repository = OrderRepository(test_session)
+        test_session.expire_all()
+
+        with track_queries("list", threshold=5, raise_on_n_plus_one=True):
+            repository.list(OrderQuery(rows=10))
+
+
+class TestTimingMiddleware:
+    def test_sql_headers(self, client, sample_product):
+        response = client.get(f"/api/products/{sample_product.id}")
+
+        assert response.status_code == 200
+        assert float(response.headers["X-Process-Time"]) >= 0
+        assert int(response.headers["X-SQL-Count"]) >= 1
+        assert response.headers["X-SQL-N-Plus-One"] == "0"
+
+    def test_debug_endpoint(self, client, sample_product):
+        client.get(f"/api/products/{sample_product.id}")
+
+        response = client.get("/api/debug/sql")
+
+        assert response.status_code == 200
+        data = response.json()["data"]
+        assert data["requests"]
+        assert any(r["label"] == f"GET /api/products/{sample_product.id}"
+                   for r in data["requests"])
+
+
+class TestSlowQueries:
+    @pytest.fixture
+    def slow_log(self, monkeypatch):
+        from backend.src.settings import settings
+
+        monkeypatch.setattr(settings, "slow_query_threshold_ms", 0.000001)
+        monkeypatch.setattr(settings, "slow_query_buffer_size", 3)
+        slow_queries.clear()
+        yield
+        slow_queries.clear()
+
+    def test_records_caller_and_redacts_parameters(self, test_session,
+                                                   multiple_products,
+                                                   slow_log):
+        repository = ProductRepository(test_session)
+
+        repository.list(ProductQuery(name="Product 1", rows=10))
+
+        entries = slow_queries.worst()
+        assert entries
+        assert all(e["caller"] == "ProductRepository.list" for e in entries)
+        assert "Product 1" not in str([e["parameters"] for e in entries])
+        assert "<str>" in str(entries[0]["parameters"])
+
+    def test_keeps_only_the_worst(self, test_session, multiple_products,
+                                  slow_log):
+        repository = ProductRepository(test_session)
+
+        for product in multiple_products[:5]:
+            test_session.expunge(product)
+            repository.get(product.id)
+
+        durations = [e["duration_ms"] for e in slow_queries.worst()]
+        assert len(durations) == 3
+        assert durations == sorted(durations, reverse=True)
+
+    def test_admin_endpoint(self, client, monkeypatch, sample_product,
+                            slow_log):
+        from backend.src.settings import settings
+        monkeypatch.setattr(settings, "admin_token", "secret")
+
+        client.get(f"/api/products/{sample_product.id}")
+        response = client.get("/api/admin/slow-queries",
+                              headers={"X-Admin-Token": "secret"})
+
+        assert response.status_code == 200
+        assert any(e["caller"] == "ProductRepository.get"
+                   for e in response.json()["data"])
+
+    def test_explain_uses_its_own_engine(self, test_session):
+        engine = test_session.get_bind().engine
+
+        explain = slow_queries.explain_engine(engine)
+
+        assert explain is not engine
+        assert isinstance(explain.pool, NullPool)
+        assert explain.url == engine.url
+        assert slow_queries.explain_engine(engine) is explain
+
+    @pytest.mark.skipif(not os.getenv("TEST_POSTGRES_URL"),
+                        reason="TEST_POSTGRES_URL (banco Postgres) nao "
+                               "definido")
+    def test_explain_with_request_pool_exhausted(self):
+        engine = create_engine(os.environ["TEST_POSTGRES_URL"], pool_size=1,
+                               max_overflow=0, pool_timeout=0.1)
+        entry = {"plan": None}
+        try:
+            with engine.connect():
+                slow_queries._explain(engine, "SELECT 1", None, entry)
+        finally:
+            engine.dispose()
+
+        assert entry["plan"][0]["Plan"]["Node Type"] == "Result"
@@ -0,0 +1,249 @@
+import itertools
+import re
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import pytest
+from alembic import command
+from alembic.config import Config
+from sqlalchemy import create_engine, event, insert, text
+from sqlalchemy.orm import Session
+
+from backend.src.application.dtos.customer import CustomerQuery
+from backend.src.application.dtos.order import OrderQuery
+from backend.src.application.dtos.product import ProductQuery
+from backend.src.infrastructure.models import CustomerModel, OrderModel, \
+    OrderItemModel, ProductModel
+from backend.src.infrastructure.models.orders import OrderStatus
+from backend.src.infrastructure.repositories.customer_repository import \
+    CustomerRepository
+from backend.src.infrastructure.repositories.order_repository import \
+    OrderRepository
+from backend.src.infrastructure.repositories.product_repository import \
+    ProductRepository
+from backend.src.settings import settings
+
+BACKEND = Path(__file__).resolve().parents[1]
+
+CUSTOMERS = 500
+PRODUCTS = 200
+ORDERS = 20_000
+ITEMS_PER_ORDER = 2
+
+# tabelas que crescem com o volume de pedidos: nunca podem ser varridas
+BIG_TABLES = ("orders", "order_items", "orders_archive",
+              "order_items_archive")
+_SCAN = re.compile(rf"^SCAN ({'|'.join(BIG_TABLES)})\b")
+
+NOW = datetime.now()
+
+ORDER_FILTERS = {
+    "none": {},
+    "id": {"id": 123},
+    "customer": {"customer": "Cliente 42"},
+    "total_amount": {"total_amount": 150},
+    "status": {"status": OrderStatus.PAID},
+    "created_min": {"created_min": NOW - timedelta(days=30)},
+    "created_max": {"created_max": NOW - timedelta(days=200)},
+    "range": {"created_min": NOW - timedelta(days=90),
+              "created_max": NOW - timedelta(days=60)},
+    "status_range": {"status": OrderStatus.CANCELLED,
+                     "created_min": NOW - timedelta(days=90)},
+    "include_archived": {"include_archived": True},
+    "product_id": {"product_id": 7},
+    "sku": {"sku": "PRD-042"},
+    "sku_range": {"sku": "PRD-042",
+                  "created_min": NOW - timedelta(days=90)},
+}
+ORDER_SORTS = ("id", "customer_id", "total_amount", "status", "created_at")
+
+PRODUCT_FILTERS = {
+    "none": {},
+    "id": {"id": 7},
+    "name": {"name": "Produto 1"},
+    "sku": {"sku": "PRD-01"},
+    "price": {"price": 50},
+    "stock_qty": {"stock_qty": 10},
+    "is_active": {"is_active": True},
+    "created_min": {"created_min": NOW - timedelta(days=30)},
+}
+PRODUCT_SORTS = ("id", "name", "sku", "price", "stock_qty", "created_at")
+
+CUSTOMER_FILTERS = {
+    "none": {},
+    "id": {"id": 7},
+    "name": {"name": "Cliente 1"},
+    "email": {"email": "cliente1"},
+    "document": {"document": "00000000001"},
+    "created_min": {"created_min": NOW - timedelta(days=30)},
+    "orders_min": {"orders_min": 3},
+    "lifetime_value_min": {"lifetime_value_min": 100},
+    "last_order_min": {"last_order_min": NOW - timedelta(days=30)},
+}
+CUSTOMER_SORTS = ("id", "name", "email", "created_at", "orders_count",
+                  "lifetime_value", "last_order_at")
+
+
+def _seed(connection) -> None:
+    connection.execute(insert(CustomerModel), [
+        {"id": i, "name": f"Cliente {i}", "email": f"cliente{i}@example.com",
+         "document": f"{i:011d}", "created_at": NOW - timedelta(days=i),
+         "orders_count": i % 10, "lifetime_value": i * 10,
+         "last_order_at": NOW - timedelta(days=i % 400)}
+        for i in range(1, CUSTOMERS + 1)])
+    connection.execute(insert(ProductModel), [
+        {"id": i, "name": f"Produto {i}", "sku": f"PRD-{i:03d}",
+         "price": i, "stock_qty": i % 50, "is_active": i % 7 != 0,
+         "created_at": NOW - timedelta(days=i)}
+        for i in range(1, PRODUCTS + 1)])
+
+    statuses = list(OrderStatus)
+    orders, items = [], []
+    for i in range(1, ORDERS + 1):
+        # ~3 anos de pedidos, ids crescendo com a data: a janela padrao
+        # pega so uma parte
+        created = NOW - timedelta(minutes=(ORDERS - i) * 79)
+        orders.append({"id": i, "customer_id": i % CUSTOMERS + 1,
+                       "total_amount": i % 500, "status": statuses[i % 3],
+                       "created_at": created})
+        for line in range(ITEMS_PER_ORDER):
+            items.append({"order_id": i, "order_created_at": created,
+                          "product_id": (i + line) % PRODUCTS + 1,
+                          "unit_price": 10, "quantity": 1, "line_total": 10})
+    connection.execute(insert(OrderModel), orders)
+    connection.execute(insert(OrderItemModel), items)
+    connection.execute(text("ANALYZE"))
+
+
+@pytest.fixture(scope="module")
+def plan_engine(tmp_path_factory):
+    """Banco criado pelas migrations (nao pelo create_all) e populado."""
+    url = f"sqlite:///{tmp_path_factory.mktemp('plans') / 'plans.db'}"
+    config = Config()
+    config.set_main_option("script_location",
+                           str(BACKEND / "src/infrastructure/migrations"))
+    with pytest.MonkeyPatch.context() as patch:
+        patch.setenv("DATABASE_URL", url)
+        command.upgrade(config, "head")
+
+    engine = create_engine(url)
+    with engine.begin() as connection:
+        _seed(connection)
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def plans(plan_engine):
+    """
+    Sessao que registra o plano (EXPLAIN QUERY PLAN) de cada SELECT, com as
+    configuracoes padrao (inclusive a janela da listagem).
+    """
+    connection = plan_engine.connect()
+    captured = []
+
+    @event.listens_for(connection, "before_cursor_execute")
+    def _explain(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT"):
+            rows = conn.exec_driver_sql(
+                f"EXPLAIN QUERY PLAN {statement}", parameters).all()
+            captured.append((statement, [row[-1] for row in rows]))
+
+    session = Session(bind=connection)
+    try:
+        yield session, captured
+    finally:
+        session.close()
+        connection.close()
+
+
+def _ordered_walk(statement: str, plan: list) -> bool:
+    """
+    SCAN que ja entrega as linhas na ordem do ORDER BY e para no LIMIT (o
+    equivalente a um Index Scan + Limit no Postgres). O count da mesma
+    listagem, sem LIMIT, continua precisando de indice para o filtro.
+    """
+    sql = statement.upper()
+    return ("ORDER BY" in sql and "LIMIT" in sql and
+            not any("TEMP B-TREE FOR ORDER BY" in d for d in plan))
+
+
+def _assert_no_big_scans(captured) -> None:
+    scans = [(detail, statement) for statement, plan in captured
+             if not _ordered_walk(statement, plan)
+             for detail in plan if _SCAN.match(detail)]
+    assert not scans, "\n\n".join(f"{d}\n{s}" for d, s in scans)
+
+
+class TestOrderQueryPlans:
+    @pytest.mark.parametrize("sort_field,sort_order",
+                             itertools.product(ORDER_SORTS, (1, -1)))
+    @pytest.mark.parametrize("name", ORDER_FILTERS)
+    def test_list(self, plans, name, sort_field, sort_order):
+        session, captured = plans
+        q = OrderQuery(first=20, rows=20, sort_field=sort_field,
+                       sort_order=sort_order, **ORDER_FILTERS[name])
+
+        OrderRepository(session).list(q)
+
+        assert captured
+        _assert_no_big_scans(captured)
+
+    def test_get(self, plans):
+        session, captured = plans
+
+        OrderRepository(session).get(123, archived=True)
+
+        _assert_no_big_scans(captured)
+
+    def test_detects_scan_without_range(self, plans, monkeypatch):
+        session, captured = plans
+        monkeypatch.setattr(settings, "orders_list_window_days", 0)
+
+        OrderRepository(session).list(OrderQuery(sort_field="total_amount"))
+
+        with pytest.raises(AssertionError, match="SCAN orders"):
+            _assert_no_big_scans(captured)
+
+
+class TestProductQueryPlans:
+    @pytest.mark.parametrize("sort_field,sort_order",
+                             itertools.product(PRODUCT_SORTS, (1, -1)))
+    @pytest.mark.parametrize("name", PRODUCT_FILTERS)
+    def test_list(self, plans, name, sort_field, sort_order):
+        session, captured = plans
+        q = ProductQuery(first=0, rows=20, sort_field=sort_field,
+                         sort_order=sort_order, **PRODUCT_FILTERS[name])
+
+        ProductRepository(session).list(q)
+
+        _assert_no_big_scans(captured)
+
+
+class TestCustomerQueryPlans:
+    @pytest.mark.parametrize("sort_field,sort_order",
+                             itertools.product(CUSTOMER_SORTS, (1, -1)))
+    @pytest.mark.parametrize("name", CUSTOMER_FILTERS)
+    def test_list(self, plans, name, sort_field, sort_order):
+        session, captured = plans
+        q = CustomerQuery(first=0, rows=20, sort_field=sort_field,
+                          sort_order=sort_order, **CUSTOMER_FILTERS[name])
+
+        CustomerRepository(session).list(q)
+
+        _assert_no_big_scans(captured)
+
+    @pytest.mark.parametrize("field,prefix", [
+        ("name", "cliente 4"), ("email", "cliente12"),
+        ("document", "000000003")])
+    def test_suggest(self, plans, field, prefix):
+        session, captured = plans
+
+        found = CustomerRepository(session).suggest(prefix, field, 10)
+
+        assert len(found) == 10
+        (_, plan), = captured
+        # uma faixa no indice de prefixo, ja na ordem (sem TEMP B-TREE)
+        assert len(plan) == 1
+        assert plan[0].startswith(
+            f"SEARCH customers USING INDEX ix_customers_{field}_prefix ")
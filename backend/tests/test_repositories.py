@@ -1,17 +1,38 @@
+import os
+
 import pytest
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from pathlib import Path
+
+from alembic import command
+from alembic.config import Config
+from sqlalchemy import select, func, create_engine, text
 
 from backend.src.application.dtos.customer import CustomerQuery
 from backend.src.application.dtos.order import OrderQuery
-from backend.src.application.dtos.product import ProductQuery
-from backend.src.exceptions import NotFoundException, InvalidSortFieldException
-from backend.src.infrastructure.models import OrderItemModel
+from backend.src.application.dtos.product import ProductQuery, ProductGet
+from backend.src.application.dtos.report import ReportQuery
+from backend.src.exceptions import NotFoundException, \
+    InsufficientStockException, InvalidSortFieldException
+from backend.src.infrastructure.models import OrderItemModel, \
+    DailyProductSalesModel, DailyProductSalesDeltaModel, \
+    DailyCustomerSalesDeltaModel
 from backend.src.infrastructure.models.customer import CustomerModel
-from backend.src.infrastructure.models.product import ProductModel
+from backend.src.infrastructure.models.product import ProductModel, \
+    ProductStockShardModel
 from backend.src.infrastructure.repositories.customer_repository import CustomerRepository
 from backend.src.infrastructure.repositories.order_repository import OrderRepository
 from backend.src.infrastructure.repositories.product_repository import ProductRepository
+from backend.src.infrastructure.repositories.sales_report_repository import SalesReportRepository
 from backend.src.infrastructure.models.orders import OrderModel, OrderStatus
+from backend.src.infrastructure.models.orders_archive import \
+    OrderArchiveModel, OrderItemArchiveModel
+from backend.src.infrastructure.partitions import ensure_partitions, \
+    monthly_ranges
+from backend.src.settings import settings
+
+BACKEND = Path(__file__).resolve().parents[1]
 
 
 class TestProductRepository:
@@ -26,6 +47,20 @@ class TestProductRepository:
         assert product.name == sample_product.name
         assert product.sku == sample_product.sku
 
+    def test_get_product_cached_statement(self, test_session,
+                                          multiple_products, sample_order):
+        """Test the cached get binding each id and skipping order items."""
+        from backend.src.infrastructure.instrumentation import track_queries
+
+        repo = ProductRepository(test_session)
+        test_session.expunge_all()
+
+        with track_queries("get") as stats:
+            found = [repo.get(p.id).sku for p in multiple_products[:3]]
+
+        assert found == [p.sku for p in multiple_products[:3]]
+        assert stats.count == 3
+
     def test_get_product_not_found(self, test_session):
         """Test getting a non-existent product raises NotFoundException."""
         repo = ProductRepository(test_session)
@@ -178,6 +213,116 @@ class TestProductRepository:
         with pytest.raises(NotFoundException):
             repo.edit(fake_product)
 
+    def test_adjust_stock_rejects_oversell(self, test_session,
+                                           multiple_products):
+        """Test a decrement beyond stock raises and updates nothing."""
+        repo = ProductRepository(test_session)
+        first, second = multiple_products[1], multiple_products[2]
+
+        with pytest.raises(InsufficientStockException) as exc:
+            repo.adjust_stock({first.id: 1, second.id: second.stock_qty + 1})
+
+        assert exc.value.status_code == 409
+        assert exc.value.product_ids == [second.id]
+
+    def test_adjust_stock_unknown_product(self, test_session,
+                                          multiple_products):
+        """Test an unknown product id raises 404 instead of a stock error."""
+        repo = ProductRepository(test_session)
+        first = multiple_products[1]
+
+        with pytest.raises(NotFoundException) as exc:
+            repo.adjust_stock({first.id: 1, 99999: 1})
+
+        assert exc.value.status_code == 404
+
+    def test_adjust_stock_allows_exact_and_returns(self, test_session,
+                                                   multiple_products):
+        """Test taking the whole stock and returning stock both apply."""
+        repo = ProductRepository(test_session)
+        first, second = multiple_products[1], multiple_products[2]
+        expected = second.stock_qty + 3
+
+        repo.adjust_stock({first.id: first.stock_qty, second.id: -3})
+
+        assert first.stock_qty == 0
+        assert second.stock_qty == expected
+
+
+class TestStockShards:
+    """Test sharded stock counters for hot products."""
+
+    def _shards(self, test_session, product_id):
+        return [qty for qty, in test_session.execute(
+            select(ProductStockShardModel.stock_qty)
+            .where(ProductStockShardModel.product_id == product_id)
+            .order_by(ProductStockShardModel.shard))]
+
+    def test_set_stock_shards_spreads_stock(self, test_session,
+                                            sample_product):
+        repo = ProductRepository(test_session)
+
+        product = repo.set_stock_shards(sample_product.id, 4)
+
+        assert self._shards(test_session, product.id) == [3, 3, 2, 2]
+        assert product.stock_shards == 4
+        assert product.available_stock == 10
+
+    def test_adjust_sharded_stock(self, test_session, sample_product):
+        repo = ProductRepository(test_session)
+        repo.set_stock_shards(sample_product.id, 4)
+
+        repo.adjust_stock({sample_product.id: 2})
+        repo.adjust_stock({sample_product.id: 5})
+        repo.adjust_stock({sample_product.id: -1})
+
+        assert sample_product.available_stock == 4
+        assert sample_product.stock_qty == 10
+        assert ProductGet.model_validate(sample_product).stock_qty == 4
+
+    def test_adjust_sharded_stock_rejects_oversell(self, test_session,
+                                                   sample_product):
+        repo = ProductRepository(test_session)
+        repo.set_stock_shards(sample_product.id, 4)
+
+        with pytest.raises(InsufficientStockException):
+            repo.adjust_stock({sample_product.id: 11})
+
+        assert sum(self._shards(test_session, sample_product.id)) == 10
+
+    def test_fold_stock_shards(self, test_session, sample_product):
+        repo = ProductRepository(test_session)
+        repo.set_stock_shards(sample_product.id, 2)
+        repo.adjust_stock({sample_product.id: 5})
+        repo.adjust_stock({sample_product.id: 1})
+
+        folded = repo.fold_stock_shards()
+
+        assert folded == 1
+        assert sample_product.stock_qty == 4
+        assert self._shards(test_session, sample_product.id) == [2, 2]
+
+    def test_unshard_keeps_stock(self, test_session, sample_product):
+        repo = ProductRepository(test_session)
+        repo.set_stock_shards(sample_product.id, 3)
+        repo.adjust_stock({sample_product.id: 4})
+
+        product = repo.set_stock_shards(sample_product.id, 0)
+
+        assert product.stock_qty == 6
+        assert product.available_stock == 6
+        assert self._shards(test_session, sample_product.id) == []
+
+    def test_list_filters_by_available_stock(self, test_session,
+                                             sample_product):
+        repo = ProductRepository(test_session)
+        repo.set_stock_shards(sample_product.id, 2)
+        repo.adjust_stock({sample_product.id: 8})
+
+        result = repo.list(ProductQuery(stock_qty=5))
+
+        assert result.total == 0
+
 
 class TestCustomerRepository:
     """Test CustomerRepository."""
@@ -266,6 +411,34 @@ class TestCustomerRepository:
         assert result.name == "Jane Smith"
         assert result.email == "jane.smith@example.com"
 
+    def test_refresh_stats(self, test_session, multiple_orders):
+        """Test recomputing order stats ignoring cancelled orders."""
+        repo = CustomerRepository(test_session)
+        multiple_orders[0].status = OrderStatus.CANCELLED
+        test_session.flush()
+
+        repo.refresh_stats([multiple_orders[0].customer_id])
+        customer = repo.get(multiple_orders[0].customer_id)
+
+        assert customer.orders_count == 9
+        assert customer.lifetime_value == Decimal("1799.82")
+        assert customer.last_order_at is not None
+
+    def test_list_customers_sorted_by_lifetime_value(self, test_session,
+                                                     multiple_customers,
+                                                     multiple_orders):
+        """Test filtering and sorting customers by maintained stats."""
+        repo = CustomerRepository(test_session)
+        repo.refresh_stats()
+        query = CustomerQuery(sort_field="lifetime_value", sort_order=-1)
+
+        result = repo.list(query)
+        filtered = repo.list(CustomerQuery(orders_min=1))
+
+        assert result.items[0].id == multiple_orders[0].customer_id
+        assert result.items[1].lifetime_value == 0
+        assert filtered.total == 1
+
 
 class TestOrderRepository:
     """Test OrderRepository."""
@@ -299,6 +472,57 @@ class TestOrderRepository:
         assert result.items[0].items is not None
         assert result.items[0].customer is not None
 
+    def test_list_include_drives_loaders(self, test_session, multiple_orders):
+        from backend.src.infrastructure.instrumentation import track_queries
+
+        repo = OrderRepository(test_session)
+        test_session.expunge_all()
+
+        with track_queries("headers") as headers:
+            page = repo.list(OrderQuery(first=0, rows=10, include=""))
+            assert all(o.items == [] and o.customer is None
+                       for o in page.items)
+        test_session.expunge_all()
+        with track_queries("full") as full:
+            page = repo.list(OrderQuery(first=0, rows=10))
+            assert all(i.product is not None and o.customer is not None
+                       for o in page.items for i in o.items)
+
+        # count + pagina; o grafo completo soma um SELECT ... IN por
+        # relacionamento, independente do tamanho da pagina
+        assert headers.count == 2
+        assert full.count == 5
+
+    def test_get_cached_statement_per_include(self, test_session,
+                                              multiple_orders):
+        repo = OrderRepository(test_session)
+        first, second = multiple_orders[:2]
+        test_session.expunge_all()
+
+        headers = repo.get(first.id, include=frozenset())
+        full = repo.get(second.id)
+        again = repo.get(first.id, include=frozenset(), refresh=True)
+
+        assert (headers.id, full.id) == (first.id, second.id)
+        assert again is headers
+        assert headers.items == [] and headers.customer is None
+        assert len(full.items) == 1 and full.customer is not None
+
+    def test_get_include_items_without_products(self, test_session,
+                                                sample_order):
+        from backend.src.infrastructure.instrumentation import track_queries
+
+        repo = OrderRepository(test_session)
+        test_session.expunge_all()
+
+        with track_queries("items") as stats:
+            order = repo.get(sample_order.id, include=frozenset({"items"}))
+            assert order.items
+            assert all(item.product is None for item in order.items)
+            assert order.customer is None
+
+        assert stats.count == 2
+
     def test_list_orders_with_id_filter(self, test_session, multiple_orders):
         """Test listing customers with id filter."""
         repo = OrderRepository(test_session)
@@ -388,4 +612,449 @@ class TestOrderRepository:
         assert result.id is not None
         assert result.customer_id == sample_customer.id
         assert float(result.total_amount) == 10.00
+        assert result.items[0].order_created_at == new_order.created_at
+
+
+class TestOrderPartitions:
+    """Test the partition-friendly created_at predicates."""
+
+    @pytest.fixture
+    def old_order(self, test_session, sample_customer, sample_product):
+        order = OrderModel(customer_id=sample_customer.id,
+                           status=OrderStatus.PAID,
+                           created_at=datetime.now() - timedelta(days=400))
+        test_session.add(order)
+        test_session.flush()
+        # sem o relacionamento: order_created_at vem do pedido no insert
+        item = OrderItemModel(order_id=order.id, product_id=sample_product.id,
+                              quantity=1, unit_price=10, line_total=10)
+        test_session.add(item)
+        test_session.flush()
+        return order, item
+
+    def test_list_window_bounds_the_default_listing(self, test_session,
+                                                    multiple_orders,
+                                                    old_order, monkeypatch):
+        repo = OrderRepository(test_session)
+        query = OrderQuery(first=0, rows=20, sort_field="id", sort_order=1)
+
+        recent = repo.list(query)
+        monkeypatch.setattr(settings, "orders_list_window_days", 0)
+        everything = repo.list(query)
+
+        assert recent.total == 10
+        assert everything.total == 11
+
+    def test_window_does_not_narrow_bulk_transitions(self, test_session,
+                                                     multiple_orders,
+                                                     old_order, monkeypatch):
+        repo = OrderRepository(test_session)
+        order, _ = old_order
+        monkeypatch.setattr(settings, "orders_list_window_days", 365)
+
+        ids = repo.lock_for_transition([OrderStatus.PAID],
+                                       q=OrderQuery(status=OrderStatus.PAID))
+
+        assert order.id in ids
+
+    def test_list_with_explicit_range(self, test_session, multiple_orders,
+                                      old_order):
+        repo = OrderRepository(test_session)
+        order, item = old_order
+        query = OrderQuery(first=0, rows=20, sort_field="id", sort_order=1,
+                           created_min=datetime.now() - timedelta(days=500),
+                           created_max=datetime.now() - timedelta(days=300))
+
+        result = repo.list(query)
+
+        assert [o.id for o in result.items] == [order.id]
+        assert item.order_created_at == order.created_at
+
+    def test_monthly_ranges_cross_year(self):
+        ranges = monthly_ranges(date(2026, 11, 17), 3)
+
+        assert ranges == [("2026_11", date(2026, 11, 1), date(2026, 12, 1)),
+                          ("2026_12", date(2026, 12, 1), date(2027, 1, 1)),
+                          ("2027_01", date(2027, 1, 1), date(2027, 2, 1))]
+
+    def test_ensure_partitions_is_noop_on_sqlite(self, test_session):
+        assert ensure_partitions(test_session.connection()) == []
+
+    @pytest.mark.skipif(not os.getenv("TEST_POSTGRES_URL"),
+                        reason="TEST_POSTGRES_URL (banco Postgres vazio e "
+                               "descartavel) nao definido")
+    def test_partition_migration_round_trip_on_postgres(self, monkeypatch):
+        url = os.environ["TEST_POSTGRES_URL"]
+        config = Config()
+        config.set_main_option("script_location",
+                               str(BACKEND / "src/infrastructure/migrations"))
+        monkeypatch.setenv("DATABASE_URL", url)
+        engine = create_engine(url)
+        relkind = text("SELECT relkind FROM pg_class WHERE relname = :name")
+        orders = text("SELECT o.id, o.created_at, i.order_id "
+                      "FROM orders o JOIN order_items i ON i.order_id = o.id "
+                      "ORDER BY o.id")
+        try:
+            # tabelas comuns, com pedidos em meses diferentes
+            command.upgrade(config, "5e0a93c7d2f6")
+            with engine.begin() as connection:
+                connection.execute(text(
+                    "INSERT INTO customers (name, email, document, created_at)"
+                    " VALUES ('Part', 'part@example.com', '1', now());"
+                    "INSERT INTO products (name, sku, price, stock_qty,"
+                    " is_active, created_at)"
+                    " VALUES ('Part', 'PART-1', 1, 1, true, now());"
+                    "INSERT INTO orders (customer_id, total_amount, status,"
+                    " created_at) VALUES"
+                    " (1, 1, 'PAID', now() - interval '400 days'),"
+                    " (1, 1, 'CREATED', now());"
+                    "INSERT INTO order_items (order_id, product_id,"
+                    " unit_price, quantity, line_total)"
+                    " SELECT id, 1, 1, 1, 1 FROM orders"))
+                before = connection.execute(orders).all()
+
+            command.upgrade(config, "head")
+            with engine.connect() as connection:
+                assert connection.scalar(relkind, {"name": "orders"}) == "p"
+                assert connection.execute(orders).all() == before
+                assert connection.scalar(text(
+                    "SELECT count(DISTINCT tableoid) FROM orders")) == 2
+
+            command.downgrade(config, "5e0a93c7d2f6")
+            with engine.begin() as connection:
+                assert connection.scalar(relkind, {"name": "orders"}) == "r"
+                assert connection.execute(orders).all() == before
+                assert connection.scalar(relkind,
+                                         {"name": "orders_default"}) is None
+                # a sequencia continua de onde parou
+                assert connection.scalar(text(
+                    "INSERT INTO orders (customer_id, total_amount, status,"
+                    " created_at) VALUES (1, 1, 'CREATED', now())"
+                    " RETURNING id")) == 3
+        finally:
+            command.downgrade(config, "base")
+            engine.dispose()
+
+
+class TestOrderArchive:
+    """Test moving old closed orders to the archive tables."""
+
+    @pytest.fixture
+    def old_orders(self, test_session, sample_customer, sample_product):
+        orders = []
+        for status in (OrderStatus.PAID, OrderStatus.CANCELLED,
+                       OrderStatus.CREATED):
+            order = OrderModel(customer_id=sample_customer.id, status=status,
+                               created_at=datetime.now() - timedelta(
+                                   days=500))
+            order.items.append(OrderItemModel(product_id=sample_product.id,
+                                              quantity=2, unit_price=10))
+            test_session.add(order)
+            orders.append(order)
+        test_session.flush()
+        return orders
+
+    def _before(self):
+        return datetime.now() - timedelta(
+            days=settings.orders_archive_after_days)
+
+    def test_archive_moves_closed_orders(self, test_session, old_orders,
+                                         multiple_orders):
+        repo = OrderRepository(test_session)
+        paid, cancelled, created = old_orders
+
+        moved = repo.archive(self._before(), batch_size=10)
+
+        assert moved == 2
+        assert set(test_session.scalars(select(OrderArchiveModel.id))) == \
+            {paid.id, cancelled.id}
+        assert set(test_session.scalars(
+            select(OrderItemArchiveModel.order_id))) == {paid.id,
+                                                         cancelled.id}
+        remaining = set(test_session.scalars(select(OrderModel.id)))
+        assert created.id in remaining
+        assert paid.id not in remaining
+        assert repo.archive(self._before(), batch_size=10) == 0
+
+    def test_archive_respects_batch_size(self, test_session, old_orders):
+        repo = OrderRepository(test_session)
+
+        assert repo.archive(self._before(), batch_size=1) == 1
+        assert repo.archive(self._before(), batch_size=1) == 1
+        assert repo.archive(self._before(), batch_size=1) == 0
+
+    def test_get_falls_back_to_archive(self, test_session, old_orders):
+        repo = OrderRepository(test_session)
+        paid = old_orders[0]
+        repo.archive(self._before(), batch_size=10)
+        test_session.expunge_all()
+
+        with pytest.raises(NotFoundException):
+            repo.get(paid.id)
+        archived = repo.get(paid.id, archived=True)
+
+        assert isinstance(archived, OrderArchiveModel)
+        assert archived.total_amount == Decimal("20.00")
+        assert [i.quantity for i in archived.items] == [2]
+
+    def test_list_skips_archive_by_default(self, test_session, old_orders,
+                                           multiple_orders):
+        repo = OrderRepository(test_session)
+        repo.archive(self._before(), batch_size=10)
+        query = OrderQuery(first=0, rows=20, sort_field="id", sort_order=1)
+
+        result = repo.list(query)
+
+        # so a tabela quente, e o pedido antigo CREATED fica fora da janela
+        assert result.total == 10
+        assert all(isinstance(o, OrderModel) for o in result.items)
+
+    def test_list_includes_archive(self, test_session, old_orders,
+                                   multiple_orders):
+        repo = OrderRepository(test_session)
+        repo.archive(self._before(), batch_size=10)
+        query = OrderQuery(first=0, rows=20, sort_field="created_at",
+                           sort_order=1, include_archived=True,
+                           created_min=datetime.now() - timedelta(days=600))
+
+        result = repo.list(query)
+
+        assert result.total == 13
+        assert [type(o) for o in result.items[:2]] == [OrderArchiveModel] * 2
+        assert isinstance(result.items[2], OrderModel)
+
+    def test_archive_page_does_not_load_other_orders_of_product(
+            self, test_session, old_orders, multiple_orders):
+        from backend.src.infrastructure.instrumentation import track_queries
+
+        repo = OrderRepository(test_session)
+        repo.archive(self._before(), batch_size=10)
+        test_session.expunge_all()
+        query = OrderQuery(first=0, rows=5, sort_field="created_at",
+                           sort_order=1, include_archived=True,
+                           created_min=datetime.now() - timedelta(days=600))
+
+        with track_queries("archive") as stats:
+            page = repo.list(query)
+            assert all(i.product is not None
+                       for o in page.items for i in o.items)
+
+        # o produto tambem esta nos 11 pedidos quentes: os itens deles nao
+        # podem vir junto com o produto
+        loaded = [o for o in test_session.identity_map.values()
+                  if isinstance(o, OrderItemModel)]
+        assert len(loaded) == 3
+        # count + pagina + (pedidos, clientes, itens, produtos) por tabela
+        assert stats.count == 10
+
+    def test_list_old_range_reads_archive(self, test_session, old_orders):
+        repo = OrderRepository(test_session)
+        paid = old_orders[0]
+        repo.archive(self._before(), batch_size=10)
+        query = OrderQuery(first=0, rows=20, sort_field="id", sort_order=1,
+                           status=OrderStatus.PAID,
+                           created_min=datetime.now() - timedelta(days=600))
+
+        result = repo.list(query)
+
+        assert [o.id for o in result.items] == [paid.id]
+
+    def test_list_by_product_reads_archive(self, test_session, old_orders,
+                                           sample_order, sample_product):
+        repo = OrderRepository(test_session)
+        repo.archive(self._before(), batch_size=10)
+        query = OrderQuery(first=0, rows=20, sort_field="id", sort_order=1,
+                           include_archived=True, sku=sample_product.sku,
+                           created_min=datetime.now() - timedelta(days=600))
+
+        result = repo.list(query)
+
+        assert [o.id for o in result.items] == [o.id for o in old_orders]
+        assert [type(o) for o in result.items] == [
+            OrderArchiveModel, OrderArchiveModel, OrderModel]
+
+    def test_list_with_archive_rejects_unknown_sort(self, test_session):
+        repo = OrderRepository(test_session)
+        query = OrderQuery(first=0, rows=20, sort_field="nope", sort_order=1,
+                           include_archived=True)
+
+        with pytest.raises(InvalidSortFieldException):
+            repo.list(query)
+
+    def test_history_includes_archive(self, test_session, old_orders,
+                                      sample_customer):
+        customers = CustomerRepository(test_session)
+        reports = SalesReportRepository(test_session)
+        reports.rebuild()
+        customers.refresh_stats([sample_customer.id])
+        before = (sample_customer.orders_count,
+                  sample_customer.lifetime_value)
+
+        OrderRepository(test_session).archive(self._before(), batch_size=10)
+        customers.refresh_stats([sample_customer.id])
+
+        assert (sample_customer.orders_count,
+                sample_customer.lifetime_value) == before
+        assert reports.check() == []
+
+
+
+class TestProcessEngine:
+    """Test the lazily created, per-process engine."""
+
+    @pytest.fixture
+    def dbmod(self, monkeypatch, sqlite_url):
+        import backend.src.infrastructure.database as dbmod
+
+        monkeypatch.setattr(dbmod, "_engine", None)
+        monkeypatch.setattr(dbmod, "_engine_pid", None)
+        monkeypatch.setattr(settings, "database_url", sqlite_url)
+        yield dbmod
+        if dbmod._engine is not None:
+            dbmod._engine.dispose()
+
+    def test_engine_is_created_on_first_use(self, dbmod):
+        session = dbmod.SessionLocal()
+
+        assert session.get_bind() is dbmod._engine
+        assert dbmod.get_engine() is dbmod._engine
+        assert str(dbmod._engine.url) == settings.database_url
+        session.close()
+
+    def test_forked_process_gets_its_own_engine(self, dbmod, monkeypatch):
+        parent = dbmod.get_engine()
+        # simula o worker filho: mesmo modulo, outro pid
+        monkeypatch.setattr(dbmod, "_engine_pid", -1)
+
+        child = dbmod.get_engine()
+
+        assert child is not parent
+        assert dbmod.get_engine() is child
+        parent.dispose()
+
+
+class TestOrderTotals:
+    """Test incremental maintenance of line and order totals."""
+
+    def _order(self, lines: int) -> OrderModel:
+        order = OrderModel(customer_id=1, status=OrderStatus.CREATED)
+        for i in range(lines):
+            order.items.append(OrderItemModel(product_id=i + 1, quantity=2,
+                                              unit_price=Decimal("1.25")))
+        return order
+
+    def test_append_accumulates_total(self):
+        order = self._order(4)
+
+        assert order.total_amount == Decimal("10.00")
+        assert [i.line_total for i in order.items] == [Decimal("2.50")] * 4
+
+    def test_item_changes_apply_delta(self):
+        order = self._order(3)
+
+        order.items[0].quantity = 5
+        order.items[1].unit_price = Decimal("2.00")
+
+        assert order.items[0].line_total == Decimal("6.25")
+        assert order.items[1].line_total == Decimal("4.00")
+        assert order.total_amount == Decimal("12.75")
+
+    def test_remove_subtracts_line(self):
+        order = self._order(3)
+
+        order.items.remove(order.items[0])
+
+        assert order.total_amount == Decimal("5.00")
+
+    def test_float_total_amount(self):
+        order = OrderModel(customer_id=1, status=OrderStatus.CREATED,
+                           total_amount=199.98)
+
+        order.items.append(OrderItemModel(product_id=1, quantity=1,
+                                          unit_price=10.0))
+        added = order.total_amount
+        order.items.remove(order.items[0])
+
+        assert added == Decimal("209.98")
+        assert order.total_amount == Decimal("199.98")
+
+    def test_delta_matches_reconciliation(self):
+        order = self._order(50)
+        for item in order.items[::3]:
+            item.quantity = item.quantity + 1
+        for item in order.items[::7]:
+            item.unit_price = Decimal("3.10")
+        total = order.total_amount
+
+        order.recalc_total()
+
+        assert total == order.total_amount
+
+
+class TestSalesReportRepository:
+    """Test sales rollup maintenance and consistency check."""
+
+    def test_check_detects_orders_outside_rollups(self, test_session,
+                                                  sample_order):
+        repo = SalesReportRepository(test_session)
+
+        mismatches = repo.check()
+
+        assert mismatches
+        assert {m["table"] for m in mismatches} == {"daily_product_sales",
+                                                    "daily_customer_sales"}
+
+    def test_rebuild_matches_raw_data(self, test_session, multiple_orders):
+        repo = SalesReportRepository(test_session)
+
+        repo.rebuild()
+
+        assert repo.check() == []
+        daily = repo.daily(ReportQuery())
+        assert daily.items[0]["orders_count"] == 10
+
+    def test_incremental_equals_rebuild(self, test_session, multiple_orders):
+        repo = SalesReportRepository(test_session)
+
+        repo.apply_orders([o.id for o in multiple_orders])
+        repo.apply_orders([multiple_orders[0].id], sign=-1)
+        repo.apply_orders([multiple_orders[0].id])
+
+        assert repo.check() == []
+
+    def test_apply_orders_only_appends_deltas(self, test_session,
+                                              multiple_orders):
+        repo = SalesReportRepository(test_session)
+
+        repo.apply_orders([o.id for o in multiple_orders])
+
+        assert test_session.scalar(
+            select(func.count()).select_from(DailyProductSalesModel)) == 0
+        assert test_session.scalar(
+            select(func.count()).select_from(DailyProductSalesDeltaModel))
+        assert repo.check() == []
+        assert repo.daily(ReportQuery()).items[0]["orders_count"] == 10
+
+    def test_fold_moves_deltas_into_rollups(self, test_session,
+                                            multiple_orders):
+        repo = SalesReportRepository(test_session)
+        repo.apply_orders([o.id for o in multiple_orders])
+        repo.apply_orders([multiple_orders[0].id], sign=-1)
+        repo.apply_orders([multiple_orders[0].id])
+        before = repo.daily(ReportQuery()).items
+        pending = sum(test_session.scalar(select(func.count()).select_from(m))
+                      for m in (DailyProductSalesDeltaModel,
+                                DailyCustomerSalesDeltaModel))
+
+        folds = [repo.fold(batch_size=1)]
+        while folds[-1]:
+            folds.append(repo.fold(batch_size=1))
 
+        assert len(folds) > 2
+        assert sum(folds) == pending
+        assert test_session.scalar(
+            select(func.count()).select_from(DailyProductSalesDeltaModel)) == 0
+        assert test_session.scalar(
+            select(func.count()).select_from(DailyCustomerSalesDeltaModel)) == 0
+        assert repo.check() == []
+        assert repo.daily(ReportQuery()).items == before
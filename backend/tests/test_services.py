@@ -1,18 +1,45 @@
+import asyncio
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from unittest.mock import Mock, MagicMock
 
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.exc import OperationalError
 from sqlalchemy.orm import sessionmaker
 
 from backend.src.application.dtos.customer import CustomerCreate, CustomerQuery
-from backend.src.application.dtos.order import OrderQuery
+from backend.src.application.dtos.order import OrderQuery, OrderCreate, \
+    OrderEdit, OrderBulkAction, FULL_INCLUDE
 from backend.src.application.dtos.page import Page
 from backend.src.application.dtos.product import ProductQuery
-from backend.src.application.services.customer_service import CustomerService
+from backend.src.application.services.customer_service import \
+    CustomerService, suggestion_cache
 from backend.src.application.services.order_service import OrderService
 from backend.src.application.services.product_service import ProductService
+from backend.src.infrastructure.cache import TTLCache
+from backend.src.infrastructure.database import create_db_engine
 from backend.src.infrastructure.models.customer import CustomerModel
 from backend.src.infrastructure.models.orders import OrderModel, OrderStatus
+from backend.src.infrastructure.instrumentation import track_queries
+from backend.src.exceptions import InsufficientStockException, \
+    NotFoundException
+from backend.src.infrastructure.models import Base
 from backend.src.infrastructure.models.product import ProductModel
+from backend.src.infrastructure.repositories.order_repository import \
+    OrderRepository
+from backend.src.infrastructure.repositories.product_repository import \
+    ProductRepository
+from backend.src.infrastructure.events import Broadcaster, OutboxSource, \
+    Subscription
+from backend.src.infrastructure.outbox import MemorySink, build_sinks, \
+    relay_once
+from backend.src.infrastructure.repositories.outbox_repository import \
+    OutboxRepository
+from backend.src.infrastructure.retry import retry_on_conflict
+from backend.src.settings import settings
 
 
 def _new_service_session(test_session):
@@ -151,6 +178,68 @@ class TestCustomerService:
 
         svc_session.close()
 
+    @pytest.mark.parametrize("term,lookups", [
+        ("123.456.789-0", [("1234567890", "document")]),
+        ("Ana@Mail", [("ana@mail", "email")]),
+        ("  Ana ", [("ana", "name"), ("ana", "email")]),
+    ])
+    def test_suggest_picks_columns_by_term(self, test_session, term,
+                                           lookups):
+        suggestion_cache.clear()
+        mock_repo = Mock(spec=["suggest"])
+        mock_repo.suggest.return_value = []
+
+        CustomerService(test_session, mock_repo).suggest(term, 5)
+
+        assert [c.args[:2] for c in mock_repo.suggest.call_args_list] == \
+            lookups
+
+    def test_suggest_fills_with_email_and_caches(self, test_session):
+        suggestion_cache.clear()
+        ana = CustomerModel(id=1, name="Ana", email="ana@example.com",
+                            document="12345678900")
+        anabela = CustomerModel(id=2, name="Bela", email="anabela@example.com",
+                                document="12345678911")
+        mock_repo = Mock(spec=["suggest"])
+        mock_repo.suggest.side_effect = [[ana], [ana, anabela]]
+
+        service = CustomerService(test_session, mock_repo)
+        first = service.suggest("ana", 3)
+        second = service.suggest("ANA", 3)
+
+        assert [c.id for c in first] == [1, 2]
+        assert second == first
+        # o e-mail so completa o que faltou do nome
+        assert mock_repo.suggest.call_args_list[1].args == ("ana", "email", 2)
+        assert mock_repo.suggest.call_count == 2
+        suggestion_cache.clear()
+
+
+class TestTTLCache:
+    def test_expires_and_evicts(self, monkeypatch):
+        now = [100.0]
+        monkeypatch.setattr("backend.src.infrastructure.cache.time.monotonic",
+                            lambda: now[0])
+        cache = TTLCache(max_size=2, ttl=10)
+
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+        cache.set("c", 3)
+
+        assert cache.get("b") is None
+        assert cache.get("a") == 1
+        now[0] += 11
+        assert cache.get("c") is None
+        assert len(cache) == 1
+
+    def test_disabled_with_zero_ttl(self):
+        cache = TTLCache(max_size=10, ttl=0)
+
+        cache.set("a", 1)
+
+        assert cache.get("a") is None
+
 
 class TestOrderService:
     def test_get_order(self, test_session):
@@ -180,7 +269,8 @@ class TestOrderService:
         result = service.get(1)
 
         assert result.id == 1
-        mock_order_repo.get.assert_called_once_with(1)
+        mock_order_repo.get.assert_called_once_with(1, archived=True,
+                                                    include=FULL_INCLUDE)
 
         svc_session.close()
 
@@ -224,3 +314,445 @@ class TestOrderService:
         assert called_query.sort_order == -1
 
         svc_session.close()
+
+
+class TestOrderServiceEdit:
+    def _service(self, test_session):
+        svc_session = _new_service_session(test_session)
+        return OrderService(svc_session, OrderRepository(svc_session),
+                            ProductRepository(svc_session))
+
+    def _products(self, test_session, count):
+        prefix = "S" + chr(65 + count // 26 % 26) + chr(65 + count % 26)
+        products = [ProductModel(name=f"Bulk {count} {i}",
+                                 sku=f"{prefix}-{i:03d}",
+                                 price=10.0, stock_qty=100, is_active=True,
+                                 created_at=datetime.now())
+                    for i in range(count)]
+        test_session.add_all(products)
+        test_session.flush()
+        return products
+
+    def _edit_round_trips(self, test_session, customer, lines):
+        products = self._products(test_session, lines + 2)
+        service = self._service(test_session)
+        order = service.add(OrderCreate(customer_id=customer.id, items=[
+            {"product_id": p.id, "quantity": 1} for p in products[:lines]]))
+        service.session.close()
+
+        items = [{"id": it.id, "product_id": it.product.id,
+                  "quantity": it.quantity + (i % 2), "unit_price": 10.0}
+                 for i, it in enumerate(order.items[1:])]
+        items.append({"product_id": products[-1].id, "quantity": 3,
+                      "unit_price": 10.0})
+        edit = OrderEdit(id=order.id, customer_id=customer.id, items=items)
+
+        service = self._service(test_session)
+        with track_queries("edit") as stats:
+            result = service.edit(edit)
+        service.session.close()
+        return result, stats.count
+
+    def test_edit_applies_diff(self, test_session, sample_customer):
+        result, _ = self._edit_round_trips(test_session, sample_customer, 10)
+
+        quantities = sorted(it.quantity for it in result.items)
+        assert len(result.items) == 10
+        assert quantities == [1] * 5 + [2] * 4 + [3]
+        assert result.total_amount == sum(quantities) * 10.0
+
+    def test_edit_stock_follows_diff(self, test_session, sample_customer):
+        result, _ = self._edit_round_trips(test_session, sample_customer, 10)
+
+        stock = {it.product.id: it.product.stock_qty for it in result.items}
+        for it in result.items:
+            assert stock[it.product.id] == 100 - it.quantity
+        removed = test_session.get(ProductModel, min(stock) - 1)
+        test_session.refresh(removed)
+        assert removed.stock_qty == 100
+
+    def test_edit_with_unknown_product_is_not_found(self, test_session,
+                                                   sample_customer):
+        products = self._products(test_session, 2)
+        service = self._service(test_session)
+        order = service.add(OrderCreate(customer_id=sample_customer.id,
+                                        items=[{"product_id": products[0].id,
+                                                "quantity": 1}]))
+        service.session.close()
+
+        edit = OrderEdit(id=order.id, customer_id=sample_customer.id, items=[
+            {"product_id": products[1].id + 1000, "quantity": 1,
+             "unit_price": 10.0}])
+        service = self._service(test_session)
+        with pytest.raises(NotFoundException):
+            service.edit(edit)
+        service.session.close()
+
+        test_session.refresh(products[0])
+        assert products[0].stock_qty == 99
+
+    def test_edit_round_trips_are_constant(self, test_session,
+                                           sample_customer):
+        _, small = self._edit_round_trips(test_session, sample_customer, 10)
+        _, large = self._edit_round_trips(test_session, sample_customer, 200)
+
+        assert small == large
+
+    def test_edit_inserts_carry_partition_key(self, test_session,
+                                              sample_customer):
+        result, _ = self._edit_round_trips(test_session, sample_customer, 3)
+
+        order = test_session.get(OrderModel, result.id)
+        test_session.refresh(order)
+        assert {it.order_created_at for it in order.items} == {
+            order.created_at}
+
+
+class TestOrderServiceBulk:
+    def _service(self, test_session):
+        session = _new_service_session(test_session)
+        return OrderService(session, OrderRepository(session),
+                            ProductRepository(session))
+
+    def _cancel_round_trips(self, test_session, customer, product, count):
+        ids = []
+        for _ in range(count):
+            service = self._service(test_session)
+            ids.append(service.add(OrderCreate(customer_id=customer.id, items=[
+                {"product_id": product.id, "quantity": 1}])).id)
+            service.session.close()
+
+        service = self._service(test_session)
+        with track_queries("cancel_many") as stats:
+            outcomes = service.cancel_many(OrderBulkAction(ids=ids))
+        service.session.close()
+        return outcomes, stats.count
+
+    def test_cancel_many_round_trips_are_constant(self, test_session,
+                                                  sample_customer,
+                                                  sample_product):
+        sample_product.stock_qty = 1000
+        test_session.flush()
+
+        small, few = self._cancel_round_trips(
+            test_session, sample_customer, sample_product, 2)
+        large, many = self._cancel_round_trips(
+            test_session, sample_customer, sample_product, 40)
+
+        assert len(large) == 40
+        assert all(o.result == "changed" for o in small + large)
+        assert few == many
+
+
+class _FailingSink:
+    def publish(self, batch):
+        raise RuntimeError("sink down")
+
+
+class TestOutboxRelay:
+    @pytest.fixture
+    def session(self, sqlite_url):
+        # engine proprio: o rollback do relay precisa ser real, sem o
+        # SAVEPOINT compartilhado do test_session
+        engine = create_engine(sqlite_url)
+        Base.metadata.create_all(bind=engine)
+        session = sessionmaker(bind=engine)()
+        OutboxRepository(session).add("order", 1, "created", {"status": "X"})
+        session.commit()
+        yield session
+        session.close()
+        engine.dispose()
+
+    def test_relay_publishes_once(self, session):
+        sink = MemorySink()
+
+        first = relay_once(session, [sink])
+        second = relay_once(session, [sink])
+
+        assert (first, second) == (1, 0)
+        assert sink.events[0]["position"] == 1
+        assert sink.events[0]["payload"] == {"status": "X"}
+
+    def test_failed_sink_keeps_events_pending(self, session):
+        with pytest.raises(RuntimeError):
+            relay_once(session, [_FailingSink()])
+        sink = MemorySink()
+        published = relay_once(session, [sink])
+
+        assert published == 1
+        assert sink.events[0]["position"] == 1
+
+    def test_file_sink_and_build_sinks(self, tmp_path):
+        path = tmp_path / "events" / "outbox.jsonl"
+        sinks = build_sinks(f"file:{path}, http://localhost:9/hook, memory")
+
+        sinks[0].publish([{"position": 1}, {"position": 2}])
+
+        assert [type(s).__name__ for s in sinks] == ["FileSink", "HttpSink",
+                                                     "MemorySink"]
+        assert path.read_text().splitlines() == ['{"position": 1}',
+                                                 '{"position": 2}']
+        with pytest.raises(ValueError):
+            build_sinks("kafka://broker")
+
+
+class _ListSource:
+    """Fonte de avisos em memoria para o Broadcaster."""
+
+    def __init__(self, items):
+        self.items = items
+
+    def head(self):
+        return max((i["version"] for i in self.items), default=0)
+
+    def changes(self, since, limit):
+        return [i for i in self.items if i["version"] > since][:limit]
+
+
+def _change(version, entity="order", entity_id=1):
+    return {"entity": entity, "id": entity_id, "version": version,
+            "event": "edited"}
+
+
+class TestEventBroadcaster:
+    def test_subscription_filters(self):
+        async def run():
+            subscription = Subscription(["product"], [7], maxsize=10)
+            for item in (_change(1, "order", 7), _change(2, "product", 8),
+                         _change(3, "product", 7)):
+                subscription.offer(item)
+            subscription.close()
+            return [await subscription.get(1), await subscription.get(1)]
+
+        assert asyncio.run(run()) == [_change(3, "product", 7), None]
+
+    def test_slow_subscription_gets_single_resync(self):
+        async def run():
+            subscription = Subscription(maxsize=2)
+            for version in range(1, 6):
+                subscription.offer(_change(version))
+            resync = await subscription.get(1)
+            subscription.offer(_change(6))
+            return resync, await subscription.get(1), \
+                await subscription.get(0.01)
+
+        resync, after, idle = asyncio.run(run())
+
+        assert resync == {"event": "resync", "version": 3}
+        assert after == _change(6)
+        assert idle is False
+
+    def test_poll_fans_out_from_cursor(self):
+        source = _ListSource([_change(1)])
+
+        async def run():
+            broadcaster = Broadcaster(source, interval=60, queue_size=10)
+            orders = await broadcaster.subscribe(["order"])
+            products = await broadcaster.subscribe(["product"])
+            source.items += [_change(2), _change(3, "product", 5)]
+            await broadcaster.poll()
+            await broadcaster.stop()
+            return ([await orders.get(1), await orders.get(1)],
+                    [await products.get(1), await products.get(1)],
+                    broadcaster.position)
+
+        orders, products, position = asyncio.run(run())
+
+        # o aviso 1 ja existia antes da assinatura
+        assert orders == [_change(2), None]
+        assert products == [_change(3, "product", 5), None]
+        assert position == 3
+
+    def test_outbox_source_reads_published_feed(self, test_session):
+        session = _new_service_session(test_session)
+        OutboxRepository(session).add("product", 4, "edited")
+        session.commit()
+        source = OutboxSource(lambda: _new_service_session(test_session))
+
+        assert source.head() == 0
+        relay_once(session, [])
+
+        assert source.head() == 1
+        assert source.changes(0, 10) == [{"entity": "product", "id": 4,
+                                          "version": 1, "event": "edited"}]
+
+
+class _DriverError(Exception):
+    def __init__(self, sqlstate):
+        super().__init__(f"sqlstate {sqlstate}")
+        self.sqlstate = sqlstate
+
+
+class TestStockReservation:
+    @pytest.fixture
+    def no_backoff(self, monkeypatch):
+        monkeypatch.setattr(settings, "db_retry_backoff_ms", 0)
+        monkeypatch.setattr(settings, "db_retry_attempts", 3)
+
+    def test_retry_on_deadlock(self, no_backoff):
+        calls = []
+
+        @retry_on_conflict
+        def operation():
+            calls.append(1)
+            if len(calls) < 3:
+                raise OperationalError("UPDATE", {}, _DriverError("40P01"))
+            return "ok"
+
+        assert operation() == "ok"
+        assert len(calls) == 3
+
+    def test_retry_gives_up(self, no_backoff):
+        calls = []
+
+        @retry_on_conflict
+        def operation():
+            calls.append(1)
+            raise OperationalError("UPDATE", {}, _DriverError("40001"))
+
+        with pytest.raises(OperationalError):
+            operation()
+        assert len(calls) == 3
+
+    def test_other_errors_are_not_retried(self, no_backoff):
+        calls = []
+
+        @retry_on_conflict
+        def operation():
+            calls.append(1)
+            raise OperationalError("UPDATE", {}, _DriverError("23505"))
+
+        with pytest.raises(OperationalError):
+            operation()
+        assert len(calls) == 1
+
+    @staticmethod
+    def _place_concurrent_orders(Session, shards: int, lines: int) -> None:
+        """100 pedidos de 16 threads disputando 40 unidades de um produto."""
+        with Session.begin() as session:
+            customer = CustomerModel(name="Hot Buyer", email="hot@buyer.com",
+                                     document="12345678901",
+                                     created_at=datetime.now())
+            product = ProductModel(name="Hot Product", sku="HOT-001",
+                                   price=10.0, stock_qty=40, is_active=True,
+                                   created_at=datetime.now())
+            session.add_all([customer, product])
+            session.flush()
+            ProductRepository(session).set_stock_shards(product.id, shards)
+
+        def place_order(_):
+            session = Session()
+            service = OrderService(session, OrderRepository(session),
+                                   ProductRepository(session))
+            try:
+                # linhas repetidas do mesmo produto somam no estoque
+                service.add(OrderCreate(customer_id=customer.id, items=[
+                    {"product_id": product.id, "quantity": 1}] * lines))
+                return "created"
+            except InsufficientStockException:
+                return "rejected"
+            finally:
+                session.close()
+
+        with ThreadPoolExecutor(max_workers=16) as pool:
+            outcomes = list(pool.map(place_order, range(100)))
+
+        with Session() as session:
+            stock = session.get(ProductModel, product.id).available_stock
+            orders = session.query(OrderModel).count()
+
+        assert outcomes.count("created") == 40 // lines
+        assert outcomes.count("rejected") == 100 - 40 // lines
+        assert stock == 0
+        assert orders == 40 // lines
+
+    @pytest.mark.parametrize("lines", [1, 2])
+    @pytest.mark.parametrize("shards", [0, 16])
+    def test_concurrent_orders_do_not_oversell(self, sqlite_url, shards,
+                                               lines):
+        engine = create_engine(sqlite_url, connect_args={
+            "check_same_thread": False, "timeout": 30})
+
+        # BEGIN IMMEDIATE: o SQLite serializa os writers em vez de abortar
+        @event.listens_for(engine, "connect")
+        def _autocommit(dbapi_connection, _):
+            dbapi_connection.isolation_level = None
+
+        @event.listens_for(engine, "begin")
+        def _begin_immediate(conn):
+            conn.exec_driver_sql("BEGIN IMMEDIATE")
+
+        Base.metadata.create_all(bind=engine)
+        try:
+            self._place_concurrent_orders(
+                sessionmaker(bind=engine, expire_on_commit=False),
+                shards, lines)
+        finally:
+            engine.dispose()
+
+    @pytest.fixture
+    def postgres_engine(self, monkeypatch):
+        """
+        Engine da aplicacao (lock_timeout, pool) no banco de
+        TEST_POSTGRES_URL, com as tabelas criadas pelos models e apagadas no
+        final.
+        """
+        url = os.getenv("TEST_POSTGRES_URL")
+        if not url:
+            pytest.skip("TEST_POSTGRES_URL (banco Postgres vazio e "
+                        "descartavel) nao definido")
+        # lock_timeout curto e varias tentativas: as esperas viram 55P03 e
+        # passam pelo retry do servico
+        monkeypatch.setattr(settings, "db_lock_timeout_ms", 50)
+        monkeypatch.setattr(settings, "db_retry_attempts", 20)
+        monkeypatch.setattr(settings, "db_retry_backoff_ms", 1)
+        engine = create_db_engine(url)
+        Base.metadata.create_all(bind=engine)
+        yield engine
+        Base.metadata.drop_all(bind=engine)
+        engine.dispose()
+
+    @pytest.mark.parametrize("lines", [1, 2])
+    @pytest.mark.parametrize("shards", [0, 16])
+    def test_concurrent_orders_do_not_oversell_on_postgres(
+            self, postgres_engine, shards, lines):
+        Session = sessionmaker(bind=postgres_engine, expire_on_commit=False)
+
+        # segura as travas ate o COMMIT para as transacoes se sobreporem
+        @event.listens_for(Session, "before_commit")
+        def _hold(_):
+            time.sleep(0.005)
+
+        self._place_concurrent_orders(Session, shards, lines)
+
+    def test_lock_timeout_is_retried_on_postgres(self, postgres_engine,
+                                                 monkeypatch):
+        from backend.src import metrics
+
+        monkeypatch.setattr(settings, "db_retry_attempts", 2)
+        Session = sessionmaker(bind=postgres_engine, expire_on_commit=False)
+        with Session.begin() as session:
+            customer = CustomerModel(name="Hot Buyer", email="hot@buyer.com",
+                                     document="12345678901",
+                                     created_at=datetime.now())
+            product = ProductModel(name="Hot Product", sku="HOT-001",
+                                   price=10.0, stock_qty=40, is_active=True,
+                                   created_at=datetime.now())
+            session.add_all([customer, product])
+        retries = metrics.DB_RETRIES.labels("OrderService.add")
+        before = retries._value.get()
+
+        with Session.begin() as holder:
+            holder.get(ProductModel, product.id, with_for_update=True)
+            session = Session()
+            service = OrderService(session, OrderRepository(session),
+                                   ProductRepository(session))
+            try:
+                with pytest.raises(OperationalError) as error:
+                    service.add(OrderCreate(customer_id=customer.id, items=[
+                        {"product_id": product.id, "quantity": 1}]))
+            finally:
+                session.close()
+
+        assert error.value.orig.sqlstate == "55P03"
+        assert retries._value.get() == before + 1
@@ -7,6 +7,9 @@ export interface Customer {
   document: string;
   created_at?: string;
   updated_at?: string;
+  orders_count?: number;
+  lifetime_value?: number;
+  last_order_at?: string | null;
 }
 
 export interface CustomerFormData {
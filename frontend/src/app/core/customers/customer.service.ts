@@ -28,6 +28,12 @@ export class CustomerService {
         return this.http.get<ApiResponse<CustomerListResponse>>(this.apiUrl, {params});
     }
 
+    public suggestCustomers(q: string): Observable<ApiResponse<Customer[]>> {
+        const params = new HttpParams().set('q', q);
+
+        return this.http.get<ApiResponse<Customer[]>>(`${this.apiUrl}/suggest`, {params});
+    }
+
     public getCustomer(id: number): Observable<ApiResponse<Customer>> {
         return this.http.get<ApiResponse<Customer>>(`${this.apiUrl}/${id}`);
     }
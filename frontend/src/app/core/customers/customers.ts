@@ -1,6 +1,6 @@
 import {Component, OnDestroy, OnInit} from '@angular/core';
 import {FormBuilder, FormGroup, ReactiveFormsModule, Validators} from '@angular/forms';
-import {DatePipe} from '@angular/common';
+import {CurrencyPipe, DatePipe} from '@angular/common';
 import {firstValueFrom, Subject, takeUntil} from 'rxjs';
 import {debounceTime} from 'rxjs/operators';
 import {TableLazyLoadEvent, TableModule} from 'primeng/table';
@@ -16,7 +16,7 @@ import {NgxMaskDirective} from "ngx-mask";
 
 @Component({
     selector: 'app-customers',
-  imports: [TableModule, DatePipe, Dialog, ReactiveFormsModule, DatePicker, NgxMaskDirective],
+  imports: [TableModule, CurrencyPipe, DatePipe, Dialog, ReactiveFormsModule, DatePicker, NgxMaskDirective],
     templateUrl: './customers.html',
     styleUrl: './customers.scss'
 })
@@ -45,11 +45,14 @@ export interface OrderFilterParams {
   customer?: string;
   total_amount?: number;
   status?: OrderStatus;
+  product_id?: number;
+  sku?: string;
   created_min?: string;
   first?: number;
   rows?: number;
   sort_field?: string;
   sort_order?: number;
+  include?: string;
 }
 
 export interface OrderListResponse {
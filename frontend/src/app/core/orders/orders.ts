@@ -12,6 +12,7 @@ import { CustomerService } from '../customers/customer.service';
 import { ProductService } from '../products/product.service';
 import { LoadingService } from '../loading/loading.service';
 import { NotificationService } from '../../services/notification.service';
+import { EventsService } from '../../services/events.service';
 import {
     Order,
     OrderStatus,
@@ -91,7 +92,8 @@ export class Orders implements OnInit, OnDestroy {
         private productService: ProductService,
         private fb: FormBuilder,
         private loading: LoadingService,
-        private notification: NotificationService
+        private notification: NotificationService,
+        private events: EventsService
     ) {
         this.orderForm = this.createOrderForm();
         this.orderFilter = this.createFilterForm();
@@ -103,6 +105,16 @@ export class Orders implements OnInit, OnDestroy {
             .subscribe(() => {
                 this.loadOrders();
             })
+
+        this.events.changes('order')
+            .pipe(takeUntil(this.destroy$))
+            .subscribe((change) => {
+                if (change == null || change.event === 'created') {
+                    this.loadOrders();
+                } else if (this.orders.items.some((o) => o.id === change.id)) {
+                    this.refreshOrder(change.id);
+                }
+            });
     }
 
     ngOnInit(): void {
@@ -196,13 +208,11 @@ export class Orders implements OnInit, OnDestroy {
     }
 
     public async customerSearch(event: AutoCompleteCompleteEvent): Promise<void> {
-        const params = { name: event.query };
-
-        this.customerService.getCustomers(params)
+        this.customerService.suggestCustomers(event.query)
             .pipe(takeUntil(this.destroy$))
             .subscribe({
                 next: (res) => {
-                    this.customerSuggestions = res.data.items;
+                    this.customerSuggestions = res.data;
                 },
                 error: (error) => {
                     console.error('Error searching customers:', error);
@@ -255,6 +265,8 @@ export class Orders implements OnInit, OnDestroy {
             total_amount: filter.total_amount ?? '',
             status: filter.status ?? '',
             created_min: filter.created_min ? new Date(filter.created_min).toISOString() : '',
+            // a tabela so mostra o cliente; os itens vem ao abrir o pedido
+            include: 'customer',
             ...this.paginator
         };
 
@@ -270,6 +282,22 @@ export class Orders implements OnInit, OnDestroy {
             });
     }
 
+    private refreshOrder(orderId: number): void {
+        this.orderService.getOrder(orderId)
+            .pipe(takeUntil(this.destroy$))
+            .subscribe({
+                next: (res) => {
+                    this.orders = {
+                        ...this.orders,
+                        items: this.orders.items.map((o) => o.id === orderId ? res.data : o)
+                    };
+                },
+                error: (error) => {
+                    console.error('Error refreshing order:', error);
+                }
+            });
+    }
+
     public get orderId(): number | null {
         return this.orderForm.get('id')?.value;
     }
@@ -297,40 +325,15 @@ export class Orders implements OnInit, OnDestroy {
         }
 
         if (orderId != null) {
-            this.order = this.orders.items.find((o) => o.id === orderId) ?? null;
-
-            if (this.order) {
-                this.customerSuggestions = this.order.customer ? [this.order.customer] : [];
-
-                this.orderForm.patchValue({
-                    id: this.order.id,
-                    customer: this.order.customer,
-                    total_amount: this.order.total_amount,
-                    status: this.order.status
+            // a listagem vem so com o cliente: busca o pedido com os itens
+            this.orderService.getOrder(orderId)
+                .pipe(takeUntil(this.destroy$))
+                .subscribe({
+                    next: (res) => this.fillOrderForm(res.data),
+                    error: (error) => {
+                        console.error('Error loading order:', error);
+                    }
                 });
-
-                // Add order items
-                this.order.items.forEach((item) => {
-                    const newItem = this.createItemFormGroup();
-                    newItem.patchValue({
-                        id: item.id,
-                        unit_price: item.unit_price,
-                        product: item.product,
-                        quantity: item.quantity,
-                        line_total: item.line_total
-                    });
-
-                    newItem.get('quantity')?.addValidators(Validators.max((item?.quantity ?? 0) + (item.product?.stock_qty ?? 0)));
-
-                    this.itemsFormArray.push(newItem);
-                });
-
-                if (this.order.status !== OrderStatus.CREATED) {
-                    this.orderForm.disable();
-                } else {
-                    this.orderForm.enable();
-                }
-            }
         } else {
             this.orderForm.enable();
             this.orderForm.reset({
@@ -345,6 +348,40 @@ export class Orders implements OnInit, OnDestroy {
         this.modalOrderFormVisible = true;
     }
 
+    private fillOrderForm(order: Order): void {
+        this.order = order;
+        this.customerSuggestions = this.order.customer ? [this.order.customer] : [];
+
+        this.orderForm.patchValue({
+            id: this.order.id,
+            customer: this.order.customer,
+            total_amount: this.order.total_amount,
+            status: this.order.status
+        });
+
+        // Add order items
+        this.order.items.forEach((item) => {
+            const newItem = this.createItemFormGroup();
+            newItem.patchValue({
+                id: item.id,
+                unit_price: item.unit_price,
+                product: item.product,
+                quantity: item.quantity,
+                line_total: item.line_total
+            });
+
+            newItem.get('quantity')?.addValidators(Validators.max((item?.quantity ?? 0) + (item.product?.stock_qty ?? 0)));
+
+            this.itemsFormArray.push(newItem);
+        });
+
+        if (this.order.status !== OrderStatus.CREATED) {
+            this.orderForm.disable();
+        } else {
+            this.orderForm.enable();
+        }
+    }
+
     public async chargeOrder(): Promise<void> {
         if (this.order != null && this.order.status == OrderStatus.CREATED) {
             this.loading.spinnerOn();
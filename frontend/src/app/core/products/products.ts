@@ -9,6 +9,7 @@ import {InputNumber} from 'primeng/inputnumber';
 import {ProductService} from './product.service';
 import {LoadingService} from '../loading/loading.service';
 import {NotificationService} from '../../services/notification.service';
+import {EventsService} from '../../services/events.service';
 import {ProductFilterParams, ProductListResponse} from './product.model';
 import {DatePicker} from "primeng/datepicker";
 import {Select} from "primeng/select";
@@ -39,7 +40,7 @@ export class Products implements OnDestroy {
 
     private destroy$ = new Subject<void>();
 
-    constructor(private productService: ProductService, private fb: FormBuilder, private loading: LoadingService, private notification: NotificationService) {
+    constructor(private productService: ProductService, private fb: FormBuilder, private loading: LoadingService, private notification: NotificationService, private events: EventsService) {
         this.productForm = this.createProductForm();
         this.productsFilter = this.createFilterForm();
 
@@ -48,6 +49,16 @@ export class Products implements OnDestroy {
             .subscribe(() => {
                 this.loadProducts();
             });
+
+        this.events.changes('product')
+            .pipe(takeUntil(this.destroy$))
+            .subscribe((change) => {
+                if (change == null || change.event === 'created') {
+                    this.loadProducts();
+                } else if (this.products.items.some((p) => p.id === change.id)) {
+                    this.refreshProduct(change.id);
+                }
+            });
     }
 
     ngOnDestroy(): void {
@@ -128,6 +139,21 @@ export class Products implements OnDestroy {
             });
     }
 
+    private refreshProduct(productId: number): void {
+        this.productService.getProduct(productId)
+            .pipe(takeUntil(this.destroy$))
+            .subscribe({
+                next: (res) => {
+                    this.products = {
+                        ...this.products,
+                        items: this.products.items.map((p) => p.id === productId ? res.data : p)
+                    };
+                }, error: (error) => {
+                    console.error('Error refreshing product:', error);
+                }
+            });
+    }
+
     public get productId(): number | null {
         return this.productForm.get('id')?.value;
     }
@@ -0,0 +1,37 @@
+import {Injectable} from '@angular/core';
+import {Observable} from 'rxjs';
+import {environment} from '../../environments/environment';
+
+export type ChangeEntity = 'order' | 'product';
+
+export interface ChangeNotification {
+    entity: ChangeEntity;
+    id: number;
+    version: number;
+    event: string;
+}
+
+@Injectable({
+    providedIn: 'root'
+})
+export class EventsService {
+    private readonly apiUrl = `${environment.apiUrl}/events`;
+
+    /**
+     * Avisos de mudanca da entidade via SSE. Emite null quando o servidor pede
+     * resync: a lista inteira deve ser recarregada.
+     * O EventSource reconecta sozinho enviando o Last-Event-ID.
+     */
+    public changes(entity: ChangeEntity): Observable<ChangeNotification | null> {
+        return new Observable((subscriber) => {
+            const source = new EventSource(`${this.apiUrl}?entity=${entity}`);
+
+            source.addEventListener('change', (event) => {
+                subscriber.next(JSON.parse((event as MessageEvent).data));
+            });
+            source.addEventListener('resync', () => subscriber.next(null));
+
+            return () => source.close();
+        });
+    }
+}